@@ -1,6 +1,7 @@
 # app_shivazen/admin.py
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from .busca_clientes import filtrar_clientes
 from .models import *
 
 # Registros simples (para visualização padrão)
@@ -8,14 +9,15 @@ admin.site.register(Funcionalidade)
 admin.site.register(Perfil)
 admin.site.register(PerfilFuncionalidade)
 admin.site.register(Profissional)
-admin.site.register(Cliente)
 admin.site.register(Prontuario)
 admin.site.register(ProntuarioPergunta)
 admin.site.register(Procedimento)
 admin.site.register(ProfissionalProcedimento)
 admin.site.register(Preco)
 admin.site.register(DisponibilidadeProfissional)
+admin.site.register(ExcecaoDisponibilidade)
 admin.site.register(BloqueioAgenda)
+admin.site.register(BloqueioRecorrente)
 admin.site.register(Atendimento)
 admin.site.register(ProntuarioResposta)
 admin.site.register(Notificacao)
@@ -54,4 +56,22 @@ class UsuarioAdmin(BaseUserAdmin):
     ordering = ('email',)
 
 # Remova a linha antiga, pois o @admin.register(Usuario) já faz o registro:
-# admin.site.register(Usuario, UsuarioAdmin)
\ No newline at end of file
+# admin.site.register(Usuario, UsuarioAdmin)
+
+@admin.register(Cliente)
+class ClienteAdmin(admin.ModelAdmin):
+    """
+    A busca usa as colunas normalizadas e indexadas (ver busca_clientes.py)
+    em vez de icontains em cada campo.
+    """
+    list_display = ('nome_completo', 'cpf', 'telefone', 'email', 'ativo')
+    list_filter = ('ativo',)
+    # Só para o admin exibir a caixa de busca; get_search_results faz a busca
+    search_fields = ('nome_completo',)
+    search_help_text = 'Nome, CPF ou telefone'
+    ordering = ('nome_busca',)
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return filtrar_clientes(queryset, search_term), False
@@ -0,0 +1,103 @@
+# app_shivazen/agendamentos.py
+"""
+Serviço de agendamento.
+
+A verificação de conflito e a inserção acontecem na mesma transação, com a
+linha do profissional travada (SELECT ... FOR UPDATE): dois agendamentos
+simultâneos para o mesmo profissional são processados um após o outro,
+enquanto profissionais diferentes não disputam a mesma trava.
+
+A confirmação ao cliente é enfileirada na mesma transação (ver
+notificacoes.py) e enviada depois, fora da requisição.
+
+Como segunda linha de defesa, o banco rejeita sobreposições por conta
+própria (ver migração 0004): restrição de exclusão no PostgreSQL e
+triggers no SQLite.
+
+O SQLite não tem SELECT ... FOR UPDATE: em vez de esperar a trava, uma
+escrita concorrente falha com 'database is locked'. A transação inteira é
+repetida algumas vezes (a nova tentativa já enxerga o agendamento que a
+bloqueou) e, se o banco continuar ocupado, sobe AgendaOcupada, um conflito
+que pode ser tentado de novo, em vez de um erro 500.
+"""
+import time
+from datetime import timedelta
+
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.utils import timezone
+
+from .models import Atendimento, Profissional
+from .notificacoes import enfileirar
+
+# Nome da restrição/trigger criada na migração 0004
+RESTRICAO_SOBREPOSICAO = 'atendimento_sem_sobreposicao'
+
+# Tentativas quando o SQLite responde 'database is locked'; a espera entre
+# elas cresce a partir de ESPERA_BLOQUEIO segundos
+TENTATIVAS_BLOQUEIO = 5
+ESPERA_BLOQUEIO = 0.05
+
+
+class ConflitoDeHorario(Exception):
+    """O horário pedido se sobrepõe a outro agendamento do profissional."""
+
+
+class AgendaOcupada(ConflitoDeHorario):
+    """O banco seguiu travado por outra escrita (SQLite); pode ser tentado de novo."""
+
+
+def _banco_travado(erro):
+    # 'database is locked' (arquivo) ou 'database table is locked' (cache compartilhado)
+    return connection.vendor == 'sqlite' and 'is locked' in str(erro)
+
+
+def agendar(cliente, profissional, procedimento, data_hora_inicio, status='AGENDADO'):
+    """
+    Cria um Atendimento se o horário estiver livre; senão levanta
+    ConflitoDeHorario (AgendaOcupada se o banco seguiu travado). Datas sem
+    fuso são interpretadas no horário local.
+    """
+    if timezone.is_naive(data_hora_inicio):
+        data_hora_inicio = timezone.make_aware(data_hora_inicio)
+    data_hora_fim = data_hora_inicio + timedelta(minutes=procedimento.duracao_minutos)
+
+    # Dentro de uma transação de quem chamou não dá para repetir: o erro
+    # invalida a transação inteira
+    tentativas = 1 if connection.in_atomic_block else TENTATIVAS_BLOQUEIO
+    for tentativa in range(tentativas):
+        try:
+            return _agendar(cliente, profissional, procedimento, data_hora_inicio, data_hora_fim, status)
+        except OperationalError as erro:
+            if not _banco_travado(erro):
+                raise
+            if tentativa == tentativas - 1:
+                raise AgendaOcupada from erro
+            time.sleep(ESPERA_BLOQUEIO * 2 ** tentativa)
+
+
+def _agendar(cliente, profissional, procedimento, data_hora_inicio, data_hora_fim, status):
+    try:
+        with transaction.atomic():
+            # Trava por profissional: quem chegar depois espera o commit do primeiro
+            Profissional.objects.select_for_update().only('pk').get(pk=profissional.pk)
+
+            conflito = Atendimento.objects.filter(
+                profissional=profissional
+            ).ativos().sobrepondo(data_hora_inicio, data_hora_fim).exists()
+            if conflito:
+                raise ConflitoDeHorario
+
+            atendimento = Atendimento.objects.create(
+                cliente=cliente,
+                profissional=profissional,
+                procedimento=procedimento,
+                data_hora_inicio=data_hora_inicio,
+                data_hora_fim=data_hora_fim,
+                status_atendimento=status,
+            )
+            enfileirar(atendimento)
+            return atendimento
+    except IntegrityError as erro:
+        if RESTRICAO_SOBREPOSICAO in str(erro):
+            raise ConflitoDeHorario from erro
+        raise
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class AppShivazenConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app_shivazen'
+
+    def ready(self):
+        # Registra os receivers de invalidação de cache e de auditoria
+        from . import auditoria, signals  # noqa: F401
+        from .cache import verificar_configuracao
+
+        verificar_configuracao()
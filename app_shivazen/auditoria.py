@@ -0,0 +1,304 @@
+# app_shivazen/auditoria.py
+"""
+Auditoria de criação, alteração e exclusão dos modelos sensíveis
+(MODELOS_AUDITADOS) em LogAuditoria.
+
+Os eventos não são gravados um a um: ficam em um buffer do processo e vão
+para o banco com um único bulk_create no fim da requisição
+(AuditoriaMiddleware), quando o buffer passa de TAMANHO_LOTE eventos ou
+INTERVALO segundos depois do primeiro evento pendente (um temporizador,
+para comandos e workers que não passam pelo middleware). Só entram
+eventos de transações confirmadas (transaction.on_commit). Eventos de um
+banco que deixou de ser o configurado (ex: o banco de teste, já destruído
+na saída do processo) são descartados, não gravados no banco atual.
+
+No PostgreSQL, log_auditoria é particionada por mês (migração 0009):
+podar() descarta meses inteiros com DETACH + DROP em vez de um DELETE
+enorme. Nos outros bancos, os meses antigos são apagados em lotes. Um mês
+sem partição vai para a partição padrão; criar_particoes() move essas
+linhas para a partição do mês quando ela é criada.
+
+    SHIVAZEN_AUDITORIA = {'TAMANHO_LOTE': 100, 'INTERVALO': 5, 'RETENCAO_MESES': 24}
+"""
+import atexit
+import gzip
+import json
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, connections, transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from .models import (
+    Atendimento, Cliente, LogAuditoria, Prontuario, ProntuarioPergunta, ProntuarioResposta,
+    TermoConsentimento,
+)
+
+logger = logging.getLogger('app_shivazen.auditoria')
+
+CONFIGURACAO_PADRAO = {'TAMANHO_LOTE': 100, 'INTERVALO': 5.0, 'RETENCAO_MESES': 24}
+
+MODELOS_AUDITADOS = (
+    Atendimento, Cliente, Prontuario, ProntuarioPergunta, ProntuarioResposta, TermoConsentimento,
+)
+
+TABELA = LogAuditoria._meta.db_table
+# Partição padrão criada pela migração 0009
+PARTICAO_PADRAO = f'{TABELA}_padrao'
+
+# Requisição em andamento (definida pelo AuditoriaMiddleware), para saber o usuário
+requisicao_atual = ContextVar('requisicao_auditoria', default=None)
+
+
+def configuracao():
+    return {**CONFIGURACAO_PADRAO, **getattr(settings, 'SHIVAZEN_AUDITORIA', {})}
+
+
+def _banco_atual():
+    return connection.settings_dict['NAME']
+
+
+class BufferAuditoria:
+    """Eventos ainda não gravados, compartilhados pelas threads do processo."""
+
+    def __init__(self):
+        self._eventos = []
+        self._primeiro = None
+        self._banco = None
+        self._temporizador = None
+        self._trava = threading.Lock()
+
+    def __len__(self):
+        return len(self._eventos)
+
+    def adicionar(self, evento):
+        conf = configuracao()
+        with self._trava:
+            self._eventos.append(evento)
+            if self._primeiro is None:
+                self._primeiro = time.monotonic()
+                self._banco = _banco_atual()
+            if self._temporizador is None:
+                self._temporizador = threading.Timer(conf['INTERVALO'], self._descarregar_no_prazo)
+                self._temporizador.daemon = True
+                self._temporizador.start()
+            cheio = (
+                len(self._eventos) >= conf['TAMANHO_LOTE']
+                or time.monotonic() - self._primeiro >= conf['INTERVALO']
+            )
+        if cheio:
+            self.descarregar()
+
+    def _descarregar_no_prazo(self):
+        with self._trava:
+            self._temporizador = None
+        try:
+            self.descarregar()
+        finally:
+            # A thread do temporizador não volta a usar a conexão
+            connections.close_all()
+
+    def descarregar(self):
+        """Grava os eventos pendentes; falhas são registradas, nunca propagadas."""
+        with self._trava:
+            eventos, self._eventos, self._primeiro = self._eventos, [], None
+            banco, self._banco = self._banco, None
+        if not eventos:
+            return 0
+        if banco != _banco_atual():
+            logger.info('%d evento(s) de auditoria do banco %s descartado(s)', len(eventos), banco)
+            return 0
+        try:
+            LogAuditoria.objects.bulk_create(eventos)
+        except Exception:
+            logger.exception('Falha ao gravar %d evento(s) de auditoria', len(eventos))
+            return 0
+        return len(eventos)
+
+
+buffer = BufferAuditoria()
+# Comandos e workers não passam pelo middleware: grava o que sobrou na saída
+atexit.register(buffer.descarregar)
+
+
+def _usuario_id():
+    request = requisicao_atual.get()
+    usuario = getattr(request, 'user', None)
+    if usuario is not None and usuario.is_authenticated:
+        return usuario.pk
+    return None
+
+
+def registrar(acao, instancia, detalhes=None):
+    """Enfileira um evento de auditoria para 'instancia' quando a transação confirmar."""
+    evento = LogAuditoria(
+        usuario_id=_usuario_id(),
+        acao=acao,
+        tabela_afetada=instancia._meta.db_table,
+        id_registro_afetado=instancia.pk,
+        detalhes=detalhes,
+        data_hora=timezone.now(),
+    )
+    transaction.on_commit(lambda: buffer.adicionar(evento))
+
+
+def registro_salvo(sender, instance, created, update_fields=None, **kwargs):
+    detalhes = {'campos': sorted(update_fields)} if update_fields else None
+    registrar('CRIAR' if created else 'ALTERAR', instance, detalhes)
+
+
+def registro_excluido(sender, instance, **kwargs):
+    registrar('EXCLUIR', instance)
+
+
+for modelo in MODELOS_AUDITADOS:
+    post_save.connect(registro_salvo, sender=modelo)
+    post_delete.connect(registro_excluido, sender=modelo)
+
+
+# --- Retenção ---
+
+def inicio_do_mes(ano, mes):
+    # Normaliza meses fora de 1..12 (ex: mes=0 é dezembro do ano anterior)
+    ano, mes = ano + (mes - 1) // 12, (mes - 1) % 12 + 1
+    return timezone.make_aware(datetime(ano, mes, 1))
+
+
+def nome_particao(ano, mes):
+    return f'{TABELA}_p{ano:04d}_{mes:02d}'
+
+
+def particionada():
+    return connection.vendor == 'postgresql'
+
+
+def criar_particoes(meses_a_frente=3):
+    """
+    Cria (se faltarem) as partições do mês atual e dos próximos meses. Linhas
+    do mês que já estejam na partição padrão (mês que ficou sem partição)
+    são movidas para a nova, na mesma transação: com elas lá, um CREATE
+    TABLE ... PARTITION OF falharia.
+    """
+    if not particionada():
+        return []
+    hoje = timezone.localdate()
+    criadas = []
+    for deslocamento in range(meses_a_frente + 1):
+        inicio = inicio_do_mes(hoje.year, hoje.month + deslocamento)
+        fim = inicio_do_mes(inicio.year, inicio.month + 1)
+        nome = nome_particao(inicio.year, inicio.month)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute('SELECT to_regclass(%s)', [nome])
+            if cursor.fetchone()[0] is not None:
+                continue
+            # Tabela avulsa com as linhas do mês, anexada depois; o ATTACH
+            # confere que não sobrou nenhuma delas na partição padrão
+            cursor.execute(f'CREATE TABLE {nome} (LIKE {TABELA} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+            cursor.execute(
+                f'WITH movidas AS (DELETE FROM {PARTICAO_PADRAO} '
+                f'WHERE data_hora >= %s AND data_hora < %s RETURNING *) '
+                f'INSERT INTO {nome} SELECT * FROM movidas',
+                [inicio, fim],
+            )
+            # Limites literais: DDL não aceita parâmetros com server-side binding
+            cursor.execute(
+                f'ALTER TABLE {TABELA} ATTACH PARTITION {nome} '
+                f"FOR VALUES FROM ('{inicio.isoformat()}') TO ('{fim.isoformat()}')"
+            )
+        criadas.append(nome)
+    return criadas
+
+
+def _particoes_mensais():
+    """(ano, mes, nome) de cada partição mensal anexada."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = %s::regclass',
+            [TABELA],
+        )
+        nomes = [linha[0] for linha in cursor.fetchall()]
+    prefixo = f'{TABELA}_p'
+    particoes = []
+    for nome in nomes:
+        if nome.startswith(prefixo):
+            ano, mes = nome[len(prefixo):].split('_')
+            particoes.append((int(ano), int(mes), nome))
+    return sorted(particoes)
+
+
+def _arquivar(pasta, ano, mes, eventos):
+    """Grava os eventos do mês em <pasta>/log_auditoria_AAAA_MM.jsonl.gz."""
+    caminho = f'{pasta}/{TABELA}_{ano:04d}_{mes:02d}.jsonl.gz'
+    quantidade = 0
+    with gzip.open(caminho, 'wt', encoding='utf-8') as arquivo:
+        for evento in eventos.values().iterator(chunk_size=5000):
+            arquivo.write(json.dumps(evento, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n')
+            quantidade += 1
+    return caminho, quantidade
+
+
+def meses_anteriores(corte):
+    """(ano, mes) de cada mês com eventos anteriores a 'corte' (início de mês)."""
+    primeiro = LogAuditoria.objects.filter(data_hora__lt=corte).order_by('data_hora').values_list(
+        'data_hora', flat=True,
+    ).first()
+    if primeiro is None:
+        return []
+    primeiro = timezone.localtime(primeiro)
+    meses = []
+    ano, mes = primeiro.year, primeiro.month
+    while inicio_do_mes(ano, mes) < corte:
+        meses.append((ano, mes))
+        ano, mes = (ano + 1, 1) if mes == 12 else (ano, mes + 1)
+    return meses
+
+
+def podar(meses_retencao=None, pasta_arquivo=None, tamanho_lote=5000):
+    """
+    Remove os eventos de meses anteriores à retenção, mês a mês,
+    opcionalmente arquivando cada mês antes (gzip JSONL em 'pasta_arquivo').
+    Retorna [(ano, mes, quantidade_removida)].
+    """
+    if meses_retencao is None:
+        meses_retencao = configuracao()['RETENCAO_MESES']
+    hoje = timezone.localdate()
+    corte = inicio_do_mes(hoje.year, hoje.month - meses_retencao)
+
+    removidos = []
+    if particionada():
+        for ano, mes, nome in _particoes_mensais():
+            if inicio_do_mes(ano, mes + 1) > corte:
+                continue
+            eventos = LogAuditoria.objects.filter(
+                data_hora__gte=inicio_do_mes(ano, mes), data_hora__lt=inicio_do_mes(ano, mes + 1),
+            )
+            quantidade = _arquivar(pasta_arquivo, ano, mes, eventos)[1] if pasta_arquivo else None
+            # Descartar a partição inteira custa o mesmo com 10 ou 10 milhões de linhas
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(f'ALTER TABLE {TABELA} DETACH PARTITION {nome}')
+                cursor.execute(f'DROP TABLE {nome}')
+            removidos.append((ano, mes, quantidade))
+
+    # Sem partições (ou linhas antigas na partição padrão): apaga em lotes,
+    # cada um em sua transação, para não travar a tabela nem inchar o log
+    for ano, mes in meses_anteriores(corte):
+        eventos = LogAuditoria.objects.filter(
+            data_hora__gte=inicio_do_mes(ano, mes), data_hora__lt=inicio_do_mes(ano, mes + 1),
+        )
+        if pasta_arquivo:
+            _arquivar(pasta_arquivo, ano, mes, eventos)
+        quantidade = 0
+        while True:
+            ids = list(eventos.values_list('pk', flat=True)[:tamanho_lote])
+            if not ids:
+                break
+            quantidade += LogAuditoria.objects.filter(pk__in=ids).delete()[0]
+        removidos.append((ano, mes, quantidade))
+    return removidos
@@ -0,0 +1,75 @@
+# app_shivazen/busca_clientes.py
+"""
+Busca de clientes por nome, CPF ou telefone.
+
+Cliente guarda colunas normalizadas, preenchidas em save() e nos caminhos
+de gravação em lote (ver Cliente.atualizar_campos_busca):
+
+- nome_busca: nome em minúsculas e sem acentos ('José' -> 'jose');
+- cpf_digitos e telefone_digitos: só os dígitos.
+
+No PostgreSQL a busca é por trecho (LIKE '%termo%'), atendida pelos índices
+GIN de trigramas (pg_trgm) criados na migração 0010. Nos outros bancos, ou
+com menos de 3 caracteres (trigramas não ajudam), a busca é por prefixo,
+como faixa no índice B-tree: termo <= coluna < termo + '\\uffff'.
+"""
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import Q
+
+TAMANHO_MINIMO = 2
+TAMANHO_TRIGRAMA = 3
+LIMITE_PADRAO = 10
+
+
+def normalizar_nome(texto):
+    """Minúsculas, sem acentos e com espaços simples."""
+    if not texto:
+        return ''
+    decomposto = unicodedata.normalize('NFKD', texto)
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return ' '.join(sem_acentos.lower().split())
+
+
+def somente_digitos(texto):
+    """Só os dígitos de 'texto' ('123.456.789-00' -> '12345678900'); None se não houver."""
+    return re.sub(r'\D', '', texto or '') or None
+
+
+def _condicao(campo, termo, trecho):
+    if trecho:
+        return Q(**{f'{campo}__contains': termo})
+    return Q(**{f'{campo}__gte': termo, f'{campo}__lt': termo + '\uffff'})
+
+
+def filtrar_clientes(queryset, texto):
+    """
+    Restringe 'queryset' aos clientes que batem com 'texto'. Só dígitos (e
+    pontuação) buscam em CPF e telefone; qualquer letra busca no nome.
+    """
+    nome = normalizar_nome(texto)
+    digitos = somente_digitos(nome)
+    so_digitos = digitos is not None and not any(c.isalpha() for c in nome)
+    termo = digitos if so_digitos else nome
+    if len(termo) < TAMANHO_MINIMO:
+        return queryset.none()
+
+    trecho = connection.vendor == 'postgresql' and len(termo) >= TAMANHO_TRIGRAMA
+    if so_digitos:
+        return queryset.filter(
+            _condicao('cpf_digitos', termo, trecho) | _condicao('telefone_digitos', termo, trecho)
+        )
+    return queryset.filter(_condicao('nome_busca', termo, trecho))
+
+
+def buscar_clientes(texto, limite=LIMITE_PADRAO):
+    """Até 'limite' clientes ativos, em ordem de nome, como dicionários para o typeahead."""
+    from .models import Cliente
+
+    return list(
+        filtrar_clientes(Cliente.objects.filter(ativo=True), texto)
+        .order_by('nome_busca', 'pk')
+        .values('id_cliente', 'nome_completo', 'cpf', 'telefone', 'email')[:limite]
+    )
@@ -0,0 +1,213 @@
+# app_shivazen/cache.py
+"""
+Camada de cache versionada.
+
+Cada cache nomeado (ex: 'disponibilidade') é configurado em
+settings.SHIVAZEN_CACHES e usa um de dois backends:
+
+- 'local': dicionário LRU em memória do processo, com TTL. Ideal para
+  desenvolvimento ou para um único processo.
+- 'django': qualquer backend de django.core.cache (Redis, Memcached...),
+  compartilhado entre os workers.
+
+A invalidação é feita por contadores de versão: as chaves incluem a versão
+atual, e incrementar a versão torna todas as entradas antigas inalcançáveis.
+Com o backend 'local' os contadores também são do processo: uma
+invalidação feita em um worker (ou em um comando) não chega aos outros.
+Por isso 'local' só serve com um único processo (settings.WORKERS == 1);
+verificar_configuracao() avisa na inicialização quando não for o caso.
+
+Caches com 'EXIGE_COMPARTILHADO' (ex: 'permissoes', onde um dado antigo
+concede um acesso já revogado) não aceitam armazenamento por processo
+(backend 'local' ou alias LocMemCache) com mais de um worker: a
+inicialização falha com ImproperlyConfigured.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+
+logger = logging.getLogger('app_shivazen.cache')
+
+CONFIGURACAO_PADRAO = {
+    'BACKEND': 'local',
+    'ALIAS': 'default',
+    'MAX_ITENS': 2048,
+    'TIMEOUT': 300,
+    'EXIGE_COMPARTILHADO': False,
+}
+
+
+def _versao_inicial():
+    # Baseada no relógio, para que uma versão perdida (ex: evicção no
+    # Memcached) nunca volte a um valor já usado por entradas antigas.
+    return int(time.time() * 1000)
+
+
+class CacheLocalLRU:
+    """Cache em memória do processo, com evicção LRU e expiração por TTL."""
+
+    compartilhado = False
+
+    def __init__(self, max_itens=2048, timeout=300):
+        self.max_itens = max_itens
+        self.timeout = timeout
+        self._itens = OrderedDict()
+        self._versoes = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, chaves):
+        agora = time.monotonic()
+        encontrados = {}
+        with self._lock:
+            for chave in chaves:
+                item = self._itens.get(chave)
+                if item is None:
+                    continue
+                expira_em, valor = item
+                if expira_em < agora:
+                    del self._itens[chave]
+                    continue
+                self._itens.move_to_end(chave)
+                encontrados[chave] = valor
+        return encontrados
+
+    def set_many(self, valores):
+        expira_em = time.monotonic() + self.timeout
+        with self._lock:
+            for chave, valor in valores.items():
+                self._itens[chave] = (expira_em, valor)
+                self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+    def versoes(self, nomes):
+        with self._lock:
+            return {nome: self._versoes.setdefault(nome, _versao_inicial()) for nome in nomes}
+
+    def incrementar_versao(self, nome):
+        with self._lock:
+            self._versoes[nome] = self._versoes.get(nome, _versao_inicial()) + 1
+
+
+class CacheDjango:
+    """Adapta um backend de django.core.cache à mesma interface."""
+
+    compartilhado = True
+
+    def __init__(self, alias='default', timeout=300, prefixo=''):
+        self.alias = alias
+        self.timeout = timeout
+        self.prefixo = prefixo
+
+    @property
+    def backend(self):
+        return caches[self.alias]
+
+    def get_many(self, chaves):
+        encontrados = self.backend.get_many([self.prefixo + chave for chave in chaves])
+        return {chave[len(self.prefixo):]: valor for chave, valor in encontrados.items()}
+
+    def set_many(self, valores):
+        self.backend.set_many(
+            {self.prefixo + chave: valor for chave, valor in valores.items()}, timeout=self.timeout
+        )
+
+    def versoes(self, nomes):
+        chaves = {f'{self.prefixo}versao:{nome}': nome for nome in nomes}
+        encontradas = self.backend.get_many(chaves)
+        resultado = {}
+        for chave, nome in chaves.items():
+            if chave not in encontradas:
+                self.backend.add(chave, _versao_inicial(), timeout=None)
+                encontradas[chave] = self.backend.get(chave)
+            resultado[nome] = encontradas[chave]
+        return resultado
+
+    def incrementar_versao(self, nome):
+        chave = f'{self.prefixo}versao:{nome}'
+        try:
+            self.backend.incr(chave)
+        except ValueError:
+            # Versão ainda não existe (ou foi removida): começa uma nova
+            self.backend.set(chave, _versao_inicial(), timeout=None)
+
+
+_instancias = {}
+_instancias_lock = threading.Lock()
+
+
+def obter_cache(nome):
+    """Retorna (e memoriza) o backend configurado para o cache 'nome'."""
+    with _instancias_lock:
+        if nome not in _instancias:
+            config = _configuracoes().get(nome, CONFIGURACAO_PADRAO)
+            _exigir_compartilhado(nome, config)
+            if config['BACKEND'] == 'django':
+                _instancias[nome] = CacheDjango(
+                    alias=config['ALIAS'], timeout=config['TIMEOUT'], prefixo=f'{nome}:'
+                )
+            elif config['BACKEND'] == 'local':
+                _instancias[nome] = CacheLocalLRU(
+                    max_itens=config['MAX_ITENS'], timeout=config['TIMEOUT']
+                )
+            else:
+                raise ValueError(f"Backend de cache desconhecido para '{nome}': {config['BACKEND']}")
+        return _instancias[nome]
+
+
+def _configuracoes():
+    return {
+        nome: {**CONFIGURACAO_PADRAO, **config}
+        for nome, config in getattr(settings, 'SHIVAZEN_CACHES', {}).items()
+    }
+
+
+def _por_processo(config):
+    if config['BACKEND'] == 'local':
+        return True
+    backend = settings.CACHES.get(config['ALIAS'], {}).get('BACKEND', '')
+    return backend == 'django.core.cache.backends.locmem.LocMemCache'
+
+
+def _exigir_compartilhado(nome, config):
+    if config['EXIGE_COMPARTILHADO'] and getattr(settings, 'WORKERS', 1) > 1 and _por_processo(config):
+        raise ImproperlyConfigured(
+            f"O cache '{nome}' precisa ser compartilhado entre os {settings.WORKERS} workers: "
+            f"use BACKEND 'django' com um alias que não seja LocMemCache."
+        )
+
+
+def verificar_configuracao():
+    """
+    Avisa sobre caches 'local' em uma aplicação com mais de um worker e
+    retorna os nomes; falha se algum deles exigir um cache compartilhado.
+    """
+    workers = getattr(settings, 'WORKERS', 1)
+    for nome, config in _configuracoes().items():
+        _exigir_compartilhado(nome, config)
+    locais = sorted(nome for nome, config in _configuracoes().items() if config['BACKEND'] == 'local')
+    if workers > 1 and locais:
+        logger.warning(
+            "Caches %s usam o backend 'local' com %d workers: invalidações feitas em um "
+            "processo não chegam aos outros, que servem dados antigos até o TIMEOUT. "
+            "Use BACKEND 'django' (alias compartilhado) ou GUNICORN_WORKERS=1.",
+            ', '.join(locais), workers,
+        )
+        return locais
+    return []
+
+
+def _configuracao_alterada(setting, **kwargs):
+    # override_settings (testes): recria os caches com a configuração nova
+    if setting in ('SHIVAZEN_CACHES', 'CACHES'):
+        with _instancias_lock:
+            _instancias.clear()
+
+
+setting_changed.connect(_configuracao_alterada)
@@ -0,0 +1,211 @@
+# app_shivazen/catalogo.py
+"""
+Catálogo público de procedimentos e cache das páginas abertas.
+
+O catálogo (procedimentos ativos com ao menos um profissional ativo e o
+menor preço de cada um) é renderizado em partials/catalogo.html dentro de
+um {% cache %} cuja chave inclui versao_catalogo(). Alterações em
+Procedimento, Preco, ProfissionalProcedimento ou Profissional incrementam
+a versão (ver signals.py), e o fragmento antigo deixa de ser usado.
+
+O mapa profissional -> procedimentos do agendamento (com o preço de cada
+profissional) usa a mesma versão. Fica no cache 'paginas' e, quando esse
+cache é compartilhado (backend do Django), também na memória de cada
+processo: a versão, lida do cache compartilhado a cada requisição, diz se a
+cópia ainda vale, e com ela inalterada buscar_procedimentos não toca no
+banco nem lê o mapa do cache. Com o backend 'local' a versão só muda no
+processo que alterou o catálogo, então não há cópia extra: vale o TIMEOUT
+do próprio cache.
+
+@pagina_publica guarda no cache 'paginas' a página inteira servida a
+visitantes anônimos, com ETag e Last-Modified, e responde 304 quando o
+navegador já tem a versão atual (If-None-Match / If-Modified-Since). A
+chave também inclui a versão do catálogo. Quem está logado vê o nome no
+cabeçalho e sempre recebe a página renderizada na hora.
+"""
+import hashlib
+import json
+import time
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth import SESSION_KEY
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Exists, Min, OuterRef
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .cache import obter_cache
+
+NOME_CACHE = 'paginas'
+VERSAO = 'catalogo'
+
+# Tempo do fragmento no cache do Django; a invalidação é pela versão
+TIMEOUT_FRAGMENTO = 24 * 60 * 60
+
+
+def versao_catalogo():
+    return obter_cache(NOME_CACHE).versoes([VERSAO])[VERSAO]
+
+
+def invalidar_catalogo():
+    obter_cache(NOME_CACHE).incrementar_versao(VERSAO)
+
+
+def procedimentos_do_catalogo():
+    """
+    Procedimentos oferecidos, em ordem de nome, com 'preco_minimo'. O
+    queryset é preguiçoso: com o fragmento em cache, nem chega ao banco.
+    """
+    from .models import Procedimento, ProfissionalProcedimento
+
+    oferecido = ProfissionalProcedimento.objects.filter(
+        procedimento=OuterRef('pk'), profissional__ativo=True,
+    )
+    return (
+        Procedimento.objects.filter(Exists(oferecido), ativo=True)
+        .annotate(preco_minimo=Min('preco__valor'))
+        .order_by('nome', 'pk')
+    )
+
+
+def contexto_catalogo():
+    return {
+        'procedimentos_catalogo': procedimentos_do_catalogo(),
+        'versao_catalogo': versao_catalogo(),
+        'timeout_catalogo': TIMEOUT_FRAGMENTO,
+    }
+
+
+# --- Procedimentos por profissional (agendamento) ---
+
+# (versão, mapa) do último mapa usado neste processo; só com cache compartilhado
+_mapa_local = (None, None)
+
+
+def montar_mapa_procedimentos():
+    """
+    {id_profissional (str): [{id_procedimento, nome, duracao_minutos, preco}]}
+    para todos os profissionais ativos, em três consultas. O preço é o
+    cadastrado para o profissional ou, se não houver, o preço geral do
+    procedimento (Preco sem profissional).
+    """
+    from .models import Preco, Profissional, ProfissionalProcedimento
+
+    gerais, proprios = {}, {}
+    for id_procedimento, id_profissional, valor in Preco.objects.filter(
+        procedimento__ativo=True,
+    ).values_list('procedimento_id', 'profissional_id', 'valor'):
+        if id_profissional is None:
+            precos, chave = gerais, id_procedimento
+        else:
+            precos, chave = proprios, (id_profissional, id_procedimento)
+        precos[chave] = min(valor, precos.get(chave, valor))
+
+    mapa = {str(pk): [] for pk in Profissional.objects.filter(ativo=True).values_list('pk', flat=True)}
+    vinculos = ProfissionalProcedimento.objects.filter(
+        profissional__ativo=True, procedimento__ativo=True,
+    ).order_by('procedimento__nome', 'procedimento_id').values_list(
+        'profissional_id', 'procedimento_id', 'procedimento__nome', 'procedimento__duracao_minutos',
+    )
+    for id_profissional, id_procedimento, nome, duracao in vinculos:
+        mapa[str(id_profissional)].append({
+            'id_procedimento': id_procedimento,
+            'nome': nome,
+            'duracao_minutos': duracao,
+            'preco': proprios.get((id_profissional, id_procedimento), gerais.get(id_procedimento)),
+        })
+    return mapa
+
+
+def _mapa_na_versao(versao):
+    global _mapa_local
+    cache = obter_cache(NOME_CACHE)
+    chave = f'procedimentos:{versao}'
+    mapa = cache.get_many([chave]).get(chave)
+    if mapa is None:
+        profissionais = montar_mapa_procedimentos()
+        mapa = {
+            'etag': quote_etag(f'{VERSAO}-{versao}'),
+            'profissionais': profissionais,
+            # Serializado uma vez: o GET só copia os bytes
+            'conteudo': json.dumps(
+                {'versao': versao, 'profissionais': profissionais}, cls=DjangoJSONEncoder,
+            ).encode(),
+        }
+        cache.set_many({chave: mapa})
+    if cache.compartilhado:
+        _mapa_local = (versao, mapa)
+    return mapa
+
+
+def _mapa_em_memoria(cache, versao):
+    versao_local, mapa = _mapa_local
+    return mapa if cache.compartilhado and versao_local == versao else None
+
+
+def mapa_procedimentos():
+    """Mapa da versão atual do catálogo: da memória, do cache ou do banco."""
+    cache = obter_cache(NOME_CACHE)
+    versao = cache.versoes([VERSAO])[VERSAO]
+    mapa = _mapa_em_memoria(cache, versao)
+    return mapa if mapa is not None else _mapa_na_versao(versao)
+
+
+async def amapa_procedimentos():
+    """mapa_procedimentos() para views assíncronas: só vai a uma thread no caminho sem memória."""
+    cache = obter_cache(NOME_CACHE)
+    versao = (await sync_to_async(cache.versoes, thread_sensitive=False)([VERSAO]))[VERSAO]
+    mapa = _mapa_em_memoria(cache, versao)
+    if mapa is not None:
+        return mapa
+    return await sync_to_async(_mapa_na_versao)(versao)
+
+
+# --- Páginas abertas ---
+
+def _visitante_anonimo(request):
+    # Sem cookie de sessão, nenhuma das duas leituras consulta o banco
+    return SESSION_KEY not in request.session and 'usuario_id' not in request.session
+
+
+def _montar_pagina(resposta):
+    conteudo = resposta.content
+    return {
+        'conteudo': conteudo,
+        'tipo': resposta['Content-Type'],
+        'etag': quote_etag(hashlib.md5(conteudo, usedforsecurity=False).hexdigest()),
+        'modificada_em': int(time.time()),
+    }
+
+
+def pagina_publica(view):
+    """Cache de página inteira, com GET condicional, para visitantes anônimos."""
+    @wraps(view)
+    def servir(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or not _visitante_anonimo(request):
+            return view(request, *args, **kwargs)
+
+        cache = obter_cache(NOME_CACHE)
+        chave = f'pagina:{request.get_full_path()}:{versao_catalogo()}'
+        pagina = cache.get_many([chave]).get(chave)
+        if pagina is None:
+            resposta = view(request, *args, **kwargs)
+            # Respostas que gravam cookies (ex: CSRF) não podem ser compartilhadas
+            if resposta.status_code != 200 or resposta.streaming or resposta.cookies:
+                return resposta
+            pagina = _montar_pagina(resposta)
+            cache.set_many({chave: pagina})
+
+        resposta = HttpResponse(pagina['conteudo'], content_type=pagina['tipo'])
+        resposta['ETag'] = pagina['etag']
+        resposta['Last-Modified'] = http_date(pagina['modificada_em'])
+        # O navegador guarda, mas sempre revalida: a 304 custa só a verificação
+        patch_cache_control(resposta, private=True, max_age=0, must_revalidate=True)
+        patch_vary_headers(resposta, ['Cookie'])
+        return get_conditional_response(
+            request, etag=pagina['etag'], last_modified=pagina['modificada_em'], response=resposta,
+        )
+    return servir
@@ -0,0 +1,158 @@
+# app_shivazen/dados_sinteticos.py
+"""
+Gerador de dados sintéticos para verificações de desempenho.
+
+Cria profissionais, clientes, procedimentos e atendimentos com uma
+distribuição próxima da real: mais movimento no fim da semana, domingo
+fechado e histórico majoritariamente 'REALIZADO'. Como bulk_create não
+dispara signals, o resumo diário (EstatisticaDiaria) do período semeado é
+recalculado no final, como em uma importação.
+
+Os CPFs saem da semente: semear de novo com a mesma semente no mesmo banco
+levanta IntegrityError (e nada é gravado).
+"""
+import random
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from .disponibilidade import compilar_agenda_semanal
+from .estatisticas import recalcular
+from .models import (
+    STATUS_ATIVOS, Atendimento, BloqueioAgenda, Cliente, DisponibilidadeProfissional, Preco,
+    Procedimento, Profissional, ProfissionalProcedimento,
+)
+
+# Peso relativo de cada dia (isoweekday: 1=Seg ... 7=Dom)
+PESOS_DIA_SEMANA = {1: 8, 2: 10, 3: 10, 4: 12, 5: 16, 6: 20, 7: 0}
+
+# Distribuição de status para atendimentos passados e futuros
+STATUS_PASSADOS = [('REALIZADO', 80), ('CANCELADO', 15), ('AGENDADO', 3), ('CONFIRMADO', 2)]
+STATUS_FUTUROS = [('AGENDADO', 60), ('CONFIRMADO', 30), ('CANCELADO', 10)]
+
+HORA_ABERTURA = 9
+HORA_FECHAMENTO = 18
+
+
+def _sortear(rng, opcoes):
+    valores, pesos = zip(*opcoes)
+    return rng.choices(valores, weights=pesos)[0]
+
+
+@transaction.atomic
+def semear(profissionais=20, clientes=500, atendimentos=5000, procedimentos=10,
+           dias_historico=365, dias_futuros=30, semente=42, lote=5000):
+    """
+    Insere um conjunto de dados sintéticos com bulk_create e retorna um
+    dicionário com as quantidades criadas.
+    """
+    rng = random.Random(semente)
+    hoje = timezone.localdate()
+
+    novos_procedimentos = Procedimento.objects.bulk_create([
+        Procedimento(nome=f'Procedimento {i}', duracao_minutos=rng.choice([30, 60, 90]))
+        for i in range(procedimentos)
+    ], batch_size=lote)
+    # Segunda a sábado (dia_semana: 1=Dom, 2=Seg, ..., 7=Sáb)
+    expedientes = [(dia, time(HORA_ABERTURA), time(HORA_FECHAMENTO)) for dia in range(2, 8)]
+    novos_profissionais = Profissional.objects.bulk_create([
+        Profissional(
+            nome=f'Profissional {i}', especialidade='Estética',
+            agenda_semanal=compilar_agenda_semanal(expedientes),
+        )
+        for i in range(profissionais)
+    ], batch_size=lote)
+
+    vinculos = []
+    precos = []
+    for prof in novos_profissionais:
+        for proc in rng.sample(novos_procedimentos, k=min(3, len(novos_procedimentos))):
+            vinculos.append(ProfissionalProcedimento(profissional=prof, procedimento=proc))
+    for proc in novos_procedimentos:
+        precos.append(Preco(procedimento=proc, valor=Decimal(rng.randrange(80, 400))))
+    ProfissionalProcedimento.objects.bulk_create(vinculos, batch_size=lote)
+    Preco.objects.bulk_create(precos, batch_size=lote)
+
+    DisponibilidadeProfissional.objects.bulk_create([
+        DisponibilidadeProfissional(profissional=prof, dia_semana=dia, hora_inicio=inicio, hora_fim=fim)
+        for prof in novos_profissionais for dia, inicio, fim in expedientes
+    ], batch_size=lote)
+
+    base_cpf = rng.randrange(10**8)
+    novos_clientes = [
+        Cliente(
+            nome_completo=f'Cliente Sintético {i}',
+            cpf=f'{(base_cpf + i) % 10**11:011d}',
+            email=f'cliente{base_cpf + i}@exemplo.com',
+            telefone=f'(11) 9{rng.randrange(10**8):08d}',
+        )
+        for i in range(clientes)
+    ]
+    for cliente in novos_clientes:
+        cliente.atualizar_campos_busca()  # bulk_create não chama save()
+    novos_clientes = Cliente.objects.bulk_create(novos_clientes, batch_size=lote)
+
+    # Datas candidatas, com peso pelo dia da semana
+    datas = [hoje + timedelta(days=d) for d in range(-dias_historico, dias_futuros + 1)]
+    pesos = [PESOS_DIA_SEMANA[d.isoweekday()] for d in datas]
+    slots_por_dia = (HORA_FECHAMENTO - HORA_ABERTURA) * 2
+
+    # Atendimentos ativos não podem se sobrepor (ver migração 0004): guarda
+    # os minutos ocupados por (profissional, data) e cancela as colisões
+    ocupados = {}
+    pendentes = []
+    criados = 0
+    for _ in range(atendimentos):
+        data = rng.choices(datas, weights=pesos)[0]
+        minuto_inicial = 30 * rng.randrange(slots_por_dia)
+        inicio = timezone.make_aware(
+            datetime.combine(data, time(HORA_ABERTURA)) + timedelta(minutes=minuto_inicial)
+        )
+        prof = rng.choice(novos_profissionais)
+        proc = rng.choice(novos_procedimentos)
+        status = _sortear(rng, STATUS_PASSADOS if data < hoje else STATUS_FUTUROS)
+        if status in STATUS_ATIVOS:
+            minutos = set(range(minuto_inicial, minuto_inicial + proc.duracao_minutos))
+            agenda = ocupados.setdefault((prof.pk, data), set())
+            if agenda & minutos:
+                status = 'CANCELADO'
+            else:
+                agenda |= minutos
+        pendentes.append(Atendimento(
+            cliente=rng.choice(novos_clientes),
+            profissional=prof,
+            procedimento=proc,
+            data_hora_inicio=inicio,
+            data_hora_fim=inicio + timedelta(minutes=proc.duracao_minutos),
+            valor_cobrado=Decimal(rng.randrange(80, 400)) if status == 'REALIZADO' else None,
+            status_atendimento=status,
+        ))
+        if len(pendentes) >= lote:
+            Atendimento.objects.bulk_create(pendentes)
+            criados += len(pendentes)
+            pendentes = []
+    Atendimento.objects.bulk_create(pendentes)
+    criados += len(pendentes)
+
+    # Alguns bloqueios (folgas) por profissional
+    bloqueios = []
+    for prof in novos_profissionais:
+        for _ in range(3):
+            inicio = timezone.make_aware(datetime.combine(rng.choice(datas), time(12)))
+            bloqueios.append(BloqueioAgenda(
+                profissional=prof, data_hora_inicio=inicio,
+                data_hora_fim=inicio + timedelta(hours=1), motivo='Almoço',
+            ))
+    BloqueioAgenda.objects.bulk_create(bloqueios, batch_size=lote)
+
+    recalcular(datas[0], datas[-1])
+
+    return {
+        'procedimentos': len(novos_procedimentos),
+        'profissionais': len(novos_profissionais),
+        'clientes': len(novos_clientes),
+        'atendimentos': criados,
+        'bloqueios': len(bloqueios),
+    }
@@ -0,0 +1,188 @@
+# app_shivazen/dashboard.py
+"""
+Snapshot do dashboard administrativo.
+
+Todos os números do dashboard são montados em poucas consultas (contadores
+condicionais sobre o resumo diário EstatisticaDiaria) e guardados no cache
+'dashboard' com TTL curto. Alterações em atendimentos, clientes,
+profissionais ou procedimentos invalidam o snapshot.
+"""
+from datetime import time, timedelta
+
+from django.db import connection
+from django.db.models import Q, Sum
+from django.db.models.functions import ExtractWeekDay
+
+from .cache import obter_cache
+from .disponibilidade import combinar_local
+from .models import (
+    STATUS_ATIVOS, Atendimento, Cliente, EstatisticaDiaria, Procedimento, Profissional,
+)
+
+NOME_CACHE = 'dashboard'
+VERSAO = 'snapshot'
+
+DIAS_SEMANA = ['Dom', 'Seg', 'Ter', 'Qua', 'Qui', 'Sex', 'Sáb']
+TAMANHO_LISTAS = 10
+TAMANHO_RANKINGS = 5
+
+
+def obter_snapshot(hoje):
+    """Retorna o snapshot do dia, do cache quando possível."""
+    cache = obter_cache(NOME_CACHE)
+    versao = cache.versoes([VERSAO])[VERSAO]
+    chave = f'{hoje.isoformat()}:{versao}'
+    encontrado = cache.get_many([chave])
+    if chave in encontrado:
+        return encontrado[chave]
+    snapshot = montar_snapshot(hoje)
+    cache.set_many({chave: snapshot})
+    return snapshot
+
+
+def invalidar_dashboard():
+    obter_cache(NOME_CACHE).incrementar_versao(VERSAO)
+
+
+def montar_snapshot(hoje):
+    """Calcula todos os dados do dashboard para a data 'hoje'."""
+    snapshot = {}
+    snapshot.update(_totais_cadastros())
+    snapshot.update(_contadores_atendimentos(hoje))
+    snapshot.update(_rankings())
+    snapshot.update(_listas_atendimentos(hoje))
+    return snapshot
+
+
+def _totais_cadastros():
+    """Conta clientes, profissionais e procedimentos ativos em uma consulta."""
+    consultas = {
+        'total_clientes': Cliente.objects.filter(ativo=True),
+        'total_profissionais': Profissional.objects.filter(ativo=True),
+        'total_procedimentos': Procedimento.objects.filter(ativo=True),
+    }
+    partes, parametros = [], []
+    for consulta in consultas.values():
+        sql, params = consulta.values('pk').query.sql_with_params()
+        partes.append(f'(SELECT COUNT(*) FROM ({sql}) AS sub)')
+        parametros.extend(params)
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT {", ".join(partes)}', parametros)
+        return dict(zip(consultas, cursor.fetchone()))
+
+
+def _contadores_atendimentos(hoje):
+    """
+    Contadores, receita, status e histograma semanal em uma única consulta
+    sobre o resumo diário (EstatisticaDiaria), sem ler os atendimentos.
+    """
+    inicio_mes = hoje.replace(day=1)
+    proximo_mes = (inicio_mes + timedelta(days=32)).replace(day=1)
+    no_mes = Q(data__gte=inicio_mes, data__lt=proximo_mes)
+    ultimos_30_dias = Q(data__gte=hoje - timedelta(days=30))
+
+    agregados = {
+        'agendamentos_hoje': Sum('quantidade', filter=Q(data=hoje)),
+        'agendamentos_mes': Sum('quantidade', filter=no_mes),
+        'receita_mes': Sum('valor_total', filter=no_mes),
+    }
+    for status in STATUS_ATIVOS:
+        agregados[f'status_{status}'] = Sum('quantidade', filter=Q(status_atendimento=status))
+    # Django retorna 1=Dom, 2=Seg, etc.
+    for dia in range(1, 8):
+        agregados[f'semana_{dia}'] = Sum('quantidade', filter=ultimos_30_dias & Q(dia_semana=dia))
+
+    valores = {
+        chave: valor or 0
+        for chave, valor in EstatisticaDiaria.objects.annotate(
+            dia_semana=ExtractWeekDay('data')
+        ).aggregate(**agregados).items()
+    }
+
+    return {
+        'agendamentos_hoje': valores['agendamentos_hoje'],
+        'agendamentos_mes': valores['agendamentos_mes'],
+        'agendamentos_pendentes': valores['status_AGENDADO'],
+        'agendamentos_confirmados': valores['status_CONFIRMADO'],
+        'receita_mes': float(valores['receita_mes']),
+        'dados_grafico_semana': [valores[f'semana_{dia}'] for dia in range(1, 8)],
+        'dias_semana': DIAS_SEMANA,
+    }
+
+
+def _rankings():
+    """
+    Profissionais e procedimentos mais agendados e a contagem por status, a
+    partir de um único agrupamento. Como na consulta direta aos atendimentos,
+    aparecem todos os status gravados (inclusive fora de STATUS_ATENDIMENTO)
+    e os rankings são completados com ativos sem agendamentos.
+    """
+    pares = EstatisticaDiaria.objects.values(
+        'profissional_id', 'profissional__nome', 'profissional__especialidade', 'profissional__ativo',
+        'procedimento_id', 'procedimento__nome', 'procedimento__duracao_minutos', 'procedimento__ativo',
+        'status_atendimento',
+    ).annotate(total=Sum('quantidade')).order_by()
+
+    profissionais, procedimentos, por_status = {}, {}, {}
+    for par in pares:
+        if par['total']:
+            por_status[par['status_atendimento']] = por_status.get(par['status_atendimento'], 0) + par['total']
+        if par['profissional__ativo']:
+            prof = profissionais.setdefault(par['profissional_id'], {
+                'nome': par['profissional__nome'],
+                'especialidade': par['profissional__especialidade'],
+                'total_agendamentos': 0,
+            })
+            prof['total_agendamentos'] += par['total']
+        if par['procedimento__ativo']:
+            proc = procedimentos.setdefault(par['procedimento_id'], {
+                'nome': par['procedimento__nome'],
+                'duracao_minutos': par['procedimento__duracao_minutos'],
+                'total_agendamentos': 0,
+            })
+            proc['total_agendamentos'] += par['total']
+
+    def _top(itens, modelo, campos):
+        ranking = sorted(itens.values(), key=lambda item: -item['total_agendamentos'])[:TAMANHO_RANKINGS]
+        faltam = TAMANHO_RANKINGS - len(ranking)
+        if faltam:
+            # Poucos com agendamentos: completa com ativos zerados (consulta só nesse caso)
+            ranking += [
+                {**dict(zip(campos, valores)), 'total_agendamentos': 0}
+                for valores in modelo.objects.filter(ativo=True).exclude(pk__in=itens).order_by('pk')
+                .values_list(*campos)[:faltam]
+            ]
+        return ranking
+
+    return {
+        'profissionais_ocupados': _top(profissionais, Profissional, ('nome', 'especialidade')),
+        'procedimentos_populares': _top(procedimentos, Procedimento, ('nome', 'duracao_minutos')),
+        'agendamentos_por_status': sorted(
+            ({'status_atendimento': status, 'total': total} for status, total in por_status.items()),
+            key=lambda item: -item['total'],
+        ),
+    }
+
+
+def _listas_atendimentos(hoje):
+    """Últimos agendamentos e os dos próximos 7 dias, buscados juntos."""
+    recentes = Atendimento.objects.order_by('-data_hora_inicio', '-pk').values('pk')[:TAMANHO_LISTAS]
+    proximos = Atendimento.objects.no_intervalo(
+        hoje, hoje + timedelta(days=8)
+    ).order_by('data_hora_inicio', 'pk').values('pk')[:TAMANHO_LISTAS]
+    atendimentos = list(Atendimento.objects.filter(
+        Q(pk__in=recentes) | Q(pk__in=proximos)
+    ).select_related('cliente', 'profissional', 'procedimento'))
+
+    # A união contém as duas listas; separa-as de novo pela ordenação de cada uma
+    inicio_proximos = combinar_local(hoje, time.min)
+    fim_proximos = combinar_local(hoje + timedelta(days=8), time.min)
+    return {
+        'agendamentos_recentes': sorted(
+            atendimentos, key=lambda a: (a.data_hora_inicio, a.pk), reverse=True
+        )[:TAMANHO_LISTAS],
+        'agendamentos_proximos': sorted(
+            (a for a in atendimentos if inicio_proximos <= a.data_hora_inicio < fim_proximos),
+            key=lambda a: (a.data_hora_inicio, a.pk),
+        )[:TAMANHO_LISTAS],
+    }
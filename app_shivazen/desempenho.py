@@ -0,0 +1,373 @@
+# app_shivazen/desempenho.py
+"""
+Medições de desempenho reproduzíveis (comando medir_desempenho).
+
+- Micro-benchmarks, no próprio processo: disponibilidade de um profissional
+  (Profissional.get_horarios_disponiveis, com e sem cache), a grade de um
+  período e a agregação do dashboard.
+- Teste de carga: um cliente HTTP em asyncio puro (sem dependências) abre
+  'concorrencia' conexões keep-alive contra um servidor já no ar (runserver,
+  gunicorn ou uvicorn) e mede vazão e latência de cada cenário de CENARIOS.
+
+Os resultados são um dicionário pronto para JSON, com o commit atual, o
+banco e o volume de dados, para comparar execuções entre commits
+(comparar()).
+"""
+import asyncio
+import random
+import subprocess
+import time
+from collections import Counter
+from datetime import datetime, time as hora, timedelta
+from importlib import import_module
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.db import connection
+from django.middleware.csrf import CSRF_ALLOWED_CHARS, CSRF_SECRET_LENGTH
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from .dashboard import invalidar_dashboard, montar_snapshot, obter_snapshot
+from .dados_sinteticos import HORA_ABERTURA, HORA_FECHAMENTO
+from .disponibilidade import calcular_grade_periodo, horarios_disponiveis_em_cache, invalidar_profissional
+from .models import Atendimento, Cliente, Profissional, ProfissionalProcedimento, Usuario
+
+DIAS_AGENDA = 14
+EMAIL_CLIENTE = 'desempenho-cliente@exemplo.com'
+EMAIL_STAFF = 'desempenho-staff@exemplo.com'
+
+# Cenários do teste de carga (ver cenarios())
+CENARIOS = ('buscar_horarios', 'agendaCadastro', 'adminDashboard')
+
+
+# --- Estatísticas ---
+
+def percentil(ordenados, p):
+    """Percentil p (0-100) por posição mais próxima; 'ordenados' em ordem crescente."""
+    if not ordenados:
+        return None
+    indice = max(0, min(len(ordenados) - 1, round(p / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+
+def resumir(duracoes):
+    """Resumo em milissegundos de uma lista de durações em segundos."""
+    ordenados = sorted(d * 1000 for d in duracoes)
+    if not ordenados:
+        return {'amostras': 0}
+    return {
+        'amostras': len(ordenados),
+        'media_ms': round(sum(ordenados) / len(ordenados), 3),
+        'min_ms': round(ordenados[0], 3),
+        'p50_ms': round(percentil(ordenados, 50), 3),
+        'p95_ms': round(percentil(ordenados, 95), 3),
+        'p99_ms': round(percentil(ordenados, 99), 3),
+        'max_ms': round(ordenados[-1], 3),
+    }
+
+
+def cronometrar(funcao, repeticoes, preparar=None):
+    """Executa funcao(*preparar()) 'repeticoes' vezes; só a chamada entra na medição."""
+    duracoes = []
+    for _ in range(repeticoes):
+        argumentos = preparar() if preparar else ()
+        inicio = time.perf_counter()
+        funcao(*argumentos)
+        duracoes.append(time.perf_counter() - inicio)
+    return resumir(duracoes)
+
+
+# --- Contexto da execução ---
+
+def commit_atual():
+    try:
+        saida = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return saida.stdout.strip() or None
+
+
+def contexto():
+    return {
+        'commit': commit_atual(),
+        'data': timezone.now().isoformat(),
+        'banco': connection.vendor,
+        'volumes': {
+            'profissionais': Profissional.objects.filter(ativo=True).count(),
+            'clientes': Cliente.objects.count(),
+            'atendimentos': Atendimento.objects.count(),
+        },
+    }
+
+
+def _vinculos():
+    """[(id_profissional, id_procedimento, duracao)] dos profissionais ativos."""
+    vinculos = list(ProfissionalProcedimento.objects.filter(
+        profissional__ativo=True, procedimento__ativo=True,
+    ).values_list('profissional_id', 'procedimento_id', 'procedimento__duracao_minutos'))
+    if not vinculos:
+        raise ValueError('Nenhum profissional ativo com procedimentos: semeie dados antes (--semear).')
+    return vinculos
+
+
+# --- Micro-benchmarks ---
+
+def micro_benchmarks(repeticoes=200, semente=42):
+    rng = random.Random(semente)
+    vinculos = _vinculos()
+    profissionais = Profissional.objects.in_bulk({v[0] for v in vinculos})
+    ids = sorted(profissionais)
+    hoje = timezone.localdate()
+
+    def sortear():
+        id_profissional, _, duracao = rng.choice(vinculos)
+        return profissionais[id_profissional], hoje + timedelta(days=rng.randrange(DIAS_AGENDA)), duracao
+
+    def sortear_sem_cache():
+        profissional, data, duracao = sortear()
+        invalidar_profissional(profissional.pk)
+        return profissional, data, duracao
+
+    # Com cache: as mesmas consultas, já aquecidas (o sorteio cabe no LRU).
+    # Medido antes do cache frio, que invalida os profissionais sorteados
+    amostras = [sortear() for _ in range(repeticoes)]
+    for amostra in amostras:
+        horarios_disponiveis_em_cache(*amostra)
+    proxima_amostra = iter(amostras).__next__
+
+    def grade_sem_cache():
+        invalidar_profissional(None)
+        return ids, hoje, DIAS_AGENDA
+
+    def dashboard_sem_cache():
+        invalidar_dashboard()
+        return ()
+
+    obter_snapshot(hoje)
+    return {
+        'horarios_disponiveis': cronometrar(
+            lambda p, d, m: p.get_horarios_disponiveis(d, m), repeticoes, sortear,
+        ),
+        'horarios_disponiveis_cache_quente': cronometrar(horarios_disponiveis_em_cache, repeticoes, proxima_amostra),
+        'horarios_disponiveis_cache_frio': cronometrar(horarios_disponiveis_em_cache, repeticoes, sortear_sem_cache),
+        'grade_periodo_todos': cronometrar(
+            calcular_grade_periodo, max(1, repeticoes // 20), grade_sem_cache,
+        ),
+        'dashboard_agregacao': cronometrar(montar_snapshot, max(1, repeticoes // 10), lambda: (hoje,)),
+        'dashboard_cache_frio': cronometrar(
+            lambda: obter_snapshot(hoje), max(1, repeticoes // 10), dashboard_sem_cache,
+        ),
+        'dashboard_cache_quente': cronometrar(lambda: obter_snapshot(hoje), repeticoes),
+    }
+
+
+# --- Teste de carga ---
+
+def _usuario(email, staff):
+    usuario = Usuario.objects.filter(username=email).first()
+    if usuario is None:
+        usuario = Usuario.objects.create_user(username=email, email=email, password=None, is_staff=staff)
+    return usuario
+
+
+def abrir_sessao(usuario, **dados):
+    """Cria uma sessão logada para 'usuario' no SESSION_ENGINE atual e devolve a chave do cookie."""
+    sessao = import_module(settings.SESSION_ENGINE).SessionStore()
+    sessao[SESSION_KEY] = usuario._meta.pk.value_to_string(usuario)
+    sessao[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+    sessao[HASH_SESSION_KEY] = usuario.get_session_auth_hash()
+    sessao.update(dados)
+    sessao.save()
+    return sessao.session_key
+
+
+def cookies_de_teste():
+    """Cookies de sessão (cliente e staff) e o token CSRF usados nos cenários."""
+    cliente = Cliente.objects.filter(email=EMAIL_CLIENTE).first() or Cliente.objects.create(
+        nome_completo='Desempenho (teste de carga)', email=EMAIL_CLIENTE,
+    )
+    csrf = get_random_string(CSRF_SECRET_LENGTH, CSRF_ALLOWED_CHARS)
+    return csrf, {
+        'cliente': abrir_sessao(_usuario(EMAIL_CLIENTE, False), cliente_id=cliente.pk),
+        'staff': abrir_sessao(_usuario(EMAIL_STAFF, True)),
+    }
+
+
+def _slot(rng, hoje):
+    """Horário local de início, em meia hora cheia, nos próximos dias."""
+    data = hoje + timedelta(days=rng.randrange(1, DIAS_AGENDA + 1))
+    minutos = 30 * rng.randrange((HORA_FECHAMENTO - HORA_ABERTURA) * 2)
+    return datetime.combine(data, hora(HORA_ABERTURA)) + timedelta(minutes=minutos)
+
+
+def cenarios(semente=42):
+    """
+    {nome: (papel, gerar)}; gerar() devolve (método, caminho, formulário).
+    agendaCadastro grava atendimentos de verdade: use um banco de teste.
+    """
+    rng = random.Random(semente)
+    vinculos = _vinculos()
+    hoje = timezone.localdate()
+
+    def horarios():
+        id_profissional, id_procedimento, _ = rng.choice(vinculos)
+        data = hoje + timedelta(days=rng.randrange(DIAS_AGENDA))
+        return 'POST', reverse('shivazen:buscar_horarios'), {
+            'id_profissional': id_profissional, 'id_procedimento': id_procedimento, 'data': data.isoformat(),
+        }
+
+    def agendar():
+        id_profissional, id_procedimento, _ = rng.choice(vinculos)
+        return 'POST', reverse('shivazen:agendaCadastro'), {
+            'profissional': id_profissional, 'procedimento': id_procedimento,
+            'horario_selecionado': _slot(rng, hoje).isoformat(),
+        }
+
+    def dashboard():
+        return 'GET', reverse('shivazen:adminDashboard'), None
+
+    return {
+        'buscar_horarios': ('cliente', horarios),
+        'agendaCadastro': ('cliente', agendar),
+        'adminDashboard': ('staff', dashboard),
+    }
+
+
+class ConexaoHTTP:
+    """Conexão HTTP/1.1 keep-alive mínima; reabre quando o servidor fecha."""
+
+    def __init__(self, host, porta):
+        self.host, self.porta = host, porta
+        self.leitor = self.escritor = None
+
+    async def fechar(self):
+        if self.escritor is not None:
+            self.escritor.close()
+            try:
+                await self.escritor.wait_closed()
+            except OSError:
+                pass
+        self.leitor = self.escritor = None
+
+    async def requisitar(self, metodo, caminho, cabecalhos, corpo=b''):
+        for tentativa in range(2):
+            if self.escritor is None:
+                self.leitor, self.escritor = await asyncio.open_connection(self.host, self.porta)
+            linhas = [f'{metodo} {caminho} HTTP/1.1', f'Host: {self.host}:{self.porta}',
+                      f'Content-Length: {len(corpo)}']
+            linhas += [f'{nome}: {valor}' for nome, valor in cabecalhos.items()]
+            try:
+                self.escritor.write(('\r\n'.join(linhas) + '\r\n\r\n').encode('latin-1') + corpo)
+                await self.escritor.drain()
+                return await self._ler_resposta()
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # Conexão keep-alive fechada pelo servidor: tenta uma vez em uma nova
+                await self.fechar()
+                if tentativa:
+                    raise
+
+    async def _ler_resposta(self):
+        status = int((await self.leitor.readuntil(b'\r\n')).split()[1])
+        cabecalhos = {}
+        while (linha := await self.leitor.readuntil(b'\r\n')) != b'\r\n':
+            nome, _, valor = linha.decode('latin-1').partition(':')
+            cabecalhos[nome.strip().lower()] = valor.strip()
+        if 'content-length' in cabecalhos:
+            await self.leitor.readexactly(int(cabecalhos['content-length']))
+        elif cabecalhos.get('transfer-encoding', '').lower() == 'chunked':
+            while tamanho := int((await self.leitor.readuntil(b'\r\n')).split(b';')[0], 16):
+                await self.leitor.readexactly(tamanho + 2)
+            await self.leitor.readuntil(b'\r\n')
+        elif status not in (204, 304):
+            await self.leitor.read()
+            await self.fechar()
+            return status
+        if cabecalhos.get('connection', '').lower() == 'close':
+            await self.fechar()
+        return status
+
+
+async def _executar_cenario(url, cabecalhos, gerar, concorrencia, duracao):
+    partes = urlsplit(url)
+    fim = time.perf_counter() + duracao
+    duracoes, status = [], Counter()
+
+    async def usuario_virtual():
+        conexao = ConexaoHTTP(partes.hostname, partes.port or 80)
+        try:
+            while time.perf_counter() < fim:
+                metodo, caminho, formulario = gerar()
+                extra = dict(cabecalhos)
+                corpo = b''
+                if formulario is not None:
+                    corpo = urlencode(formulario).encode()
+                    extra['Content-Type'] = 'application/x-www-form-urlencoded'
+                inicio = time.perf_counter()
+                try:
+                    codigo = await conexao.requisitar(metodo, partes.path.rstrip('/') + caminho, extra, corpo)
+                except (OSError, asyncio.IncompleteReadError, ValueError, IndexError) as e:
+                    codigo = type(e).__name__
+                duracoes.append(time.perf_counter() - inicio)
+                status[str(codigo)] += 1
+        finally:
+            await conexao.fechar()
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(usuario_virtual() for _ in range(concorrencia)))
+    decorrido = time.perf_counter() - inicio
+    erros = sum(n for codigo, n in status.items() if not codigo.isdigit() or int(codigo) >= 400)
+    return {
+        'concorrencia': concorrencia,
+        'duracao_s': round(decorrido, 3),
+        'requisicoes': len(duracoes),
+        'erros': erros,
+        'req_por_s': round(len(duracoes) / decorrido, 2) if decorrido else None,
+        'status': dict(status),
+        'latencia': resumir(duracoes),
+    }
+
+
+def teste_de_carga(url, nomes=None, concorrencia=10, duracao=10.0, semente=42):
+    """Roda cada cenário (ou só os de 'nomes') por 'duracao' segundos contra o servidor em 'url'."""
+    if urlsplit(url).scheme != 'http':
+        raise ValueError('O teste de carga só fala HTTP simples (ex: http://127.0.0.1:8000).')
+    csrf, sessoes = cookies_de_teste()
+    disponiveis = cenarios(semente)
+    resultados = {}
+    for nome in nomes or disponiveis:
+        papel, gerar = disponiveis[nome]
+        cabecalhos = {
+            'Cookie': f'{settings.SESSION_COOKIE_NAME}={sessoes[papel]}; {settings.CSRF_COOKIE_NAME}={csrf}',
+            'X-CSRFToken': csrf,
+        }
+        resultados[nome] = asyncio.run(_executar_cenario(url, cabecalhos, gerar, concorrencia, duracao))
+    return resultados
+
+
+# --- Comparação entre execuções ---
+
+METRICAS_COMPARADAS = {'micro': ('p50_ms', 'p95_ms'), 'carga': ('req_por_s',)}
+
+
+def comparar(anterior, atual):
+    """[(métrica, valor anterior, valor atual, variação %)] das métricas presentes nas duas execuções."""
+    linhas = []
+    for secao, campos in METRICAS_COMPARADAS.items():
+        for nome, medicao in atual.get(secao, {}).items():
+            antes = anterior.get(secao, {}).get(nome)
+            if antes is None:
+                continue
+            for campo in campos:
+                valor_antes = antes.get(campo, antes.get('latencia', {}).get(campo))
+                valor_atual = medicao.get(campo, medicao.get('latencia', {}).get(campo))
+                if not valor_antes or valor_atual is None:
+                    continue
+                variacao = round((valor_atual - valor_antes) / valor_antes * 100, 1)
+                linhas.append((f'{secao}.{nome}.{campo}', valor_antes, valor_atual, variacao))
+    return linhas
@@ -0,0 +1,404 @@
+# app_shivazen/disponibilidade.py
+"""
+Motor de disponibilidade da agenda.
+
+Em vez de comparar cada horário com cada agendamento/bloqueio, os períodos
+ocupados são ordenados e mesclados uma única vez em uma lista de intervalos
+disjuntos. Cada horário candidato é então testado com busca binária sobre
+essa lista, o que custa O((horarios + intervalos) log n).
+"""
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from .cache import obter_cache
+
+INTERVALO_PADRAO = timedelta(minutes=30)
+
+# Cache de grades por (profissional, data, duração), versionado por profissional
+NOME_CACHE = 'disponibilidade'
+VERSAO_GLOBAL = 'global'
+
+
+def combinar_local(data, hora):
+    """Combina data + hora no fuso local (aware quando USE_TZ=True)."""
+    momento = datetime.combine(data, hora)
+    if settings.USE_TZ:
+        return timezone.make_aware(momento)
+    return momento
+
+
+def formatar_horario(momento):
+    """Formata um datetime como "HH:MM" no horário local."""
+    if timezone.is_aware(momento):
+        momento = timezone.localtime(momento)
+    return momento.strftime('%H:%M')
+
+
+def mesclar_intervalos(intervalos):
+    """
+    Recebe pares (inicio, fim) em qualquer ordem e devolve uma lista
+    ordenada de intervalos disjuntos, unindo os que se sobrepõem ou se tocam.
+    """
+    mesclados = []
+    for inicio, fim in sorted(i for i in intervalos if i[0] < i[1]):
+        if mesclados and inicio <= mesclados[-1][1]:
+            if fim > mesclados[-1][1]:
+                mesclados[-1][1] = fim
+        else:
+            mesclados.append([inicio, fim])
+    return [(inicio, fim) for inicio, fim in mesclados]
+
+
+class IndiceOcupacao:
+    """Índice de intervalos ocupados, pronto para consultas de sobreposição."""
+
+    def __init__(self, intervalos):
+        self.intervalos = mesclar_intervalos(intervalos)
+        self._inicios = [inicio for inicio, _ in self.intervalos]
+
+    def esta_livre(self, inicio, fim=None):
+        """
+        Indica se [inicio, fim) não toca nenhum intervalo ocupado.
+        Sem 'fim', verifica apenas o instante 'inicio'.
+        """
+        idx = bisect_right(self._inicios, inicio) - 1
+        if idx >= 0 and self.intervalos[idx][1] > inicio:
+            return False
+        if fim is not None and idx + 1 < len(self.intervalos):
+            return self.intervalos[idx + 1][0] >= fim
+        return True
+
+
+def calcular_horarios_livres(janelas, ocupados, duracao=None, intervalo=INTERVALO_PADRAO):
+    """
+    Retorna os horários livres ("HH:MM") dentro das janelas de expediente.
+
+    janelas: pares (inicio, fim) de datetimes do expediente.
+    ocupados: pares (inicio, fim) de agendamentos/bloqueios.
+    duracao: timedelta do procedimento. Quando informada, o horário só é
+        livre se o procedimento inteiro couber no expediente sem conflitos.
+    """
+    indice = ocupados if isinstance(ocupados, IndiceOcupacao) else IndiceOcupacao(ocupados)
+    horarios = []
+    for inicio_expediente, fim_expediente in sorted(janelas):
+        hora_atual = inicio_expediente
+        while hora_atual < fim_expediente:
+            fim_slot = hora_atual + duracao if duracao else None
+            if fim_slot is not None and fim_slot > fim_expediente:
+                break
+            if indice.esta_livre(hora_atual, fim_slot):
+                horarios.append(formatar_horario(hora_atual))
+            hora_atual += intervalo
+    return horarios
+
+
+def _minutos(hora):
+    return hora.hour * 60 + hora.minute
+
+
+def _momento(data, minutos):
+    """Datetime local de 'data' + 'minutos' (1440 = meia-noite seguinte)."""
+    if minutos >= 24 * 60:
+        return combinar_local(data + timedelta(days=1), time.min)
+    return combinar_local(data, time(minutos // 60, minutos % 60))
+
+
+def compilar_agenda_semanal(expedientes):
+    """
+    Compila linhas (dia_semana, hora_inicio, hora_fim) de
+    DisponibilidadeProfissional na agenda semanal guardada em
+    Profissional.agenda_semanal: uma lista de 7 posições indexada por
+    date.weekday() (0=Seg ... 6=Dom), cada uma com os turnos do dia como
+    pares [minuto_inicio, minuto_fim], ordenados e mesclados.
+    """
+    turnos_por_dia = [[] for _ in range(7)]
+    for dia_semana, hora_inicio, hora_fim in expedientes:
+        # dia_semana: 1=Dom, 2=Seg, ..., 7=Sáb
+        turnos_por_dia[(dia_semana + 5) % 7].append((_minutos(hora_inicio), _minutos(hora_fim)))
+    return [[list(turno) for turno in mesclar_intervalos(turnos)] for turnos in turnos_por_dia]
+
+
+def subtrair_intervalos(intervalos, removidos):
+    """Retira de 'intervalos' (disjuntos e ordenados) os trechos em 'removidos'."""
+    resultado = []
+    removidos = mesclar_intervalos(removidos)
+    for inicio, fim in intervalos:
+        for inicio_removido, fim_removido in removidos:
+            if fim_removido <= inicio or inicio_removido >= fim:
+                continue
+            if inicio_removido > inicio:
+                resultado.append((inicio, inicio_removido))
+            inicio = max(inicio, fim_removido)
+            if inicio >= fim:
+                break
+        if inicio < fim:
+            resultado.append((inicio, fim))
+    return resultado
+
+
+def janelas_do_dia(agenda_semanal, data, excecoes=()):
+    """
+    Janelas de expediente (datetimes) de um dia: os turnos da agenda
+    semanal, menos as folgas, mais os turnos extras daquela data.
+
+    excecoes: trincas (tipo, hora_inicio, hora_fim) de ExcecaoDisponibilidade;
+    uma folga sem horas ocupa o dia inteiro.
+    """
+    turnos = [tuple(turno) for turno in agenda_semanal[data.weekday()]] if agenda_semanal else []
+    folgas, extras = [], []
+    for tipo, hora_inicio, hora_fim in excecoes:
+        if tipo == 'EXTRA':
+            extras.append((_minutos(hora_inicio), _minutos(hora_fim)))
+        elif hora_inicio is None or hora_fim is None:
+            folgas.append((0, 24 * 60))
+        else:
+            folgas.append((_minutos(hora_inicio), _minutos(hora_fim)))
+    # Um turno extra vale mesmo em dia de folga: foi marcado de propósito
+    turnos = mesclar_intervalos([*subtrair_intervalos(turnos, folgas), *extras])
+    return [(_momento(data, inicio), _momento(data, fim)) for inicio, fim in turnos]
+
+
+def expandir_recorrencia(regra, data_inicio, data_fim):
+    """
+    Ocorrências (inicio, fim) de uma regra de BloqueioRecorrente entre
+    data_inicio e data_fim (inclusivas). Só o período pedido é gerado.
+
+    regra: (frequencia, intervalo, dias_semana, hora_inicio, hora_fim,
+    vigencia_inicio, vigencia_fim). Como no RRULE, uma regra semanal sem
+    dias_semana repete o dia da semana em que a vigência começa.
+    """
+    frequencia, intervalo, dias_semana, hora_inicio, hora_fim, vigencia_inicio, vigencia_fim = regra
+    primeiro = max(data_inicio, vigencia_inicio)
+    ultimo = min(data_fim, vigencia_fim) if vigencia_fim else data_fim
+    # dias_semana: 1=Dom, 2=Seg, ..., 7=Sáb
+    dias = {int(dia) for dia in (dias_semana or '').split(',') if dia.strip()}
+    if frequencia == 'SEMANAL' and not dias:
+        dias = {vigencia_inicio.isoweekday() % 7 + 1}
+    segunda_inicial = vigencia_inicio - timedelta(days=vigencia_inicio.weekday())
+
+    ocorrencias = []
+    data = primeiro
+    while data <= ultimo:
+        if frequencia == 'DIARIA':
+            no_ciclo = (data - vigencia_inicio).days % intervalo == 0
+        else:
+            no_ciclo = ((data - segunda_inicial).days // 7) % intervalo == 0
+        if no_ciclo and (not dias or data.isoweekday() % 7 + 1 in dias):
+            ocorrencias.append((combinar_local(data, hora_inicio), combinar_local(data, hora_fim)))
+        data += timedelta(days=1)
+    return ocorrencias
+
+
+def recompilar_agendas(profissionais_ids):
+    """Recompila Profissional.agenda_semanal a partir de DisponibilidadeProfissional."""
+    from .models import DisponibilidadeProfissional, Profissional
+
+    profissionais_ids = {i for i in profissionais_ids if i is not None}
+    if not profissionais_ids:
+        return
+    expedientes = defaultdict(list)
+    for id_prof, dia_semana, hora_inicio, hora_fim in DisponibilidadeProfissional.objects.filter(
+        profissional_id__in=profissionais_ids,
+    ).values_list('profissional_id', 'dia_semana', 'hora_inicio', 'hora_fim'):
+        expedientes[id_prof].append((dia_semana, hora_inicio, hora_fim))
+    Profissional.objects.bulk_update([
+        Profissional(pk=id_prof, agenda_semanal=compilar_agenda_semanal(expedientes[id_prof]))
+        for id_prof in profissionais_ids
+    ], ['agenda_semanal'])
+
+
+def calcular_grade_periodo(profissionais_ids, data_inicio, dias, duracao=None, intervalo=INTERVALO_PADRAO):
+    """
+    Calcula a disponibilidade de vários profissionais em vários dias.
+
+    Dias já presentes no cache são reaproveitados; os demais são calculados
+    em lote e gravados no cache.
+    Retorna {id_profissional: {"AAAA-MM-DD": ["HH:MM", ...]}}.
+    """
+    profissionais_ids = list(profissionais_ids)
+    datas = [data_inicio + timedelta(days=i) for i in range(dias)]
+    if not profissionais_ids or not datas:
+        return {}
+
+    cache = obter_cache(NOME_CACHE)
+    versoes = cache.versoes([VERSAO_GLOBAL, *(_nome_versao(i) for i in profissionais_ids)])
+    chaves = {
+        (id_prof, data): _chave_cache(id_prof, data, duracao, intervalo, versoes)
+        for id_prof in profissionais_ids for data in datas
+    }
+    encontrados = cache.get_many(chaves.values())
+
+    grade = {id_prof: {} for id_prof in profissionais_ids}
+    pendentes = set()
+    for (id_prof, data), chave in chaves.items():
+        if chave in encontrados:
+            grade[id_prof][data.isoformat()] = encontrados[chave]
+        else:
+            pendentes.add(id_prof)
+
+    if pendentes:
+        calculada = _calcular_grade(pendentes, datas, duracao, intervalo)
+        cache.set_many({
+            chaves[(id_prof, data)]: calculada[id_prof][data.isoformat()]
+            for id_prof in pendentes for data in datas
+        })
+        grade.update(calculada)
+    return grade
+
+
+def horarios_disponiveis_em_cache(profissional, data, duracao_minutos=None):
+    """Versão com cache de Profissional.get_horarios_disponiveis."""
+    cache = obter_cache(NOME_CACHE)
+    duracao = timedelta(minutes=duracao_minutos) if duracao_minutos else None
+    versoes = cache.versoes([VERSAO_GLOBAL, _nome_versao(profissional.pk)])
+    chave = _chave_cache(profissional.pk, data, duracao, INTERVALO_PADRAO, versoes)
+    encontrado = cache.get_many([chave])
+    if chave in encontrado:
+        return encontrado[chave]
+    horarios = profissional.get_horarios_disponiveis(data, duracao_minutos)
+    cache.set_many({chave: horarios})
+    return horarios
+
+
+async def ahorarios_disponiveis_em_cache(id_profissional, data, duracao_minutos=None):
+    """
+    Versão assíncrona de horarios_disponiveis_em_cache, para views ASGI.
+    Usa as mesmas chaves de cache da versão síncrona.
+    """
+    cache = obter_cache(NOME_CACHE)
+    duracao = timedelta(minutes=duracao_minutos) if duracao_minutos else None
+    # O cache pode ser de rede (backend 'django'): fora do event loop
+    versoes = await sync_to_async(cache.versoes, thread_sensitive=False)(
+        [VERSAO_GLOBAL, _nome_versao(id_profissional)]
+    )
+    chave = _chave_cache(id_profissional, data, duracao, INTERVALO_PADRAO, versoes)
+    encontrado = await sync_to_async(cache.get_many, thread_sensitive=False)([chave])
+    if chave in encontrado:
+        return encontrado[chave]
+    grade = await _acalcular_grade([id_profissional], [data], duracao, INTERVALO_PADRAO)
+    horarios = grade[id_profissional][data.isoformat()]
+    await sync_to_async(cache.set_many, thread_sensitive=False)({chave: horarios})
+    return horarios
+
+
+def invalidar_profissional(id_profissional):
+    """
+    Descarta a disponibilidade em cache de um profissional. Sem profissional
+    (ex: bloqueio da clínica inteira), descarta a de todos.
+    """
+    nome = _nome_versao(id_profissional) if id_profissional else VERSAO_GLOBAL
+    obter_cache(NOME_CACHE).incrementar_versao(nome)
+
+
+def _nome_versao(id_profissional):
+    return f'profissional:{id_profissional}'
+
+
+def _chave_cache(id_profissional, data, duracao, intervalo, versoes):
+    duracao_minutos = int(duracao.total_seconds() // 60) if duracao else 0
+    intervalo_minutos = int(intervalo.total_seconds() // 60)
+    return (
+        f'{id_profissional}:{versoes[_nome_versao(id_profissional)]}:{versoes[VERSAO_GLOBAL]}:'
+        f'{data.isoformat()}:{duracao_minutos}:{intervalo_minutos}'
+    )
+
+
+def _calcular_grade(profissionais_ids, datas, duracao, intervalo):
+    """
+    Carrega agendas semanais, exceções, agendamentos, bloqueios e regras
+    recorrentes de todo o período em cinco consultas e monta todas as grades
+    em uma única passada.
+    """
+    profissionais_ids = list(profissionais_ids)
+    return _montar_grade(
+        profissionais_ids, datas, duracao, intervalo,
+        *(list(consulta) for consulta in _consultas_grade(profissionais_ids, datas)),
+    )
+
+
+async def _acalcular_grade(profissionais_ids, datas, duracao, intervalo):
+    """
+    Versão assíncrona de _calcular_grade. O ORM assíncrono do Django roda as
+    consultas em uma thread (sync_to_async), uma depois da outra; aqui as
+    cinco vão juntas nessa thread, em uma única troca com o event loop, que
+    fica livre para outras requisições enquanto o banco responde.
+    """
+    return await sync_to_async(_calcular_grade)(list(profissionais_ids), datas, duracao, intervalo)
+
+
+def _consultas_grade(profissionais_ids, datas):
+    """
+    Querysets (ainda não avaliados) de agendas, exceções, agendamentos,
+    bloqueios e regras de bloqueio recorrente do período.
+    """
+    from .models import (
+        Atendimento, BloqueioAgenda, BloqueioRecorrente, ExcecaoDisponibilidade, Profissional,
+    )
+
+    inicio_periodo = combinar_local(datas[0], time.min)
+    fim_periodo = combinar_local(datas[-1] + timedelta(days=1), time.min)
+
+    # (1) Agenda semanal já compilada de cada profissional
+    agendas = Profissional.objects.filter(
+        pk__in=profissionais_ids,
+    ).values_list('pk', 'agenda_semanal')
+
+    # (2) Folgas e turnos extras do período (sem profissional = clínica inteira)
+    excecoes = ExcecaoDisponibilidade.objects.para_profissionais(profissionais_ids).filter(
+        data__gte=datas[0], data__lte=datas[-1],
+    ).values_list('profissional_id', 'data', 'tipo', 'hora_inicio', 'hora_fim')
+
+    # (3) e (4) Períodos ocupados que tocam o intervalo consultado (um único
+    # predicado de intervalo: inicio < fim_periodo AND fim > inicio_periodo)
+    agendamentos = Atendimento.objects.filter(
+        profissional_id__in=profissionais_ids,
+    ).ativos().sobrepondo(inicio_periodo, fim_periodo).values_list(
+        'profissional_id', 'data_hora_inicio', 'data_hora_fim'
+    )
+    bloqueios = BloqueioAgenda.objects.para_profissionais(
+        profissionais_ids,
+    ).sobrepondo(inicio_periodo, fim_periodo).values_list(
+        'profissional_id', 'data_hora_inicio', 'data_hora_fim'
+    )
+
+    # (5) Regras recorrentes vigentes; as ocorrências são geradas em memória
+    recorrentes = BloqueioRecorrente.objects.para_profissionais(
+        profissionais_ids,
+    ).vigentes(datas[0], datas[-1]).values_list(
+        'profissional_id', 'frequencia', 'intervalo', 'dias_semana', 'hora_inicio', 'hora_fim',
+        'data_inicio', 'data_fim',
+    )
+    return agendas, excecoes, agendamentos, bloqueios, recorrentes
+
+
+def _montar_grade(profissionais_ids, datas, duracao, intervalo, linhas_agendas, linhas_excecoes,
+                  linhas_agendamentos, linhas_bloqueios, linhas_recorrentes):
+    agendas = dict(linhas_agendas)
+    excecoes = defaultdict(list)
+    for id_prof, data, tipo, hora_inicio, hora_fim in linhas_excecoes:
+        excecoes[(id_prof, data)].append((tipo, hora_inicio, hora_fim))
+
+    # Períodos ocupados por profissional; a chave None é a clínica inteira
+    ocupados = defaultdict(list)
+    for id_prof, inicio, fim in [*linhas_agendamentos, *linhas_bloqueios]:
+        ocupados[id_prof].append((inicio, fim))
+    for id_prof, *regra in linhas_recorrentes:
+        ocupados[id_prof].extend(expandir_recorrencia(regra, datas[0], datas[-1]))
+
+    grade = {}
+    for id_prof in profissionais_ids:
+        indice = IndiceOcupacao([*ocupados[id_prof], *ocupados[None]])
+        grade[id_prof] = {}
+        for data in datas:
+            janelas = janelas_do_dia(
+                agendas.get(id_prof), data, [*excecoes[(None, data)], *excecoes[(id_prof, data)]]
+            )
+            grade[id_prof][data.isoformat()] = calcular_horarios_livres(
+                janelas, indice, duracao=duracao, intervalo=intervalo
+            )
+    return grade
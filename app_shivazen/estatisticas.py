@@ -0,0 +1,104 @@
+# app_shivazen/estatisticas.py
+"""
+Manutenção da tabela de resumo EstatisticaDiaria.
+
+Cada atendimento contribui para exatamente uma linha do resumo, identificada
+por (data local, profissional, procedimento, status). Ao salvar ou excluir
+um atendimento, a contribuição antiga é retirada e a nova é somada, com
+UPDATE ... SET quantidade = quantidade + n, sem recalcular nada.
+"""
+from datetime import time, timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .disponibilidade import combinar_local
+from .models import Atendimento, EstatisticaDiaria
+
+CAMPOS_CONTRIBUICAO = ('data_hora_inicio', 'profissional_id', 'procedimento_id', 'status_atendimento', 'valor_cobrado')
+
+
+def contribuicao(valores):
+    """
+    Converte os campos de um atendimento em (chave do resumo, valor).
+    Retorna None se algum campo necessário não estiver disponível.
+    """
+    if not valores or any(campo not in valores for campo in CAMPOS_CONTRIBUICAO):
+        return None
+    inicio = valores['data_hora_inicio']
+    if inicio is None:
+        return None
+    chave = (
+        timezone.localdate(inicio) if timezone.is_aware(inicio) else inicio.date(),
+        valores['profissional_id'],
+        valores['procedimento_id'],
+        valores['status_atendimento'],
+    )
+    return chave, Decimal(valores['valor_cobrado'] or 0)
+
+
+def aplicar(antiga, nova):
+    """Retira a contribuição 'antiga' e soma a 'nova' (ambas podem ser None)."""
+    if antiga == nova:
+        return
+    if antiga is not None:
+        _somar(antiga[0], -1, -antiga[1])
+    if nova is not None:
+        _somar(nova[0], 1, nova[1])
+
+
+def _somar(chave, quantidade, valor):
+    data, id_profissional, id_procedimento, status = chave
+    filtro = {
+        'data': data,
+        'profissional_id': id_profissional,
+        'procedimento_id': id_procedimento,
+        'status_atendimento': status,
+    }
+    atualizar = {'quantidade': F('quantidade') + quantidade, 'valor_total': F('valor_total') + valor}
+    if EstatisticaDiaria.objects.filter(**filtro).update(**atualizar):
+        return
+    try:
+        # Savepoint: se outra transação criou a linha primeiro, só atualiza
+        with transaction.atomic():
+            EstatisticaDiaria.objects.create(quantidade=quantidade, valor_total=valor, **filtro)
+    except IntegrityError:
+        EstatisticaDiaria.objects.filter(**filtro).update(**atualizar)
+
+
+def recalcular(data_inicio, data_fim):
+    """
+    Reconstrói o resumo para as datas de 'data_inicio' a 'data_fim'
+    (inclusive) a partir dos atendimentos, em uma única transação.
+    Retorna a quantidade de linhas de resumo gravadas.
+    """
+    inicio = combinar_local(data_inicio, time.min)
+    fim = combinar_local(data_fim + timedelta(days=1), time.min)
+    agrupados = Atendimento.objects.filter(
+        data_hora_inicio__gte=inicio, data_hora_inicio__lt=fim,
+    ).annotate(
+        data=TruncDate('data_hora_inicio')
+    ).values(
+        'data', 'profissional_id', 'procedimento_id', 'status_atendimento',
+    ).annotate(
+        quantidade=Count('pk'), valor_total=Sum('valor_cobrado'),
+    ).order_by()
+
+    with transaction.atomic():
+        linhas = [
+            EstatisticaDiaria(
+                data=item['data'],
+                profissional_id=item['profissional_id'],
+                procedimento_id=item['procedimento_id'],
+                status_atendimento=item['status_atendimento'],
+                quantidade=item['quantidade'],
+                valor_total=item['valor_total'] or 0,
+            )
+            for item in agrupados
+        ]
+        EstatisticaDiaria.objects.filter(data__gte=data_inicio, data__lte=data_fim).delete()
+        EstatisticaDiaria.objects.bulk_create(linhas, batch_size=1000)
+    return len(linhas)
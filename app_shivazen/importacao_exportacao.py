@@ -0,0 +1,316 @@
+# app_shivazen/importacao_exportacao.py
+"""
+Importação e exportação em lote de clientes, atendimentos e preços
+(CSV ou JSONL), usadas pelos comandos importar_dados e exportar_dados.
+
+- Exportação: itera o banco com .iterator() (cursor do lado do servidor no
+  PostgreSQL) e escreve linha a linha; a memória usada não depende do
+  tamanho da tabela.
+- Importação: lê o arquivo em lotes. Cada lote entra em uma transação, via
+  bulk_create ou, no PostgreSQL, via COPY para uma tabela temporária
+  seguida de INSERT ... SELECT. Clientes (pelo CPF) e preços (por
+  procedimento e profissional) já cadastrados são ignorados ou atualizados,
+  e o resumo conta só as linhas de fato inseridas ou atualizadas.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import islice
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .busca_clientes import somente_digitos
+from .models import Atendimento, Cliente, Preco
+
+CAMPOS_CLIENTE = [
+    'nome_completo', 'data_nascimento', 'cpf', 'rg', 'profissao',
+    'email', 'telefone', 'cep', 'endereco', 'ativo',
+]
+
+
+class ErroImportacao(Exception):
+    """Registro inválido ou lote rejeitado pelo banco."""
+
+
+class Tipo:
+    """Descreve como um modelo é lido e escrito nos arquivos."""
+
+    def __init__(self, modelo, colunas, colunas_exportacao=None, chave_conflito=None):
+        self.modelo = modelo
+        # Colunas gravadas no banco (nomes de atributo, ex: 'profissional_id')
+        self.colunas = colunas
+        # Colunas do arquivo exportado (lookups aceitos por .values_list)
+        self.colunas_exportacao = colunas_exportacao or colunas
+        # Chave natural (tupla de colunas) que identifica um registro já cadastrado
+        self.chave_conflito = chave_conflito or ()
+
+    def campo(self, coluna):
+        return self.modelo._meta.get_field(coluna.removesuffix('_id'))
+
+    def chave(self, instancia):
+        """Chave natural da instância; None se toda vazia (ex: cliente sem CPF)."""
+        chave = tuple(getattr(instancia, coluna) for coluna in self.chave_conflito)
+        return None if all(valor is None for valor in chave) else chave
+
+    def cabecalho(self):
+        return [coluna.replace('__', '_') for coluna in self.colunas_exportacao]
+
+
+TIPOS = {
+    # As colunas de busca não vão para o arquivo, mas são gravadas (e
+    # atualizadas no conflito) junto com as demais
+    'clientes': Tipo(
+        Cliente, CAMPOS_CLIENTE + Cliente.CAMPOS_BUSCA,
+        colunas_exportacao=CAMPOS_CLIENTE, chave_conflito=('cpf',),
+    ),
+    'atendimentos': Tipo(
+        Atendimento,
+        ['cliente_id', 'profissional_id', 'procedimento_id', 'data_hora_inicio', 'data_hora_fim',
+         'valor_cobrado', 'status_atendimento', 'observacoes'],
+        colunas_exportacao=[
+            'cliente_id', 'cliente__cpf', 'profissional_id', 'procedimento_id', 'data_hora_inicio',
+            'data_hora_fim', 'valor_cobrado', 'status_atendimento', 'observacoes',
+        ],
+    ),
+    # Sem profissional, o preço é o geral do procedimento (também único)
+    'precos': Tipo(
+        Preco, ['procedimento_id', 'profissional_id', 'valor', 'descricao'],
+        chave_conflito=('procedimento_id', 'profissional_id'),
+    ),
+}
+
+
+# --- Exportação ---
+
+def _serializar(valor):
+    if isinstance(valor, datetime):
+        return timezone.localtime(valor).isoformat() if timezone.is_aware(valor) else valor.isoformat()
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    return valor
+
+
+def exportar(nome_tipo, saida, formato='csv', tamanho_lote=2000):
+    """Escreve todos os registros do tipo em 'saida'. Retorna a quantidade."""
+    tipo = TIPOS[nome_tipo]
+    linhas = tipo.modelo.objects.order_by('pk').values_list(
+        *tipo.colunas_exportacao
+    ).iterator(chunk_size=tamanho_lote)
+    cabecalho = tipo.cabecalho()
+
+    total = 0
+    if formato == 'csv':
+        escritor = csv.writer(saida)
+        escritor.writerow(cabecalho)
+        for linha in linhas:
+            escritor.writerow(['' if v is None else _serializar(v) for v in linha])
+            total += 1
+    else:
+        for linha in linhas:
+            saida.write(json.dumps(dict(zip(cabecalho, map(_serializar, linha))), ensure_ascii=False))
+            saida.write('\n')
+            total += 1
+    return total
+
+
+# --- Importação ---
+
+def ler_registros(entrada, formato='csv'):
+    """Gera dicionários a partir de um arquivo CSV (com cabeçalho) ou JSONL."""
+    if formato == 'csv':
+        yield from csv.DictReader(entrada)
+    else:
+        for linha in entrada:
+            if linha.strip():
+                yield json.loads(linha)
+
+
+def _converter_valor(campo, valor):
+    if valor is None or (valor == '' and campo.null):
+        return None
+    valor = campo.to_python(valor)
+    if isinstance(valor, datetime) and timezone.is_naive(valor):
+        valor = timezone.make_aware(valor)
+    return valor
+
+
+def _montar_instancia(tipo, registro, clientes_por_cpf):
+    valores = {}
+    for coluna in tipo.colunas:
+        bruto = registro.get(coluna)
+        if coluna == 'cliente_id' and registro.get('cliente_cpf'):
+            # Atendimentos referenciam o cliente pelo CPF sempre que possível
+            bruto = clientes_por_cpf.get(somente_digitos(registro['cliente_cpf']))
+            if bruto is None:
+                raise ErroImportacao(f"Cliente com CPF {registro['cliente_cpf']} não encontrado")
+        valores[coluna] = _converter_valor(tipo.campo(coluna), bruto)
+    instancia = tipo.modelo(**valores)
+    if isinstance(instancia, Cliente):
+        instancia.atualizar_campos_busca()
+    return instancia
+
+
+def _clientes_do_lote(lote_bruto):
+    """
+    {cpf só com dígitos: id_cliente} dos clientes citados no lote. Compara
+    pelo cpf_digitos: '123.456.789-00' no arquivo acha '12345678900' no banco.
+    """
+    cpfs = {somente_digitos(registro.get('cliente_cpf')) for registro in lote_bruto} - {None}
+    if not cpfs:
+        return {}
+    return dict(Cliente.objects.filter(cpf_digitos__in=cpfs).values_list('cpf_digitos', 'id_cliente'))
+
+
+def importar(nome_tipo, registros, tamanho_lote=5000, ao_conflitar='ignorar', usar_copy=None):
+    """
+    Importa os registros em lotes. Retorna um dicionário com as quantidades
+    lidas, inseridas e atualizadas (registros já cadastrados que foram
+    ignorados não entram em nenhuma das duas) e o intervalo de datas dos
+    atendimentos importados.
+    """
+    tipo = TIPOS[nome_tipo]
+    if usar_copy is None:
+        usar_copy = connection.vendor == 'postgresql'
+
+    resumo = {'lidos': 0, 'inseridos': 0, 'atualizados': 0, 'primeira_data': None, 'ultima_data': None}
+    registros = iter(registros)
+    while True:
+        lote_bruto = list(islice(registros, tamanho_lote))
+        if not lote_bruto:
+            break
+        try:
+            clientes_por_cpf = _clientes_do_lote(lote_bruto) if nome_tipo == 'atendimentos' else {}
+            lote = [_montar_instancia(tipo, registro, clientes_por_cpf) for registro in lote_bruto]
+        except Exception as e:
+            raise ErroImportacao(f'Registro inválido entre as linhas {resumo["lidos"] + 1} e '
+                                 f'{resumo["lidos"] + len(lote_bruto)}: {e}') from e
+        try:
+            with transaction.atomic():
+                gravar = _gravar_com_copy if usar_copy else _gravar_com_bulk_create
+                inseridos, atualizados = gravar(tipo, lote, ao_conflitar)
+        except Exception as e:
+            raise ErroImportacao(f'Lote com as linhas {resumo["lidos"] + 1} a '
+                                 f'{resumo["lidos"] + len(lote)} rejeitado: {e}') from e
+        resumo['lidos'] += len(lote)
+        resumo['inseridos'] += inseridos
+        resumo['atualizados'] += atualizados
+
+        if nome_tipo == 'atendimentos':
+            datas = [timezone.localdate(a.data_hora_inicio) for a in lote]
+            resumo['primeira_data'] = min(filter(None, [resumo['primeira_data'], min(datas)]))
+            resumo['ultima_data'] = max(filter(None, [resumo['ultima_data'], max(datas)]))
+    return resumo
+
+
+def _chaves_existentes(tipo, lote):
+    """{chave natural: pk} dos registros do lote que já estão no banco."""
+    primeira = tipo.chave_conflito[0]
+    valores = {getattr(instancia, primeira) for instancia in lote} - {None}
+    linhas = tipo.modelo.objects.filter(**{f'{primeira}__in': valores}).values_list(
+        *tipo.chave_conflito, 'pk'
+    )
+    return {tuple(linha[:-1]): linha[-1] for linha in linhas}
+
+
+def _gravar_com_bulk_create(tipo, lote, ao_conflitar):
+    """
+    Separa o lote pela chave natural: o que é novo vai para bulk_create; o
+    que já existe é ignorado ou vai para bulk_update. Funciona em qualquer
+    banco e com as constraints parciais de Preco, que ON CONFLICT (colunas)
+    não reconhece. Linhas repetidas no mesmo lote: vale a primeira.
+    """
+    if not tipo.chave_conflito:
+        tipo.modelo.objects.bulk_create(lote)
+        return len(lote), 0
+
+    existentes = _chaves_existentes(tipo, lote)
+    novos, atualizar, vistas = [], [], set()
+    for instancia in lote:
+        chave = tipo.chave(instancia)
+        if chave is None:
+            novos.append(instancia)
+            continue
+        if chave in vistas:
+            continue
+        vistas.add(chave)
+        if chave not in existentes:
+            novos.append(instancia)
+        elif ao_conflitar == 'atualizar':
+            instancia.pk = existentes[chave]
+            atualizar.append(instancia)
+
+    tipo.modelo.objects.bulk_create(novos)
+    if atualizar:
+        tipo.modelo.objects.bulk_update(
+            atualizar, [coluna for coluna in tipo.colunas if coluna not in tipo.chave_conflito]
+        )
+    return len(novos), len(atualizar)
+
+
+def _gravar_com_copy(tipo, lote, ao_conflitar):
+    """
+    COPY para uma tabela temporária e INSERT ... SELECT na tabela real
+    (PostgreSQL). Com chave natural, os registros já cadastrados são
+    atualizados por UPDATE ... FROM (se pedido) e ficam fora do INSERT; o
+    rowcount do INSERT é o número de linhas de fato inseridas.
+    """
+    tabela = tipo.modelo._meta.db_table
+    campos = [
+        campo for campo in tipo.modelo._meta.concrete_fields
+        if not campo.primary_key
+    ]
+    colunas = ', '.join(connection.ops.quote_name(campo.column) for campo in campos)
+
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    for instancia in lote:
+        linha = []
+        for campo in campos:
+            # pre_save preenche campos como auto_now_add
+            valor = campo.get_db_prep_save(campo.pre_save(instancia, True), connection)
+            linha.append(r'\N' if valor is None else valor)
+        escritor.writerow(linha)
+    buffer.seek(0)
+
+    filtro = conflito = ''
+    if tipo.chave_conflito:
+        chave = [connection.ops.quote_name(tipo.campo(coluna).column) for coluna in tipo.chave_conflito]
+        # NULL casa com NULL (preço geral), mas uma chave toda vazia (cliente
+        # sem CPF) nunca casa: é sempre um registro novo
+        casamento = ' AND '.join(
+            [f'{tabela}.{c} IS NOT DISTINCT FROM importacao_temp.{c}' for c in chave]
+            + ['NOT (' + ' AND '.join(f'importacao_temp.{c} IS NULL' for c in chave) + ')']
+        )
+        filtro = f'WHERE NOT EXISTS (SELECT 1 FROM {tabela} WHERE {casamento})'
+        # Linhas repetidas no próprio lote
+        conflito = 'ON CONFLICT DO NOTHING'
+
+    with connection.cursor() as cursor:
+        cursor.execute('DROP TABLE IF EXISTS importacao_temp')
+        cursor.execute(
+            f'CREATE TEMP TABLE importacao_temp (LIKE {tabela} INCLUDING DEFAULTS) ON COMMIT DROP'
+        )
+        sql_copy = f"COPY importacao_temp ({colunas}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+        bruto = cursor.cursor
+        if hasattr(bruto, 'copy_expert'):  # psycopg2
+            bruto.copy_expert(sql_copy, buffer)
+        else:  # psycopg 3
+            with bruto.copy(sql_copy) as copia:
+                copia.write(buffer.getvalue())
+        atualizados = 0
+        if tipo.chave_conflito and ao_conflitar == 'atualizar':
+            atualizar = ', '.join(
+                f'{connection.ops.quote_name(c.column)} = importacao_temp.{connection.ops.quote_name(c.column)}'
+                for c in campos if c.attname not in tipo.chave_conflito and c.name != 'data_cadastro'
+            )
+            cursor.execute(f'UPDATE {tabela} SET {atualizar} FROM importacao_temp WHERE {casamento}')
+            atualizados = cursor.rowcount
+        cursor.execute(
+            f'INSERT INTO {tabela} ({colunas}) SELECT {colunas} FROM importacao_temp {filtro} {conflito}'
+        )
+        return cursor.rowcount, atualizados
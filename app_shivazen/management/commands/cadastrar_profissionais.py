@@ -0,0 +1,61 @@
+# app_shivazen/management/commands/cadastrar_profissionais.py
+"""
+Cadastra em lote profissionais, seus horários semanais e procedimentos a
+partir de um arquivo JSON ou CSV. O arquivo inteiro entra em uma transação:
+se um profissional for inválido, nenhum é gravado.
+
+Uso:
+    python manage.py cadastrar_profissionais equipe.json
+    python manage.py cadastrar_profissionais equipe.csv
+
+JSON: lista no formato de profissionais.cadastrar_profissionais.
+CSV: uma linha por profissional, com as colunas
+    nome, especialidade, ativo, procedimentos, domingo, segunda, ..., sabado
+onde 'procedimentos' são ids separados por '|' e cada dia traz os turnos
+no formato '09:00-12:00|13:00-18:00' (vazio = não trabalha).
+"""
+import csv
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app_shivazen.profissionais import DIAS_SEMANA, ErroCadastroProfissional, cadastrar_profissionais
+
+
+def _lote_do_csv(arquivo):
+    lote = []
+    for linha in csv.DictReader(arquivo):
+        horarios = []
+        for dia, dia_semana in DIAS_SEMANA.items():
+            for turno in filter(None, (linha.get(dia) or '').split('|')):
+                hora_inicio, _, hora_fim = turno.strip().partition('-')
+                horarios.append({'dia_semana': dia_semana, 'hora_inicio': hora_inicio, 'hora_fim': hora_fim})
+        lote.append({
+            'nome': linha.get('nome'),
+            'especialidade': linha.get('especialidade'),
+            'ativo': (linha.get('ativo') or 'sim').strip().lower() in ('sim', 's', 'true', '1'),
+            'horarios': horarios,
+            'procedimentos': [p for p in (linha.get('procedimentos') or '').split('|') if p.strip()],
+        })
+    return lote
+
+
+class Command(BaseCommand):
+    help = 'Cadastra profissionais com horários e procedimentos a partir de um arquivo JSON ou CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help='Arquivo .json ou .csv')
+
+    def handle(self, *args, **options):
+        caminho = options['arquivo']
+        try:
+            with open(caminho, newline='', encoding='utf-8') as arquivo:
+                lote = json.load(arquivo) if caminho.endswith('.json') else _lote_do_csv(arquivo)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Não foi possível ler {caminho}: {e}')
+
+        try:
+            profissionais = cadastrar_profissionais(lote)
+        except ErroCadastroProfissional as e:
+            raise CommandError(f'Nenhum profissional cadastrado. {e}')
+        self.stdout.write(self.style.SUCCESS(f'{len(profissionais)} profissional(is) cadastrado(s).'))
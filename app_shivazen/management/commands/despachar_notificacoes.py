@@ -0,0 +1,56 @@
+# app_shivazen/management/commands/despachar_notificacoes.py
+"""
+Worker da fila de notificações: reivindica lotes de Notificacao pendentes
+e os envia pelos backends de cada canal (ver app_shivazen/notificacoes.py).
+Vários workers podem rodar ao mesmo tempo; SKIP LOCKED evita que dois
+peguem a mesma notificação.
+
+Uso:
+    python manage.py despachar_notificacoes                  # roda até Ctrl+C
+    python manage.py despachar_notificacoes --uma-vez        # esvazia a fila e sai (cron)
+    python manage.py despachar_notificacoes --lote 100 --concorrencia 8
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from app_shivazen.notificacoes import processar_lote
+
+
+class Command(BaseCommand):
+    help = 'Envia as notificações pendentes da fila (Notificacao).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--uma-vez', action='store_true',
+                            help='Processa o que estiver vencido e termina.')
+        parser.add_argument('--lote', type=int, default=50,
+                            help='Notificações reivindicadas por vez (padrão: 50).')
+        parser.add_argument('--concorrencia', type=int, default=4,
+                            help='Envios simultâneos (padrão: 4).')
+        parser.add_argument('--intervalo', type=float, default=5.0,
+                            help='Segundos de espera quando a fila está vazia (padrão: 5).')
+
+    def handle(self, *args, **options):
+        totais = {'enviadas': 0, 'reagendadas': 0, 'falhas': 0}
+        try:
+            while True:
+                # Worker de longa duração: descarta conexões velhas como o ciclo de requisição faria
+                close_old_connections()
+                resultado = processar_lote(options['lote'], options['concorrencia'])
+                for chave, valor in resultado.items():
+                    totais[chave] += valor
+                if any(resultado.values()):
+                    self.stdout.write(
+                        f'{resultado["enviadas"]} enviadas, {resultado["reagendadas"]} reagendadas, '
+                        f'{resultado["falhas"]} falhas'
+                    )
+                    continue
+                if options['uma_vez']:
+                    break
+                time.sleep(options['intervalo'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(
+            f'Total: {totais["enviadas"]} enviadas, {totais["reagendadas"]} reagendadas, {totais["falhas"]} falhas.'
+        ))
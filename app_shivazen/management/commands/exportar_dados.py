@@ -0,0 +1,35 @@
+# app_shivazen/management/commands/exportar_dados.py
+"""
+Exporta clientes, atendimentos ou preços para CSV ou JSONL, lendo o banco
+em blocos (memória constante, independente do tamanho da tabela).
+
+Uso:
+    python manage.py exportar_dados atendimentos --saida historico.csv
+    python manage.py exportar_dados clientes --formato jsonl > clientes.jsonl
+"""
+from django.core.management.base import BaseCommand
+
+from app_shivazen.importacao_exportacao import TIPOS, exportar
+
+
+class Command(BaseCommand):
+    help = 'Exporta clientes, atendimentos ou preços para CSV/JSONL.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tipo', choices=sorted(TIPOS))
+        parser.add_argument('--saida', help='Arquivo de saída (padrão: saída padrão).')
+        parser.add_argument('--formato', choices=['csv', 'jsonl'],
+                            help='Padrão: deduzido pela extensão da saída, ou csv.')
+        parser.add_argument('--lote', type=int, default=2000, help='Linhas lidas por vez do banco (padrão: 2000).')
+
+    def handle(self, *args, **options):
+        saida = options['saida']
+        formato = options['formato'] or ('jsonl' if saida and saida.endswith(('.jsonl', '.json')) else 'csv')
+
+        if saida:
+            with open(saida, 'w', newline='', encoding='utf-8') as arquivo:
+                total = exportar(options['tipo'], arquivo, formato, options['lote'])
+            self.stderr.write(f'{total} registros exportados para {saida}.')
+        else:
+            total = exportar(options['tipo'], self.stdout, formato, options['lote'])
+            self.stderr.write(f'{total} registros exportados.')
@@ -0,0 +1,39 @@
+# app_shivazen/management/commands/gerar_lembretes.py
+"""
+Enfileira os lembretes de atendimento (por padrão 24h e 2h antes) cuja
+janela abriu desde a última execução; o envio fica com
+despachar_notificacoes. Ver notificacoes.gerar_lembretes.
+
+Uso:
+    python manage.py gerar_lembretes                 # roda até Ctrl+C, a cada 60 s
+    python manage.py gerar_lembretes --uma-vez       # uma execução (cron)
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from app_shivazen.notificacoes import gerar_lembretes
+
+
+class Command(BaseCommand):
+    help = 'Enfileira lembretes dos atendimentos próximos (Notificacao).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--uma-vez', action='store_true',
+                            help='Executa uma vez e termina.')
+        parser.add_argument('--intervalo', type=float, default=60.0,
+                            help='Segundos entre execuções (padrão: 60).')
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                close_old_connections()
+                quantidade = gerar_lembretes()
+                if quantidade or options['verbosity'] > 1:
+                    self.stdout.write(f'{quantidade} lembrete(s) enfileirado(s).')
+                if options['uma_vez']:
+                    break
+                time.sleep(options['intervalo'])
+        except KeyboardInterrupt:
+            pass
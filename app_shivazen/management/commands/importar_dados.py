@@ -0,0 +1,75 @@
+# app_shivazen/management/commands/importar_dados.py
+"""
+Importa clientes, atendimentos ou preços de um arquivo CSV ou JSONL.
+
+Uso:
+    python manage.py importar_dados clientes clientes.csv --ao-conflitar atualizar
+    python manage.py importar_dados atendimentos historico.jsonl --lote 10000
+
+Atendimentos referenciam o cliente pela coluna 'cliente_cpf' (ou
+'cliente_id'). Como a carga usa bulk_create/COPY, sem signals, o resumo
+diário e os caches são atualizados ao final. Com caches no backend 'local'
+(um único processo, ver cache.py) a invalidação só vale para este comando:
+os workers continuam com a versão deles até o TIMEOUT.
+"""
+import sys
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app_shivazen.catalogo import invalidar_catalogo
+from app_shivazen.dashboard import invalidar_dashboard
+from app_shivazen.disponibilidade import invalidar_profissional
+from app_shivazen.estatisticas import recalcular
+from app_shivazen.importacao_exportacao import TIPOS, ErroImportacao, importar, ler_registros
+
+
+class Command(BaseCommand):
+    help = 'Importa clientes, atendimentos ou preços de CSV/JSONL em lotes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tipo', choices=sorted(TIPOS))
+        parser.add_argument('arquivo', help="Caminho do arquivo ('-' para a entrada padrão).")
+        parser.add_argument('--formato', choices=['csv', 'jsonl'],
+                            help='Padrão: deduzido pela extensão do arquivo.')
+        parser.add_argument('--lote', type=int, default=5000, help='Registros por transação (padrão: 5000).')
+        parser.add_argument('--ao-conflitar', choices=['ignorar', 'atualizar'], default='ignorar',
+                            help='O que fazer com registros já cadastrados: clientes pelo CPF, preços por '
+                                 'procedimento e profissional (padrão: ignorar).')
+        parser.add_argument('--sem-copy', action='store_true',
+                            help='No PostgreSQL, usa bulk_create em vez de COPY.')
+
+    def handle(self, *args, **options):
+        formato = options['formato'] or ('jsonl' if options['arquivo'].endswith(('.jsonl', '.json')) else 'csv')
+        usar_copy = False if options['sem_copy'] else None
+
+        try:
+            if options['arquivo'] == '-':
+                resumo = self._importar(options, ler_registros(sys.stdin, formato), usar_copy)
+            else:
+                with open(options['arquivo'], newline='', encoding='utf-8') as entrada:
+                    resumo = self._importar(options, ler_registros(entrada, formato), usar_copy)
+        except ErroImportacao as e:
+            raise CommandError(str(e))
+
+        if options['tipo'] == 'atendimentos' and resumo['primeira_data']:
+            # bulk_create/COPY não disparam signals: resumo e caches à mão
+            for inicio in range(0, (resumo['ultima_data'] - resumo['primeira_data']).days + 1, 30):
+                data_inicio = resumo['primeira_data'] + timedelta(days=inicio)
+                recalcular(data_inicio, min(data_inicio + timedelta(days=29), resumo['ultima_data']))
+            invalidar_profissional(None)
+        if options['tipo'] == 'precos':
+            # Catálogo, páginas abertas e mapa de procedimentos mostram os preços
+            invalidar_catalogo()
+        invalidar_dashboard()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{resumo['lidos']} registros lidos, {resumo['inseridos']} inseridos e "
+            f"{resumo['atualizados']} atualizados em {options['tipo']}."
+        ))
+
+    def _importar(self, options, registros, usar_copy):
+        return importar(
+            options['tipo'], registros,
+            tamanho_lote=options['lote'], ao_conflitar=options['ao_conflitar'], usar_copy=usar_copy,
+        )
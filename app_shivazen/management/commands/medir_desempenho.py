@@ -0,0 +1,94 @@
+# app_shivazen/management/commands/medir_desempenho.py
+"""
+Benchmarks reproduzíveis do fluxo de agendamento (ver app_shivazen/desempenho.py):
+micro-benchmarks no próprio processo e teste de carga HTTP contra um
+servidor já no ar, com resultado em JSON para comparar commits.
+
+Uso:
+    python manage.py medir_desempenho --semear --profissionais 50 --clientes 5000 --atendimentos 50000
+    python manage.py medir_desempenho --saida antes.json
+    python manage.py runserver --noreload &   # mesmo banco e settings
+    python manage.py medir_desempenho --carga http://127.0.0.1:8000 --concorrencia 20 --duracao 30
+    python manage.py medir_desempenho --saida depois.json --comparar antes.json
+
+O cenário agendaCadastro grava atendimentos e --semear insere dados
+sintéticos: use um banco de teste (SQLite ou PostgreSQL local), nunca o de
+produção.
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from app_shivazen import desempenho
+from app_shivazen.dados_sinteticos import semear
+
+
+class Command(BaseCommand):
+    help = 'Mede o desempenho do agendamento e do dashboard e grava o resultado em JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--semear', action='store_true',
+                            help='Insere dados sintéticos antes de medir.')
+        parser.add_argument('--profissionais', type=int, default=50,
+                            help='Profissionais sintéticos, com --semear (padrão: 50).')
+        parser.add_argument('--clientes', type=int, default=5000,
+                            help='Clientes sintéticos, com --semear (padrão: 5000).')
+        parser.add_argument('--atendimentos', type=int, default=50000,
+                            help='Atendimentos sintéticos, com --semear (padrão: 50000).')
+        parser.add_argument('--repeticoes', type=int, default=200,
+                            help='Repetições de cada micro-benchmark (padrão: 200).')
+        parser.add_argument('--carga', metavar='URL',
+                            help='Roda o teste de carga contra este servidor em vez dos micro-benchmarks.')
+        parser.add_argument('--cenario', action='append', choices=desempenho.CENARIOS,
+                            help='Cenário do teste de carga (repetível; padrão: todos).')
+        parser.add_argument('--concorrencia', type=int, default=10,
+                            help='Conexões simultâneas no teste de carga (padrão: 10).')
+        parser.add_argument('--duracao', type=float, default=10.0,
+                            help='Segundos por cenário no teste de carga (padrão: 10).')
+        parser.add_argument('--semente', type=int, default=42,
+                            help='Semente dos sorteios, para execuções comparáveis (padrão: 42).')
+        parser.add_argument('--saida', help='Arquivo JSON de resultado (padrão: saída padrão).')
+        parser.add_argument('--comparar', metavar='ARQUIVO',
+                            help='JSON de uma execução anterior; mostra a variação de cada métrica.')
+
+    def handle(self, *args, **options):
+        if options['semear']:
+            try:
+                quantidades = semear(
+                    profissionais=options['profissionais'], clientes=options['clientes'],
+                    atendimentos=options['atendimentos'], procedimentos=30, semente=options['semente'],
+                )
+            except IntegrityError:
+                raise CommandError(
+                    f'Já há dados semeados com a semente {options["semente"]} neste banco: '
+                    f'meça sem --semear ou use outra --semente.'
+                )
+            self.stderr.write(f'Dados sintéticos: {quantidades}')
+
+        resultado = desempenho.contexto()
+        try:
+            if options['carga']:
+                resultado['carga'] = desempenho.teste_de_carga(
+                    options['carga'], options['cenario'], options['concorrencia'],
+                    options['duracao'], options['semente'],
+                )
+            else:
+                resultado['micro'] = desempenho.micro_benchmarks(options['repeticoes'], options['semente'])
+        except (ValueError, OSError) as e:
+            raise CommandError(str(e))
+
+        conteudo = json.dumps(resultado, indent=2, ensure_ascii=False)
+        if options['saida']:
+            with open(options['saida'], 'w', encoding='utf-8') as arquivo:
+                arquivo.write(conteudo + '\n')
+            self.stderr.write(f'Resultado gravado em {options["saida"]}.')
+        else:
+            self.stdout.write(conteudo)
+
+        if options['comparar']:
+            with open(options['comparar'], encoding='utf-8') as arquivo:
+                anterior = json.load(arquivo)
+            self.stderr.write(f'Comparação com {anterior.get("commit") or options["comparar"]}:')
+            for metrica, antes, depois, variacao in desempenho.comparar(anterior, resultado):
+                self.stderr.write(f'  {metrica}: {antes} -> {depois} ({variacao:+.1f}%)')
@@ -0,0 +1,47 @@
+# app_shivazen/management/commands/podar_auditoria.py
+"""
+Manutenção do log de auditoria: cria as partições mensais dos próximos
+meses (PostgreSQL) e remove os meses além da retenção. No PostgreSQL cada
+mês antigo é uma partição descartada de uma vez; nos outros bancos as
+linhas são apagadas em lotes.
+
+Uso (ex: diariamente pelo cron):
+    python manage.py podar_auditoria
+    python manage.py podar_auditoria --meses 12 --arquivar /backup/auditoria
+"""
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app_shivazen.auditoria import configuracao, criar_particoes, podar
+
+
+class Command(BaseCommand):
+    help = 'Cria partições futuras e remove (ou arquiva) os meses antigos do log de auditoria.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--meses', type=int, default=None,
+                            help='Meses mantidos além do atual (padrão: SHIVAZEN_AUDITORIA["RETENCAO_MESES"]).')
+        parser.add_argument('--arquivar', metavar='PASTA',
+                            help='Grava cada mês removido em PASTA/log_auditoria_AAAA_MM.jsonl.gz antes.')
+        parser.add_argument('--meses-a-frente', type=int, default=3,
+                            help='Partições futuras garantidas (padrão: 3).')
+
+    def handle(self, *args, **options):
+        meses = options['meses'] if options['meses'] is not None else configuracao()['RETENCAO_MESES']
+        if meses < 0:
+            raise CommandError('--meses não pode ser negativo.')
+        pasta = options['arquivar']
+        if pasta and not os.path.isdir(pasta):
+            raise CommandError(f'Pasta de arquivo inexistente: {pasta}')
+
+        for nome in criar_particoes(options['meses_a_frente']):
+            self.stdout.write(f'Partição criada: {nome}')
+
+        removidos = podar(meses, pasta)
+        for ano, mes, quantidade in removidos:
+            detalhe = 'partição descartada' if quantidade is None else f'{quantidade} evento(s)'
+            self.stdout.write(f'{mes:02d}/{ano}: {detalhe}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(removidos)} mês(es) removido(s); retenção de {meses} mês(es).'
+        ))
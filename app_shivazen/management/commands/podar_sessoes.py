@@ -0,0 +1,49 @@
+# app_shivazen/management/commands/podar_sessoes.py
+"""
+Apaga as sessões expiradas da tabela django_session em lotes pequenos,
+cada um em sua própria transação, para não travar a tabela nem gerar um
+DELETE gigante como o 'clearsessions' faria em uma tabela acumulada.
+
+Uso (ex: de hora em hora pelo cron):
+    python manage.py podar_sessoes
+    python manage.py podar_sessoes --lote 2000 --pausa 0.1
+"""
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = 'Remove em lotes as sessões expiradas do banco.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=5000,
+                            help='Sessões apagadas por transação (padrão: 5000).')
+        parser.add_argument('--pausa', type=float, default=0.0,
+                            help='Segundos de espera entre lotes (padrão: 0).')
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError('--lote deve ser positivo.')
+        if settings.SESSION_ENGINE.endswith('signed_cookies'):
+            # Ainda assim limpa o que sobrou de quando as sessões ficavam no banco
+            self.stdout.write('Sessões em cookie assinado: só restos antigos no banco serão removidos.')
+
+        agora = timezone.now()
+        total = 0
+        while True:
+            # expire_date é indexado: cada lote é uma leitura por faixa
+            chaves = list(Session.objects.filter(expire_date__lt=agora).values_list(
+                'session_key', flat=True,
+            )[:options['lote']])
+            if not chaves:
+                break
+            total += Session.objects.filter(session_key__in=chaves).delete()[0]
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{total} sessões removidas...')
+            if options['pausa']:
+                time.sleep(options['pausa'])
+        self.stdout.write(self.style.SUCCESS(f'{total} sessões expiradas removidas.'))
@@ -0,0 +1,56 @@
+# app_shivazen/management/commands/recalcular_estatisticas.py
+"""
+Preenche ou reconstrói a tabela de resumo EstatisticaDiaria a partir dos
+atendimentos, em lotes de dias (cada lote em sua própria transação).
+
+Uso:
+    python manage.py recalcular_estatisticas
+    python manage.py recalcular_estatisticas --desde 2024-01-01 --ate 2024-12-31 --dias-por-lote 7
+"""
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from app_shivazen.estatisticas import recalcular
+from app_shivazen.models import Atendimento
+
+
+def _data(valor):
+    try:
+        return datetime.strptime(valor, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f'Data inválida: {valor} (use AAAA-MM-DD)')
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói o resumo diário de atendimentos (EstatisticaDiaria) em lotes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=_data, help='Primeira data (padrão: atendimento mais antigo).')
+        parser.add_argument('--ate', type=_data, help='Última data (padrão: atendimento mais recente).')
+        parser.add_argument('--dias-por-lote', type=int, default=30,
+                            help='Quantidade de dias reconstruídos por transação (padrão: 30).')
+
+    def handle(self, *args, **options):
+        limites = Atendimento.objects.aggregate(primeiro=Min('data_hora_inicio'), ultimo=Max('data_hora_inicio'))
+        if limites['primeiro'] is None and not (options['desde'] and options['ate']):
+            self.stdout.write('Nenhum atendimento cadastrado.')
+            return
+
+        desde = options['desde'] or timezone.localdate(limites['primeiro'])
+        ate = options['ate'] or timezone.localdate(limites['ultimo'])
+        passo = max(options['dias_por_lote'], 1)
+
+        total = 0
+        inicio_lote = desde
+        while inicio_lote <= ate:
+            fim_lote = min(inicio_lote + timedelta(days=passo - 1), ate)
+            linhas = recalcular(inicio_lote, fim_lote)
+            total += linhas
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{inicio_lote} a {fim_lote}: {linhas} linhas')
+            inicio_lote = fim_lote + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(f'Resumo reconstruído de {desde} a {ate}: {total} linhas.'))
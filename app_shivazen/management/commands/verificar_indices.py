@@ -0,0 +1,126 @@
+# app_shivazen/management/commands/verificar_indices.py
+"""
+Roda EXPLAIN nas consultas críticas da agenda e falha se alguma delas
+fizer leitura sequencial (Seq Scan) das tabelas grandes.
+
+Uso:
+    python manage.py verificar_indices                # semeia dados e desfaz no final
+    python manage.py verificar_indices --sem-semear   # usa os dados existentes
+"""
+import re
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from app_shivazen.dados_sinteticos import semear
+from app_shivazen.models import STATUS_ATIVOS, Atendimento, BloqueioAgenda, Cliente, Profissional
+
+TABELAS_VERIFICADAS = ('atendimento', 'bloqueio_agenda')
+
+
+class _Desfazer(Exception):
+    """Usada para desfazer a transação com os dados semeados."""
+
+
+def consultas_canonicas(id_profissional, id_cliente, data):
+    """
+    As mesmas consultas feitas por views.py, models.py e disponibilidade.py,
+    com valores de exemplo.
+    """
+    inicio_dia = timezone.make_aware(datetime.combine(data, time.min))
+    return [
+        ('disponibilidade: agendamentos do dia', Atendimento.objects.filter(
+            profissional_id=id_profissional,
+        ).ativos().sobrepondo_dia(data).values_list('data_hora_inicio', 'data_hora_fim')),
+        ('disponibilidade: bloqueios do dia', BloqueioAgenda.objects.para_profissionais(
+            [id_profissional],
+        ).sobrepondo_dia(data).values_list('data_hora_inicio', 'data_hora_fim')),
+        ('agendaCadastro: conflito de horário', Atendimento.objects.filter(
+            profissional_id=id_profissional,
+            data_hora_inicio__lt=inicio_dia + timedelta(hours=11),
+            data_hora_fim__gt=inicio_dia + timedelta(hours=10),
+            status_atendimento__in=STATUS_ATIVOS,
+        )),
+        ('painel: histórico do cliente', Atendimento.objects.filter(
+            cliente_id=id_cliente,
+        ).order_by('-data_hora_inicio')[:10]),
+        ('painel: próximos do cliente', Atendimento.objects.filter(
+            cliente_id=id_cliente,
+            data_hora_inicio__gte=inicio_dia,
+            status_atendimento__in=STATUS_ATIVOS,
+        ).order_by('data_hora_inicio')[:5]),
+        ('dashboard: pendentes', Atendimento.objects.filter(status_atendimento='AGENDADO')),
+        ('dashboard: agendamentos do dia', Atendimento.objects.no_dia(data)),
+        ('dashboard: agendamentos do mês', Atendimento.objects.no_mes(data.year, data.month)),
+        ('adminAgendamentos: filtro por dia', Atendimento.objects.no_dia(data).order_by('-data_hora_inicio')),
+    ]
+
+
+def leitura_sequencial(plano):
+    """Indica se o plano lê alguma das tabelas verificadas por inteiro."""
+    for tabela in TABELAS_VERIFICADAS:
+        if connection.vendor == 'postgresql':
+            if re.search(rf'Seq Scan on {tabela}\b', plano):
+                return True
+        elif re.search(rf'\bSCAN {tabela}\b(?! USING)', plano):
+            return True
+    return False
+
+
+class Command(BaseCommand):
+    help = 'Verifica, via EXPLAIN, se as consultas da agenda usam os índices.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sem-semear', action='store_true',
+                            help='Não cria dados sintéticos; usa os dados atuais do banco.')
+        parser.add_argument('--atendimentos', type=int, default=50000,
+                            help='Quantidade de atendimentos sintéticos (padrão: 50000).')
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        falhas = []
+        try:
+            with transaction.atomic():
+                if not options['sem_semear']:
+                    quantidades = semear(
+                        profissionais=50, clientes=5000, atendimentos=options['atendimentos']
+                    )
+                    self.stdout.write(f'Dados sintéticos: {quantidades}')
+                self._analisar_tabelas()
+                falhas = self._verificar()
+                raise _Desfazer
+        except _Desfazer:
+            pass
+
+        if falhas:
+            raise CommandError(f'Consultas com leitura sequencial: {", ".join(falhas)}')
+        self.stdout.write(self.style.SUCCESS('Todas as consultas usam índices.'))
+
+    def _analisar_tabelas(self):
+        # Atualiza as estatísticas para o planejador enxergar o volume real
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                for tabela in TABELAS_VERIFICADAS:
+                    cursor.execute(f'ANALYZE {tabela}')
+            else:
+                cursor.execute('ANALYZE')
+
+    def _verificar(self):
+        id_profissional = Profissional.objects.values_list('pk', flat=True).first()
+        id_cliente = Cliente.objects.values_list('pk', flat=True).first()
+        if id_profissional is None or id_cliente is None:
+            raise CommandError('Banco sem profissionais/clientes; rode sem --sem-semear.')
+
+        falhas = []
+        for nome, consulta in consultas_canonicas(id_profissional, id_cliente, timezone.localdate()):
+            plano = consulta.explain()
+            if leitura_sequencial(plano):
+                falhas.append(nome)
+                self.stdout.write(self.style.ERROR(f'[SEQ SCAN] {nome}\n{plano}'))
+            else:
+                self.stdout.write(f'[OK] {nome}')
+                if self.verbosity > 1:
+                    self.stdout.write(plano)
+        return falhas
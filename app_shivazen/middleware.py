@@ -0,0 +1,206 @@
+# app_shivazen/middleware.py
+"""
+Middlewares da aplicação.
+
+OrcamentoConsultasMiddleware:
+
+Conta as consultas SQL e o tempo gasto no banco em cada requisição, avisa
+quando uma view passa do orçamento configurado e, se pedido, expõe os
+números no cabeçalho Server-Timing (visível na aba Network do navegador):
+
+    SHIVAZEN_ORCAMENTO_CONSULTAS = {
+        'LIMITE': 50,           # consultas por requisição (None desliga)
+        'ACAO': 'log',          # 'log' registra um aviso; 'erro' levanta exceção
+        'SERVER_TIMING': False, # cabeçalho em toda resposta; só para desenvolvimento
+    }
+
+Uma view pode ter orçamento próprio com o decorator @orcamento_consultas(n).
+
+AuditoriaMiddleware: informa à auditoria o usuário da requisição e grava os
+eventos acumulados em um único INSERT no fim (ver auditoria.py).
+
+ClienteMiddleware: define request.cliente, carregado sob demanda (ver
+permissoes.py).
+
+ArquivosEstaticosMiddleware: o WhiteNoiseMiddleware, que só é síncrono,
+com um caminho assíncrono.
+
+Todos atendem requisições síncronas e assíncronas. Sob ASGI, um único
+middleware só síncrono na pilha faria o Django adaptar as camadas e
+rodar as views assíncronas em uma thread, perdendo o ganho do ASGI.
+"""
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from django.conf import settings
+from django.db import connections
+
+from .auditoria import buffer as buffer_auditoria, requisicao_atual
+from .permissoes import cliente_preguicoso
+
+logger = logging.getLogger('app_shivazen.consultas')
+
+CONFIGURACAO_PADRAO = {'LIMITE': 50, 'ACAO': 'log', 'SERVER_TIMING': False}
+
+
+class OrcamentoConsultasExcedido(Exception):
+    """A view fez mais consultas do que o orçamento permite."""
+
+
+def orcamento_consultas(limite):
+    """Define o orçamento de consultas de uma view específica."""
+    def decorator(view):
+        # Só marca a função: funciona igual para views síncronas e assíncronas
+        view.orcamento_consultas = limite
+        return view
+    return decorator
+
+
+class ContadorConsultas:
+    """execute_wrapper que soma a quantidade e a duração das consultas."""
+
+    def __init__(self):
+        self.quantidade = 0
+        self.duracao = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duracao += time.perf_counter() - inicio
+            self.quantidade += 1
+
+
+class MiddlewareSincronoEAssincrono:
+    """Base dos middlewares que atendem nos dois modos (__call__ e __acall__)."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+        return self.processar(request)
+
+
+def _contar_consultas(pilha, contador):
+    for conexao in connections.all():
+        pilha.enter_context(conexao.execute_wrapper(contador))
+
+
+class OrcamentoConsultasMiddleware(MiddlewareSincronoEAssincrono):
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        configuracao = {**CONFIGURACAO_PADRAO, **getattr(settings, 'SHIVAZEN_ORCAMENTO_CONSULTAS', {})}
+        self.limite = configuracao['LIMITE']
+        self.acao = configuracao['ACAO']
+        self.server_timing = configuracao['SERVER_TIMING']
+
+    def processar(self, request):
+        contador = ContadorConsultas()
+        inicio = time.perf_counter()
+        with ExitStack() as pilha:
+            _contar_consultas(pilha, contador)
+            response = self.get_response(request)
+        return self._avaliar(request, response, contador, time.perf_counter() - inicio)
+
+    async def __acall__(self, request):
+        contador = ContadorConsultas()
+        inicio = time.perf_counter()
+        # As conexões são por thread: o contador vai nas da thread onde o ORM
+        # roda as consultas desta requisição, não nas do event loop
+        pilha = ExitStack()
+        await sync_to_async(_contar_consultas)(pilha, contador)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(pilha.close)()
+        return self._avaliar(request, response, contador, time.perf_counter() - inicio)
+
+    def _avaliar(self, request, response, contador, total):
+        if self.server_timing:
+            response.headers['Server-Timing'] = ', '.join([
+                f'db;dur={contador.duracao * 1000:.1f};desc="{contador.quantidade} consultas"',
+                f'app;dur={total * 1000:.1f}',
+            ])
+
+        limite = getattr(request, '_orcamento_consultas', self.limite)
+        if limite is not None and contador.quantidade > limite:
+            mensagem = (
+                f'{request.method} {request.path} fez {contador.quantidade} consultas '
+                f'({contador.duracao * 1000:.0f} ms); orçamento: {limite}'
+            )
+            if self.acao == 'erro':
+                raise OrcamentoConsultasExcedido(mensagem)
+            logger.warning(mensagem)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        limite = getattr(view_func, 'orcamento_consultas', None)
+        if limite is not None:
+            request._orcamento_consultas = limite
+
+
+class AuditoriaMiddleware(MiddlewareSincronoEAssincrono):
+    def processar(self, request):
+        token = requisicao_atual.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            requisicao_atual.reset(token)
+            buffer_auditoria.descarregar()
+
+    async def __acall__(self, request):
+        token = requisicao_atual.set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            requisicao_atual.reset(token)
+            # Buffer vazio (o caso comum) não custa uma ida à thread do ORM
+            if len(buffer_auditoria):
+                await sync_to_async(buffer_auditoria.descarregar)()
+
+
+class ClienteMiddleware(MiddlewareSincronoEAssincrono):
+    def processar(self, request):
+        request.cliente = cliente_preguicoso(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        request.cliente = cliente_preguicoso(request)
+        return await self.get_response(request)
+
+
+class ArquivosEstaticosMiddleware(WhiteNoiseMiddleware):
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            arquivo = await sync_to_async(self.find_file, thread_sensitive=False)(request.path_info)
+        else:
+            arquivo = self.files.get(request.path_info)
+        if arquivo is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(arquivo, request)
+        return await self.get_response(request)
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_shivazen', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='atendimento',
+            index=models.Index(fields=['profissional', 'data_hora_inicio', 'status_atendimento'], name='atend_prof_inicio_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='atendimento',
+            index=models.Index(fields=['cliente', 'data_hora_inicio'], name='atend_cliente_inicio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='atendimento',
+            index=models.Index(fields=['status_atendimento'], name='atend_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='atendimento',
+            index=models.Index(fields=['data_hora_inicio'], name='atend_inicio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='atendimento',
+            index=models.Index(condition=models.Q(('status_atendimento__in', ['AGENDADO', 'CONFIRMADO'])), fields=['profissional', 'data_hora_inicio', 'data_hora_fim'], name='atend_ativos_prof_periodo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bloqueioagenda',
+            index=models.Index(fields=['profissional', 'data_hora_inicio', 'data_hora_fim'], name='bloqueio_prof_periodo_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_shivazen', '0002_indices_agenda'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstatisticaDiaria',
+            fields=[
+                ('id_estatistica', models.AutoField(primary_key=True, serialize=False)),
+                ('data', models.DateField()),
+                ('status_atendimento', models.CharField(max_length=20)),
+                ('quantidade', models.IntegerField(default=0)),
+                ('valor_total', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('procedimento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='app_shivazen.procedimento')),
+                ('profissional', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='app_shivazen.profissional')),
+            ],
+            options={
+                'db_table': 'estatistica_diaria',
+                'unique_together': {('data', 'profissional', 'procedimento', 'status_atendimento')},
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+from django.db import migrations
+
+# Mesmos status de models.STATUS_ATIVOS
+STATUS_ATIVOS_SQL = "('AGENDADO', 'CONFIRMADO')"
+
+POSTGRESQL_CRIAR = [
+    'CREATE EXTENSION IF NOT EXISTS btree_gist',
+    f"""
+    ALTER TABLE atendimento ADD CONSTRAINT atendimento_sem_sobreposicao
+    EXCLUDE USING gist (
+        profissional_id WITH =,
+        tstzrange(data_hora_inicio, data_hora_fim, '[)') WITH &&
+    ) WHERE (status_atendimento IN {STATUS_ATIVOS_SQL})
+    """,
+]
+POSTGRESQL_REMOVER = [
+    'ALTER TABLE atendimento DROP CONSTRAINT IF EXISTS atendimento_sem_sobreposicao',
+]
+
+# SQLite não tem restrições de exclusão: triggers rejeitam a sobreposição
+def _sqlite_trigger(evento, filtro_proprio):
+    return f"""
+    CREATE TRIGGER atendimento_sem_sobreposicao_{evento.lower()}
+    BEFORE {evento} ON atendimento
+    WHEN NEW.status_atendimento IN {STATUS_ATIVOS_SQL} AND EXISTS (
+        SELECT 1 FROM atendimento
+        WHERE profissional_id = NEW.profissional_id
+          {filtro_proprio}
+          AND status_atendimento IN {STATUS_ATIVOS_SQL}
+          AND data_hora_inicio < NEW.data_hora_fim
+          AND data_hora_fim > NEW.data_hora_inicio
+    )
+    BEGIN SELECT RAISE(ABORT, 'atendimento_sem_sobreposicao'); END
+    """
+
+
+SQLITE_CRIAR = [
+    _sqlite_trigger('INSERT', ''),
+    _sqlite_trigger('UPDATE', 'AND id_atendimento <> NEW.id_atendimento'),
+]
+SQLITE_REMOVER = [
+    'DROP TRIGGER IF EXISTS atendimento_sem_sobreposicao_insert',
+    'DROP TRIGGER IF EXISTS atendimento_sem_sobreposicao_update',
+]
+
+
+def _executar(comandos_por_banco):
+    def executar(apps, schema_editor):
+        for sql in comandos_por_banco.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return executar
+
+
+class Migration(migrations.Migration):
+    """
+    Impede, no próprio banco, dois atendimentos ativos sobrepostos para o
+    mesmo profissional. No PostgreSQL a migração falha se já houver
+    sobreposições: corrija-as (ex: cancelando duplicatas) antes de aplicar.
+    """
+
+    dependencies = [
+        ('app_shivazen', '0003_estatistica_diaria'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _executar({'postgresql': POSTGRESQL_CRIAR, 'sqlite': SQLITE_CRIAR}),
+            _executar({'postgresql': POSTGRESQL_REMOVER, 'sqlite': SQLITE_REMOVER}),
+        ),
+    ]
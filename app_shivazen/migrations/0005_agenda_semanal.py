@@ -0,0 +1,75 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:55
+
+import django.db.models.deletion
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+# Cópia de disponibilidade.compilar_agenda_semanal no formato desta
+# migração: a função da aplicação pode mudar depois sem mudar o que a
+# migração grava.
+def compilar_agenda_semanal(expedientes):
+    turnos_por_dia = [[] for _ in range(7)]
+    for dia_semana, hora_inicio, hora_fim in expedientes:
+        # dia_semana: 1=Dom, 2=Seg, ..., 7=Sáb; posição: 0=Seg ... 6=Dom
+        turnos_por_dia[(dia_semana + 5) % 7].append((
+            hora_inicio.hour * 60 + hora_inicio.minute, hora_fim.hour * 60 + hora_fim.minute,
+        ))
+    agenda = []
+    for turnos in turnos_por_dia:
+        mesclados = []
+        for inicio, fim in sorted(t for t in turnos if t[0] < t[1]):
+            if mesclados and inicio <= mesclados[-1][1]:
+                mesclados[-1][1] = max(mesclados[-1][1], fim)
+            else:
+                mesclados.append([inicio, fim])
+        agenda.append(mesclados)
+    return agenda
+
+
+def compilar_agendas(apps, schema_editor):
+    Profissional = apps.get_model('app_shivazen', 'Profissional')
+    DisponibilidadeProfissional = apps.get_model('app_shivazen', 'DisponibilidadeProfissional')
+    expedientes = defaultdict(list)
+    for id_prof, dia_semana, hora_inicio, hora_fim in DisponibilidadeProfissional.objects.values_list(
+        'profissional_id', 'dia_semana', 'hora_inicio', 'hora_fim'
+    ):
+        expedientes[id_prof].append((dia_semana, hora_inicio, hora_fim))
+    profissionais = list(Profissional.objects.only('pk'))
+    for profissional in profissionais:
+        profissional.agenda_semanal = compilar_agenda_semanal(expedientes[profissional.pk])
+    Profissional.objects.bulk_update(profissionais, ['agenda_semanal'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_shivazen', '0004_atendimento_sem_sobreposicao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profissional',
+            name='agenda_semanal',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='ExcecaoDisponibilidade',
+            fields=[
+                ('id_excecao', models.AutoField(primary_key=True, serialize=False)),
+                ('data', models.DateField()),
+                ('tipo', models.CharField(choices=[('FOLGA', 'Folga'), ('EXTRA', 'Turno extra')], default='FOLGA', max_length=10)),
+                ('hora_inicio', models.TimeField(blank=True, null=True)),
+                ('hora_fim', models.TimeField(blank=True, null=True)),
+                ('motivo', models.CharField(blank=True, max_length=255, null=True)),
+                ('profissional', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='app_shivazen.profissional')),
+            ],
+            options={
+                'db_table': 'excecao_disponibilidade',
+                'indexes': [models.Index(fields=['data', 'profissional'], name='excecao_data_prof_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(models.Q(('tipo', 'EXTRA'), _negated=True), models.Q(('hora_fim__isnull', False), ('hora_inicio__isnull', False)), _connector='OR'), name='excecao_extra_com_horario')],
+            },
+        ),
+        migrations.RunPython(compilar_agendas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_shivazen', '0005_agenda_semanal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BloqueioRecorrente',
+            fields=[
+                ('id_bloqueio_recorrente', models.AutoField(primary_key=True, serialize=False)),
+                ('frequencia', models.CharField(choices=[('DIARIA', 'Diária'), ('SEMANAL', 'Semanal')], default='SEMANAL', max_length=10)),
+                ('intervalo', models.PositiveSmallIntegerField(default=1, help_text='A cada quantos dias/semanas.')),
+                ('dias_semana', models.CharField(blank=True, default='', help_text='Regras semanais: dias separados por vírgula (1=Dom, 2=Seg, ..., 7=Sáb).', max_length=20)),
+                ('hora_inicio', models.TimeField()),
+                ('hora_fim', models.TimeField()),
+                ('data_inicio', models.DateField()),
+                ('data_fim', models.DateField(blank=True, help_text='Último dia da regra (vazio = sem fim).', null=True)),
+                ('motivo', models.CharField(blank=True, max_length=255, null=True)),
+                ('profissional', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='app_shivazen.profissional')),
+            ],
+            options={
+                'db_table': 'bloqueio_recorrente',
+                'indexes': [models.Index(fields=['profissional', 'data_inicio'], name='bloq_recorrente_prof_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(('hora_fim__gt', models.F('hora_inicio'))), name='bloq_recorrente_horario'), models.CheckConstraint(condition=models.Q(('intervalo__gte', 1)), name='bloq_recorrente_intervalo')],
+            },
+        ),
+    ]
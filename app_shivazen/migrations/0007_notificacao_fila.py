@@ -0,0 +1,38 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:59
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_shivazen', '0006_bloqueio_recorrente'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificacao',
+            name='proxima_tentativa',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='notificacao',
+            name='tentativas',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='notificacao',
+            name='tipo',
+            field=models.CharField(default='CONFIRMACAO', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='notificacao',
+            name='ultimo_erro',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='notificacao',
+            index=models.Index(fields=['status_envio', 'proxima_tentativa'], name='notificacao_fila_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_shivazen', '0007_notificacao_fila'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarcaProcessamento',
+            fields=[
+                ('nome', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('valor', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'marca_processamento',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='notificacao',
+            constraint=models.UniqueConstraint(fields=('atendimento', 'canal', 'tipo'), name='notificacao_unica'),
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:02
+
+from datetime import datetime
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils import timezone
+
+# Partições mensais criadas além do mês atual; as seguintes ficam com o
+# comando podar_auditoria (auditoria.criar_particoes)
+MESES_A_FRENTE = 3
+
+
+def _inicio_do_mes(ano, mes):
+    ano, mes = ano + (mes - 1) // 12, (mes - 1) % 12 + 1
+    return timezone.make_aware(datetime(ano, mes, 1))
+
+
+def particionar(apps, schema_editor):
+    """
+    PostgreSQL: recria log_auditoria particionada por mês de data_hora,
+    copiando as linhas existentes. A chave primária passa a ser
+    (id_log, data_hora), exigência do particionamento; para o Django id_log
+    continua sendo a pk. Uma partição padrão recebe o que cair fora das
+    partições mensais.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    executar = schema_editor.execute
+    executar("""
+        CREATE TABLE log_auditoria_nova (
+            id_log integer GENERATED BY DEFAULT AS IDENTITY,
+            usuario_id bigint NULL REFERENCES usuario (id) DEFERRABLE INITIALLY DEFERRED,
+            acao varchar(255) NOT NULL,
+            tabela_afetada varchar(100) NULL,
+            id_registro_afetado integer NULL,
+            detalhes jsonb NULL,
+            data_hora timestamp with time zone NOT NULL,
+            PRIMARY KEY (id_log, data_hora)
+        ) PARTITION BY RANGE (data_hora)
+    """)
+    executar('CREATE TABLE log_auditoria_padrao PARTITION OF log_auditoria_nova DEFAULT')
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('SELECT min(data_hora) FROM log_auditoria')
+        primeiro = cursor.fetchone()[0]
+    hoje = timezone.localdate()
+    ano, mes = hoje.year, hoje.month
+    if primeiro is not None:
+        primeiro = timezone.localtime(primeiro)
+        ano, mes = min((primeiro.year, primeiro.month), (ano, mes))
+    while _inicio_do_mes(ano, mes) <= _inicio_do_mes(hoje.year, hoje.month + MESES_A_FRENTE):
+        executar(
+            f'CREATE TABLE log_auditoria_p{ano:04d}_{mes:02d} PARTITION OF log_auditoria_nova '
+            f"FOR VALUES FROM ('{_inicio_do_mes(ano, mes).isoformat()}') "
+            f"TO ('{_inicio_do_mes(ano, mes + 1).isoformat()}')"
+        )
+        ano, mes = (ano + 1, 1) if mes == 12 else (ano, mes + 1)
+
+    executar(
+        'INSERT INTO log_auditoria_nova '
+        '(id_log, usuario_id, acao, tabela_afetada, id_registro_afetado, detalhes, data_hora) '
+        'SELECT id_log, usuario_id, acao, tabela_afetada, id_registro_afetado, detalhes, data_hora '
+        'FROM log_auditoria'
+    )
+    executar(
+        "SELECT setval(pg_get_serial_sequence('log_auditoria_nova', 'id_log'), "
+        'COALESCE((SELECT max(id_log) FROM log_auditoria_nova), 0) + 1, false)'
+    )
+    # Remove a tabela antiga (e os índices dela) e assume o nome
+    executar('DROP TABLE log_auditoria')
+    executar('ALTER TABLE log_auditoria_nova RENAME TO log_auditoria')
+    executar('CREATE INDEX log_auditoria_data_idx ON log_auditoria (data_hora)')
+    executar('CREATE INDEX log_auditoria_usuario_id_idx ON log_auditoria (usuario_id)')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_shivazen', '0008_lembretes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='logauditoria',
+            name='data_hora',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='logauditoria',
+            index=models.Index(fields=['data_hora'], name='log_auditoria_data_idx'),
+        ),
+        # Desfazer mantém a tabela particionada, que funciona igual para o Django
+        migrations.RunPython(particionar, migrations.RunPython.noop),
+    ]
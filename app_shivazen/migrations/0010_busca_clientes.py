@@ -0,0 +1,97 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:04
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+POSTGRESQL_CRIAR = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX cliente_nome_busca_trgm_idx ON cliente USING gin (nome_busca gin_trgm_ops)',
+    'CREATE INDEX cliente_cpf_digitos_trgm_idx ON cliente USING gin (cpf_digitos gin_trgm_ops)',
+    'CREATE INDEX cliente_telefone_digitos_trgm_idx ON cliente USING gin (telefone_digitos gin_trgm_ops)',
+]
+POSTGRESQL_REMOVER = [
+    'DROP INDEX IF EXISTS cliente_nome_busca_trgm_idx',
+    'DROP INDEX IF EXISTS cliente_cpf_digitos_trgm_idx',
+    'DROP INDEX IF EXISTS cliente_telefone_digitos_trgm_idx',
+]
+
+
+def _executar(comandos_por_banco):
+    def executar(apps, schema_editor):
+        for sql in comandos_por_banco.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return executar
+
+
+# Cópias de busca_clientes.normalizar_nome e somente_digitos: a migração
+# grava sempre a normalização desta versão, mesmo que a da aplicação mude.
+def normalizar_nome(texto):
+    if not texto:
+        return ''
+    decomposto = unicodedata.normalize('NFKD', texto)
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return ' '.join(sem_acentos.lower().split())
+
+
+def somente_digitos(texto):
+    return re.sub(r'\D', '', texto or '') or None
+
+
+def preencher_campos_busca(apps, schema_editor):
+    # Mesma normalização de Cliente.atualizar_campos_busca, em lotes
+    Cliente = apps.get_model('app_shivazen', 'Cliente')
+    lote = []
+    for cliente in Cliente.objects.only('nome_completo', 'cpf', 'telefone').iterator(chunk_size=2000):
+        cliente.nome_busca = normalizar_nome(cliente.nome_completo)
+        cliente.cpf_digitos = somente_digitos(cliente.cpf)
+        cliente.telefone_digitos = somente_digitos(cliente.telefone)
+        lote.append(cliente)
+        if len(lote) == 2000:
+            Cliente.objects.bulk_update(lote, ['nome_busca', 'cpf_digitos', 'telefone_digitos'])
+            lote = []
+    Cliente.objects.bulk_update(lote, ['nome_busca', 'cpf_digitos', 'telefone_digitos'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_shivazen', '0009_auditoria_particionada'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='cpf_digitos',
+            field=models.CharField(blank=True, editable=False, max_length=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='nome_busca',
+            field=models.CharField(default='', editable=False, max_length=150),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='telefone_digitos',
+            field=models.CharField(blank=True, editable=False, max_length=20, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['nome_busca'], name='cliente_nome_busca_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['cpf_digitos'], name='cliente_cpf_digitos_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['telefone_digitos'], name='cliente_telefone_digitos_idx'),
+        ),
+        migrations.RunPython(preencher_campos_busca, migrations.RunPython.noop),
+        # Busca por trecho (LIKE '%termo%') no PostgreSQL
+        migrations.RunPython(
+            _executar({'postgresql': POSTGRESQL_CRIAR}),
+            _executar({'postgresql': POSTGRESQL_REMOVER}),
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+# Mesmos nomes de permissoes.py
+FUNCIONALIDADES = {
+    'DASHBOARD': 'Dashboard administrativo',
+    'AGENDAMENTOS': 'Listagem e exportação de agendamentos',
+    'PROCEDIMENTOS': 'Gestão de procedimentos e preços',
+    'BLOQUEIOS': 'Bloqueios de agenda',
+    'PROFISSIONAIS': 'Cadastro de profissionais',
+    'CLIENTES': 'Busca de clientes',
+}
+
+
+def criar_funcionalidades(apps, schema_editor):
+    Funcionalidade = apps.get_model('app_shivazen', 'Funcionalidade')
+    for nome, descricao in FUNCIONALIDADES.items():
+        Funcionalidade.objects.get_or_create(nome=nome, defaults={'descricao': descricao})
+
+
+def remover_funcionalidades(apps, schema_editor):
+    Funcionalidade = apps.get_model('app_shivazen', 'Funcionalidade')
+    Funcionalidade.objects.filter(nome__in=FUNCIONALIDADES).delete()
+
+
+class Migration(migrations.Migration):
+    """Funcionalidades das telas administrativas, para serem ligadas aos perfis no admin."""
+
+    dependencies = [
+        ('app_shivazen', '0010_busca_clientes'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_funcionalidades, remover_funcionalidades),
+    ]
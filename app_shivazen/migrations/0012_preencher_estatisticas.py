@@ -0,0 +1,54 @@
+from django.db import migrations
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+LOTE = 1000
+
+
+def preencher_estatisticas(apps, schema_editor):
+    """
+    Monta estatistica_diaria a partir de todos os atendimentos existentes,
+    como estatisticas.recalcular() faz para um período (lógica copiada: a
+    migração não depende do código atual da aplicação). Sem isso, o
+    dashboard, que só lê o resumo, mostraria zero para todo o histórico
+    anterior à migração 0003.
+    """
+    Atendimento = apps.get_model('app_shivazen', 'Atendimento')
+    EstatisticaDiaria = apps.get_model('app_shivazen', 'EstatisticaDiaria')
+
+    # Linhas já mantidas pelos signals desde a 0003 entram na reconstrução
+    EstatisticaDiaria.objects.all().delete()
+    # TruncDate usa o fuso atual (TIME_ZONE): a data local, como no resumo
+    agrupados = Atendimento.objects.annotate(
+        data=TruncDate('data_hora_inicio'),
+    ).values(
+        'data', 'profissional_id', 'procedimento_id', 'status_atendimento',
+    ).annotate(
+        quantidade=Count('pk'), valor_total=Sum('valor_cobrado'),
+    ).order_by()
+
+    lote = []
+    for item in agrupados.iterator(chunk_size=LOTE):
+        lote.append(EstatisticaDiaria(
+            data=item['data'],
+            profissional_id=item['profissional_id'],
+            procedimento_id=item['procedimento_id'],
+            status_atendimento=item['status_atendimento'],
+            quantidade=item['quantidade'],
+            valor_total=item['valor_total'] or 0,
+        ))
+        if len(lote) == LOTE:
+            EstatisticaDiaria.objects.bulk_create(lote)
+            lote = []
+    EstatisticaDiaria.objects.bulk_create(lote)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_shivazen', '0011_funcionalidades_admin'),
+    ]
+
+    operations = [
+        migrations.RunPython(preencher_estatisticas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:43
+
+import django.core.validators
+from django.db import migrations, models
+
+
+def normalizar_dias_semana(apps, schema_editor):
+    """
+    Deixa só os dias válidos (1 a 7, sem repetição) nas regras já gravadas,
+    para a constraint poder ser criada. Valores como 'seg' ou '8' faziam
+    disponibilidade.expandir_recorrencia levantar ValueError.
+    """
+    BloqueioRecorrente = apps.get_model('app_shivazen', 'BloqueioRecorrente')
+    for regra in BloqueioRecorrente.objects.only('pk', 'dias_semana'):
+        dias = []
+        for dia in (regra.dias_semana or '').split(','):
+            dia = dia.strip()
+            if dia in {'1', '2', '3', '4', '5', '6', '7'} and dia not in dias:
+                dias.append(dia)
+        normalizado = ','.join(dias)
+        if normalizado != regra.dias_semana:
+            BloqueioRecorrente.objects.filter(pk=regra.pk).update(dias_semana=normalizado)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_shivazen', '0012_preencher_estatisticas'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalizar_dias_semana, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='bloqueiorecorrente',
+            name='dias_semana',
+            field=models.CharField(blank=True, default='', help_text='Regras semanais: dias separados por vírgula (1=Dom, 2=Seg, ..., 7=Sáb).', max_length=20, validators=[django.core.validators.RegexValidator('^([1-7](,[1-7])*)?$', 'Informe os dias como números de 1 a 7 separados por vírgula (ex: 2,3,4).')]),
+        ),
+        migrations.AddConstraint(
+            model_name='bloqueiorecorrente',
+            constraint=models.CheckConstraint(condition=models.Q(('dias_semana__regex', '^([1-7](,[1-7])*)?$')), name='bloq_recorrente_dias_semana'),
+        ),
+    ]
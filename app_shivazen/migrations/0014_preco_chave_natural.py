@@ -0,0 +1,42 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:45
+
+from django.db import migrations, models
+
+
+def remover_precos_repetidos(apps, schema_editor):
+    """
+    Deixa um preço por (procedimento, profissional) antes das constraints.
+    Fica o menor valor, que é o que o catálogo já mostrava quando havia
+    mais de um (catalogo.montar_mapa_procedimentos).
+    """
+    Preco = apps.get_model('app_shivazen', 'Preco')
+    mantidos = set()
+    repetidos = []
+    linhas = Preco.objects.order_by('valor', 'pk').values_list('pk', 'procedimento_id', 'profissional_id')
+    for pk, *chave in linhas.iterator():
+        chave = tuple(chave)
+        if chave in mantidos:
+            repetidos.append(pk)
+        else:
+            mantidos.add(chave)
+    for inicio in range(0, len(repetidos), 1000):
+        Preco.objects.filter(pk__in=repetidos[inicio:inicio + 1000]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_shivazen', '0013_validar_dias_semana'),
+    ]
+
+    operations = [
+        migrations.RunPython(remover_precos_repetidos, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='preco',
+            constraint=models.UniqueConstraint(condition=models.Q(('profissional__isnull', False)), fields=('procedimento', 'profissional'), name='preco_procedimento_profissional'),
+        ),
+        migrations.AddConstraint(
+            model_name='preco',
+            constraint=models.UniqueConstraint(condition=models.Q(('profissional__isnull', True)), fields=('procedimento',), name='preco_procedimento_geral'),
+        ),
+    ]
@@ -1,7 +1,15 @@
 # app_shivazen/models.py
 from django.db import models
 from django.contrib.auth.models import AbstractUser
-from datetime import datetime, timedelta # Adicionado para a função de horários
+from django.core.validators import RegexValidator
+from django.utils import timezone
+from datetime import date, time, timedelta
+from .busca_clientes import normalizar_nome, somente_digitos
+from .disponibilidade import calcular_horarios_livres, combinar_local, expandir_recorrencia, janelas_do_dia
+
+# Status possíveis de um atendimento e os que ocupam a agenda do profissional
+STATUS_ATENDIMENTO = ['AGENDADO', 'CONFIRMADO', 'REALIZADO', 'CANCELADO']
+STATUS_ATIVOS = ['AGENDADO', 'CONFIRMADO']
 
 class Funcionalidade(models.Model):
     id_funcionalidade = models.AutoField(primary_key=True)
@@ -33,70 +41,45 @@ class Profissional(models.Model):
     nome = models.CharField(max_length=100)
     especialidade = models.CharField(max_length=100, blank=True, null=True)
     ativo = models.BooleanField(default=True)
+    # Turnos por dia da semana compilados de DisponibilidadeProfissional
+    # (ver disponibilidade.compilar_agenda_semanal); recompilada por signal
+    agenda_semanal = models.JSONField(blank=True, null=True, editable=False)
 
     class Meta:
         db_table = 'profissional'
 
-    def get_horarios_disponiveis(self, data_selecionada):
+    def get_horarios_disponiveis(self, data_selecionada, duracao_minutos=None):
         """
         Retorna uma lista de strings de horários disponíveis (ex: "09:00")
-        para uma data específica.
+        para uma data específica. Se 'duracao_minutos' for informado, só
+        retorna horários em que o procedimento inteiro cabe na agenda.
         """
-        # (1) Converte a data para o dia da semana (1=Dom, 2=Seg, ...)
-        dia_semana = data_selecionada.isoweekday() % 7 + 1 
-        try:
-            # (2) Busca a disponibilidade padrão do profissional para esse dia
-            disponibilidade = DisponibilidadeProfissional.objects.get(
-                profissional=self, 
-                dia_semana=dia_semana
-            )
-        except DisponibilidadeProfissional.DoesNotExist:
+        # (1) Turnos do dia na agenda semanal compilada, com folgas e extras da data
+        excecoes = ExcecaoDisponibilidade.objects.para_profissionais([self.pk]).filter(
+            data=data_selecionada
+        ).values_list('tipo', 'hora_inicio', 'hora_fim')
+        janelas = janelas_do_dia(self.agenda_semanal, data_selecionada, excecoes)
+        if not janelas:
             return [] # Profissional não trabalha neste dia
 
-        # (3) Busca agendamentos e bloqueios existentes
+        # (2) Busca agendamentos e bloqueios (do profissional e da clínica inteira)
         agendamentos = Atendimento.objects.filter(
-            profissional=self, 
-            data_hora_inicio__date=data_selecionada, 
-            status_atendimento__in=['AGENDADO', 'CONFIRMADO']
-        )
-        bloqueios = BloqueioAgenda.objects.filter(
-            profissional=self, 
-            data_hora_inicio__date__lte=data_selecionada, 
-            data_hora_fim__date__gte=data_selecionada
-        )
+            profissional=self
+        ).ativos().sobrepondo_dia(data_selecionada).values_list('data_hora_inicio', 'data_hora_fim')
+        bloqueios = BloqueioAgenda.objects.para_profissionais(
+            [self.pk]
+        ).sobrepondo_dia(data_selecionada).values_list('data_hora_inicio', 'data_hora_fim')
+        recorrentes = [
+            ocorrencia
+            for regra in BloqueioRecorrente.objects.para_profissionais([self.pk]).vigentes(
+                data_selecionada, data_selecionada
+            )
+            for ocorrencia in regra.ocorrencias(data_selecionada, data_selecionada)
+        ]
 
-        horarios_disponiveis = []
-        intervalo = timedelta(minutes=30) # Define o intervalo (ex: 30 min)
-        
-        # (4) Define a hora de início e fim do expediente
-        hora_atual = datetime.combine(data_selecionada, disponibilidade.hora_inicio)
-        hora_fim_expediente = datetime.combine(data_selecionada, disponibilidade.hora_fim)
-
-        # (5) Itera sobre os horários do dia
-        while hora_atual < hora_fim_expediente:
-            horario_ocupado = False
-            
-            # (6) Verifica se o horário conflita com um agendamento
-            for ag in agendamentos:
-                if hora_atual >= ag.data_hora_inicio and hora_atual < ag.data_hora_fim:
-                    horario_ocupado = True
-                    break
-            
-            # (7) Verifica se o horário conflita com um bloqueio
-            if not horario_ocupado:
-                for bl in bloqueios:
-                    # Verifica se a hora_atual está dentro do período de bloqueio
-                    if bl.data_hora_inicio <= hora_atual < bl.data_hora_fim:
-                        horario_ocupado = True
-                        break
-            
-            # (8) Se não estiver ocupado, adiciona à lista
-            if not horario_ocupado:
-                horarios_disponiveis.append(hora_atual.strftime('%H:%M'))
-            
-            hora_atual += intervalo
-
-        return horarios_disponiveis
+        # (3) Delega a varredura ao motor
+        duracao = timedelta(minutes=duracao_minutos) if duracao_minutos else None
+        return calcular_horarios_livres(janelas, [*agendamentos, *bloqueios, *recorrentes], duracao=duracao)
 
 # --- MODELO DE USUÁRIO ATUALIZADO ---
 # Substitua o modelo 'Usuario' antigo por este
@@ -138,9 +121,34 @@ class Cliente(models.Model):
     endereco = models.TextField(blank=True, null=True)
     ativo = models.BooleanField(default=True)
     data_cadastro = models.DateTimeField(auto_now_add=True)
+    # Colunas normalizadas para a busca (ver busca_clientes.py)
+    nome_busca = models.CharField(max_length=150, default='', editable=False)
+    cpf_digitos = models.CharField(max_length=14, blank=True, null=True, editable=False)
+    telefone_digitos = models.CharField(max_length=20, blank=True, null=True, editable=False)
+
+    CAMPOS_BUSCA = ['nome_busca', 'cpf_digitos', 'telefone_digitos']
 
     class Meta:
         db_table = 'cliente'
+        indexes = [
+            # Busca por prefixo (todos os bancos) e login por CPF; no PostgreSQL
+            # há também índices de trigramas para busca por trecho (migração 0010)
+            models.Index(fields=['nome_busca'], name='cliente_nome_busca_idx'),
+            models.Index(fields=['cpf_digitos'], name='cliente_cpf_digitos_idx'),
+            models.Index(fields=['telefone_digitos'], name='cliente_telefone_digitos_idx'),
+        ]
+
+    def atualizar_campos_busca(self):
+        """Recalcula as colunas de busca; bulk_create/COPY devem chamar antes de gravar."""
+        self.nome_busca = normalizar_nome(self.nome_completo)
+        self.cpf_digitos = somente_digitos(self.cpf)
+        self.telefone_digitos = somente_digitos(self.telefone)
+
+    def save(self, *args, **kwargs):
+        self.atualizar_campos_busca()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], *self.CAMPOS_BUSCA}
+        super().save(*args, **kwargs)
 
 class Prontuario(models.Model):
     id_prontuario = models.AutoField(primary_key=True)
@@ -186,6 +194,18 @@ class Preco(models.Model):
 
     class Meta:
         db_table = 'preco'
+        # Um preço por procedimento e profissional, e um preço geral (sem
+        # profissional) por procedimento: a chave natural usada na importação
+        constraints = [
+            models.UniqueConstraint(
+                fields=['procedimento', 'profissional'], condition=models.Q(profissional__isnull=False),
+                name='preco_procedimento_profissional',
+            ),
+            models.UniqueConstraint(
+                fields=['procedimento'], condition=models.Q(profissional__isnull=True),
+                name='preco_procedimento_geral',
+            ),
+        ]
 
 class DisponibilidadeProfissional(models.Model):
     id_disponibilidade = models.AutoField(primary_key=True)
@@ -197,6 +217,82 @@ class DisponibilidadeProfissional(models.Model):
     class Meta:
         db_table = 'disponibilidade_profissional'
 
+class PorProfissionalQuerySet(models.QuerySet):
+    def para_profissionais(self, profissionais_ids):
+        """Registros dos profissionais informados e os da clínica inteira (sem profissional)."""
+        return self.filter(models.Q(profissional_id__in=profissionais_ids) | models.Q(profissional__isnull=True))
+
+class ExcecaoDisponibilidade(models.Model):
+    """
+    Exceção à agenda semanal em uma data: folga (feriado, férias) ou turno
+    extra. Sem profissional, vale para a clínica inteira; folga sem horário
+    ocupa o dia todo.
+    """
+    TIPOS = [('FOLGA', 'Folga'), ('EXTRA', 'Turno extra')]
+
+    id_excecao = models.AutoField(primary_key=True)
+    profissional = models.ForeignKey(Profissional, on_delete=models.CASCADE, blank=True, null=True)
+    data = models.DateField()
+    tipo = models.CharField(max_length=10, choices=TIPOS, default='FOLGA')
+    hora_inicio = models.TimeField(blank=True, null=True)
+    hora_fim = models.TimeField(blank=True, null=True)
+    motivo = models.CharField(max_length=255, blank=True, null=True)
+
+    objects = PorProfissionalQuerySet.as_manager()
+
+    class Meta:
+        db_table = 'excecao_disponibilidade'
+        indexes = [
+            models.Index(fields=['data', 'profissional'], name='excecao_data_prof_idx'),
+        ]
+        constraints = [
+            # Turno extra precisa de horário
+            models.CheckConstraint(
+                condition=~models.Q(tipo='EXTRA') | models.Q(hora_inicio__isnull=False, hora_fim__isnull=False),
+                name='excecao_extra_com_horario',
+            ),
+        ]
+
+class PeriodoQuerySet(models.QuerySet):
+    """
+    Filtros de calendário sobre 'data_hora_inicio' escritos como intervalos
+    semiabertos [inicio, fim) em datetimes aware. Ao contrário de __date,
+    __month e __year, que aplicam conversão de fuso sobre a coluna, um
+    intervalo pode ser resolvido por uma busca no índice B-tree.
+    """
+
+    def no_intervalo(self, data_inicio, data_fim=None):
+        """Registros iniciados de 'data_inicio' (inclusive) a 'data_fim' (exclusive)."""
+        filtro = {'data_hora_inicio__gte': combinar_local(data_inicio, time.min)}
+        if data_fim is not None:
+            filtro['data_hora_inicio__lt'] = combinar_local(data_fim, time.min)
+        return self.filter(**filtro)
+
+    def no_dia(self, data):
+        return self.no_intervalo(data, data + timedelta(days=1))
+
+    def no_mes(self, ano, mes):
+        proximo_mes = date(ano + 1, 1, 1) if mes == 12 else date(ano, mes + 1, 1)
+        return self.no_intervalo(date(ano, mes, 1), proximo_mes)
+
+    def sobrepondo(self, inicio, fim):
+        """Registros cujo período [data_hora_inicio, data_hora_fim) toca [inicio, fim)."""
+        return self.filter(data_hora_inicio__lt=fim, data_hora_fim__gt=inicio)
+
+    def sobrepondo_dia(self, data):
+        return self.sobrepondo(combinar_local(data, time.min), combinar_local(data + timedelta(days=1), time.min))
+
+
+class AtendimentoQuerySet(PeriodoQuerySet):
+    def ativos(self):
+        """Atendimentos que ocupam a agenda do profissional."""
+        return self.filter(status_atendimento__in=STATUS_ATIVOS)
+
+
+class BloqueioAgendaQuerySet(PeriodoQuerySet, PorProfissionalQuerySet):
+    pass
+
+
 class BloqueioAgenda(models.Model):
     id_bloqueio = models.AutoField(primary_key=True)
     profissional = models.ForeignKey(Profissional, on_delete=models.CASCADE, blank=True, null=True)
@@ -204,8 +300,73 @@ class BloqueioAgenda(models.Model):
     data_hora_fim = models.DateTimeField()
     motivo = models.TextField(blank=True, null=True)
 
+    objects = BloqueioAgendaQuerySet.as_manager()
+
     class Meta:
         db_table = 'bloqueio_agenda'
+        indexes = [
+            # Sobreposição de bloqueios com a agenda de um profissional
+            models.Index(fields=['profissional', 'data_hora_inicio', 'data_hora_fim'], name='bloqueio_prof_periodo_idx'),
+        ]
+
+class BloqueioRecorrenteQuerySet(PorProfissionalQuerySet):
+    def vigentes(self, data_inicio, data_fim):
+        """Regras com vigência que toca [data_inicio, data_fim] (datas inclusivas)."""
+        return self.filter(
+            models.Q(data_fim__isnull=True) | models.Q(data_fim__gte=data_inicio),
+            data_inicio__lte=data_fim,
+        )
+
+
+# Dias da semana de BloqueioRecorrente: vazio ou números 1-7 separados por vírgula
+DIAS_SEMANA_REGEX = r'^([1-7](,[1-7])*)?$'
+
+
+class BloqueioRecorrente(models.Model):
+    """
+    Regra de bloqueio que se repete (ex: almoço de segunda a sexta), no
+    lugar de centenas de BloqueioAgenda. As ocorrências não são gravadas:
+    são geradas só para o período consultado (ver
+    disponibilidade.expandir_recorrencia). Sem profissional, vale para a
+    clínica inteira.
+    """
+    FREQUENCIAS = [('DIARIA', 'Diária'), ('SEMANAL', 'Semanal')]
+
+    id_bloqueio_recorrente = models.AutoField(primary_key=True)
+    profissional = models.ForeignKey(Profissional, on_delete=models.CASCADE, blank=True, null=True)
+    frequencia = models.CharField(max_length=10, choices=FREQUENCIAS, default='SEMANAL')
+    intervalo = models.PositiveSmallIntegerField(default=1, help_text='A cada quantos dias/semanas.')
+    dias_semana = models.CharField(
+        max_length=20, blank=True, default='',
+        validators=[RegexValidator(DIAS_SEMANA_REGEX, 'Informe os dias como números de 1 a 7 separados por vírgula (ex: 2,3,4).')],
+        help_text='Regras semanais: dias separados por vírgula (1=Dom, 2=Seg, ..., 7=Sáb).',
+    )
+    hora_inicio = models.TimeField()
+    hora_fim = models.TimeField()
+    data_inicio = models.DateField()
+    data_fim = models.DateField(blank=True, null=True, help_text='Último dia da regra (vazio = sem fim).')
+    motivo = models.CharField(max_length=255, blank=True, null=True)
+
+    objects = BloqueioRecorrenteQuerySet.as_manager()
+
+    class Meta:
+        db_table = 'bloqueio_recorrente'
+        indexes = [
+            models.Index(fields=['profissional', 'data_inicio'], name='bloq_recorrente_prof_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(condition=models.Q(hora_fim__gt=models.F('hora_inicio')), name='bloq_recorrente_horario'),
+            models.CheckConstraint(condition=models.Q(intervalo__gte=1), name='bloq_recorrente_intervalo'),
+            models.CheckConstraint(condition=models.Q(dias_semana__regex=DIAS_SEMANA_REGEX), name='bloq_recorrente_dias_semana'),
+        ]
+
+    def ocorrencias(self, data_inicio, data_fim):
+        """Pares (inicio, fim) das ocorrências entre as datas (inclusivas)."""
+        return expandir_recorrencia(
+            (self.frequencia, self.intervalo, self.dias_semana, self.hora_inicio, self.hora_fim,
+             self.data_inicio, self.data_fim),
+            data_inicio, data_fim,
+        )
 
 class Atendimento(models.Model):
     id_atendimento = models.AutoField(primary_key=True)
@@ -218,8 +379,45 @@ class Atendimento(models.Model):
     status_atendimento = models.CharField(max_length=20, default='AGENDADO')
     observacoes = models.TextField(blank=True, null=True)
 
+    objects = AtendimentoQuerySet.as_manager()
+
     class Meta:
         db_table = 'atendimento'
+        indexes = [
+            # Agenda de um profissional por período e status (disponibilidade, conflitos)
+            models.Index(fields=['profissional', 'data_hora_inicio', 'status_atendimento'], name='atend_prof_inicio_status_idx'),
+            # Histórico e próximos agendamentos do cliente (painel)
+            models.Index(fields=['cliente', 'data_hora_inicio'], name='atend_cliente_inicio_idx'),
+            # Contagens por status e filtros por período (dashboard, listagens)
+            models.Index(fields=['status_atendimento'], name='atend_status_idx'),
+            models.Index(fields=['data_hora_inicio'], name='atend_inicio_idx'),
+            # Índice parcial só com os agendamentos ativos, cobrindo o fim do
+            # intervalo para que a busca de ocupação não precise ler a tabela
+            models.Index(
+                fields=['profissional', 'data_hora_inicio', 'data_hora_fim'],
+                condition=models.Q(status_atendimento__in=STATUS_ATIVOS),
+                name='atend_ativos_prof_periodo_idx',
+            ),
+        ]
+
+class EstatisticaDiaria(models.Model):
+    """
+    Resumo diário dos atendimentos por profissional, procedimento e status,
+    mantido incrementalmente pelos signals de Atendimento (ver estatisticas.py).
+    Relatórios leem daqui, com custo proporcional ao número de dias.
+    """
+    id_estatistica = models.AutoField(primary_key=True)
+    data = models.DateField()  # Data local de início do atendimento
+    profissional = models.ForeignKey(Profissional, on_delete=models.CASCADE)
+    procedimento = models.ForeignKey(Procedimento, on_delete=models.CASCADE)
+    status_atendimento = models.CharField(max_length=20)
+    quantidade = models.IntegerField(default=0)
+    valor_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = 'estatistica_diaria'
+        # A restrição única também serve de índice para filtros por período
+        unique_together = (('data', 'profissional', 'procedimento', 'status_atendimento'),)
 
 class ProntuarioResposta(models.Model):
     id_resposta = models.AutoField(primary_key=True)
@@ -232,14 +430,46 @@ class ProntuarioResposta(models.Model):
         db_table = 'prontuario_resposta'
 
 class Notificacao(models.Model):
+    """
+    Fila de saída (outbox) de notificações: a confirmação é criada na mesma
+    transação do agendamento, os lembretes pelo comando gerar_lembretes, e
+    todas são enviadas depois pelo comando despachar_notificacoes (ver
+    notificacoes.py).
+    """
     id_notificacao = models.AutoField(primary_key=True)
     atendimento = models.ForeignKey(Atendimento, on_delete=models.CASCADE)
     canal = models.CharField(max_length=20)
     status_envio = models.CharField(max_length=20)
     data_hora_envio = models.DateTimeField(blank=True, null=True)
+    tipo = models.CharField(max_length=20, default='CONFIRMACAO')
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    # Quando a notificação pode ser (re)tentada; também serve de prazo para
+    # uma notificação 'PROCESSANDO' cujo worker morreu voltar para a fila
+    proxima_tentativa = models.DateTimeField(default=timezone.now)
+    ultimo_erro = models.TextField(blank=True, null=True)
 
     class Meta:
         db_table = 'notificacao'
+        indexes = [
+            # Fila: notificações pendentes por ordem de vencimento
+            models.Index(fields=['status_envio', 'proxima_tentativa'], name='notificacao_fila_idx'),
+        ]
+        constraints = [
+            # Uma notificação de cada tipo por canal: reprocessar uma janela
+            # de lembretes não duplica envios (bulk_create ignora o conflito)
+            models.UniqueConstraint(fields=['atendimento', 'canal', 'tipo'], name='notificacao_unica'),
+        ]
+
+class MarcaProcessamento(models.Model):
+    """
+    Até onde um processamento periódico já foi (marca d'água), para que
+    cada execução trate apenas o intervalo desde a anterior.
+    """
+    nome = models.CharField(max_length=50, primary_key=True)
+    valor = models.DateTimeField()
+
+    class Meta:
+        db_table = 'marca_processamento'
 
 class TermoConsentimento(models.Model):
     id_termo = models.AutoField(primary_key=True)
@@ -252,13 +482,22 @@ class TermoConsentimento(models.Model):
         db_table = 'termo_consentimento'
 
 class LogAuditoria(models.Model):
+    """
+    Eventos de auditoria, gravados em lote por auditoria.py. No PostgreSQL a
+    tabela é particionada por mês de data_hora (migração 0009).
+    """
     id_log = models.AutoField(primary_key=True)
     usuario = models.ForeignKey(Usuario, on_delete=models.SET_NULL, blank=True, null=True)
     acao = models.CharField(max_length=255)
     tabela_afetada = models.CharField(max_length=100, blank=True, null=True)
     id_registro_afetado = models.IntegerField(blank=True, null=True)
     detalhes = models.JSONField(blank=True, null=True)
-    data_hora = models.DateTimeField(auto_now_add=True)
+    # Momento do evento, não da gravação do lote (por isso não é auto_now_add)
+    data_hora = models.DateTimeField(default=timezone.now)
 
     class Meta:
-        db_table = 'log_auditoria'
\ No newline at end of file
+        db_table = 'log_auditoria'
+        indexes = [
+            # Consultas por período e poda dos meses antigos
+            models.Index(fields=['data_hora'], name='log_auditoria_data_idx'),
+        ]
\ No newline at end of file
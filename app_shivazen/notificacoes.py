@@ -0,0 +1,302 @@
+# app_shivazen/notificacoes.py
+"""
+Envio assíncrono de notificações (confirmações, lembretes) no padrão
+outbox.
+
+- O agendamento só grava linhas 'PENDENTE' em Notificacao, na mesma
+  transação (enfileirar); a requisição não espera SMTP/WhatsApp.
+- O comando despachar_notificacoes reivindica lotes com
+  SELECT ... FOR UPDATE SKIP LOCKED (vários workers não pegam a mesma
+  linha), envia com concorrência limitada e grava o resultado em lote.
+- Falhas voltam para a fila com espera exponencial até MAX_TENTATIVAS.
+- Lembretes (LEMBRETES) são criados pelo comando gerar_lembretes, que a
+  cada execução só lê os atendimentos cuja janela abriu desde a anterior.
+
+Cada canal tem um backend plugável, configurado em
+settings.SHIVAZEN_NOTIFICACOES['CANAIS'] (caminho da classe). Só canais
+com backend configurado recebem notificações; o WhatsApp fica desligado
+até que um backend real seja definido (o BackendConsole só registra a
+mensagem no log e ela contaria como enviada).
+"""
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Atendimento, MarcaProcessamento, Notificacao
+
+logger = logging.getLogger('app_shivazen.notificacoes')
+
+PENDENTE = 'PENDENTE'
+PROCESSANDO = 'PROCESSANDO'
+ENVIADO = 'ENVIADO'
+FALHOU = 'FALHOU'
+
+CONFIGURACAO_PADRAO = {
+    'CANAIS': {
+        'EMAIL': 'app_shivazen.notificacoes.BackendEmail',
+    },
+    'MAX_TENTATIVAS': 5,
+    'ESPERA_INICIAL': 60,       # segundos antes da 2ª tentativa (dobra a cada falha)
+    'ESPERA_MAXIMA': 3600,
+    'PRAZO_PROCESSAMENTO': 300,  # após isso, uma linha 'PROCESSANDO' volta para a fila
+    'ARQUIVO': None,            # arquivo do BackendArquivo (padrão: BASE_DIR/notificacoes.jsonl)
+    # tipo do lembrete -> minutos de antecedência em relação ao início
+    'LEMBRETES': {'LEMBRETE_24H': 24 * 60, 'LEMBRETE_2H': 2 * 60},
+}
+
+
+def configuracao():
+    return {**CONFIGURACAO_PADRAO, **getattr(settings, 'SHIVAZEN_NOTIFICACOES', {})}
+
+
+# --- Backends ---
+
+class BackendNotificacao:
+    """Base dos backends: 'enviar' levanta exceção quando o envio falha."""
+
+    def enviar(self, destinatario, assunto, texto):
+        raise NotImplementedError
+
+
+class BackendEmail(BackendNotificacao):
+    """E-mail pelo backend de e-mail do Django (settings.EMAIL_BACKEND)."""
+
+    def enviar(self, destinatario, assunto, texto):
+        send_mail(assunto, texto, None, [destinatario], fail_silently=False)
+
+
+class BackendConsole(BackendNotificacao):
+    """Só registra a mensagem no log; para desenvolvimento."""
+
+    def enviar(self, destinatario, assunto, texto):
+        logger.info('Notificação para %s: %s\n%s', destinatario, assunto, texto)
+
+
+class BackendArquivo(BackendNotificacao):
+    """Acrescenta cada mensagem como uma linha JSON em um arquivo ('ARQUIVO'); para testes."""
+
+    def __init__(self):
+        self.caminho = configuracao()['ARQUIVO'] or settings.BASE_DIR / 'notificacoes.jsonl'
+
+    def enviar(self, destinatario, assunto, texto):
+        linha = json.dumps({'destinatario': destinatario, 'assunto': assunto, 'texto': texto}, ensure_ascii=False)
+        with open(self.caminho, 'a', encoding='utf-8') as arquivo:
+            arquivo.write(linha + '\n')
+
+
+def obter_backend(canal):
+    caminho = configuracao()['CANAIS'].get(canal)
+    if not caminho:
+        raise ValueError(f'Canal de notificação sem backend configurado: {canal!r}')
+    return import_string(caminho)()
+
+
+# --- Enfileiramento ---
+
+def canais_do_cliente(cliente):
+    """Canais ligados (com backend em CANAIS) para os quais o cliente tem contato."""
+    ligados = configuracao()['CANAIS']
+    canais = []
+    if cliente.email and ligados.get('EMAIL'):
+        canais.append('EMAIL')
+    if cliente.telefone and ligados.get('WHATSAPP'):
+        canais.append('WHATSAPP')
+    return canais
+
+
+def enfileirar(atendimento, tipo='CONFIRMACAO', canais=None, quando=None):
+    """
+    Cria as notificações pendentes do atendimento (uma por canal) na
+    transação atual. Sem 'canais', usa os contatos do cliente.
+    """
+    if canais is None:
+        canais = canais_do_cliente(atendimento.cliente)
+    return Notificacao.objects.bulk_create([
+        Notificacao(
+            atendimento=atendimento, canal=canal, tipo=tipo, status_envio=PENDENTE,
+            proxima_tentativa=quando or timezone.now(),
+        )
+        for canal in canais
+    ])
+
+
+def montar_mensagem(notificacao):
+    """(destinatario, assunto, texto) de uma notificação."""
+    atendimento = notificacao.atendimento
+    cliente = atendimento.cliente
+    inicio = timezone.localtime(atendimento.data_hora_inicio).strftime('%d/%m/%Y às %H:%M')
+    if notificacao.tipo.startswith('LEMBRETE'):
+        assunto = 'Lembrete do seu atendimento na Shiva Zen'
+        texto = f'Olá, {cliente.nome_completo}! Lembramos do seu atendimento de {atendimento.procedimento.nome}'
+    else:
+        assunto = 'Agendamento confirmado na Shiva Zen'
+        texto = f'Olá, {cliente.nome_completo}! Seu atendimento de {atendimento.procedimento.nome} está agendado'
+    texto += f' com {atendimento.profissional.nome} em {inicio}.'
+    destinatario = cliente.email if notificacao.canal == 'EMAIL' else cliente.telefone
+    return destinatario, assunto, texto
+
+
+# --- Lembretes ---
+
+MARCA_LEMBRETES = 'lembretes'
+
+
+def gerar_lembretes(agora=None):
+    """
+    Enfileira os lembretes cuja janela abriu desde a execução anterior.
+
+    A janela do lembrete com antecedência A abre em início - A; entre a
+    marca d'água M e agora, isso corresponde a atendimentos com início em
+    (M + A, agora + A]. Cada antecedência é uma leitura por intervalo em
+    atend_inicio_idx, então o custo acompanha o número de lembretes
+    devidos, não o tamanho da tabela. Atendimentos marcados depois de a
+    janela abrir não recebem aquele lembrete (a confirmação já cobre).
+
+    Cada atendimento recebe só o lembrete mais próximo cuja janela está
+    aberta: com a janela de uma antecedência menor já aberta (início até
+    agora + A menor), a maior está vencida e fica de fora. Isso vale para a
+    primeira execução (sem marca, todas as janelas "abriram agora") e para
+    execuções com uma longa pausa desde a anterior.
+
+    Retorna a quantidade de notificações efetivamente criadas (as que já
+    existiam não contam).
+    """
+    agora = agora or timezone.now()
+    with transaction.atomic():
+        # A trava na marca serializa execuções simultâneas do comando
+        marca = MarcaProcessamento.objects.select_for_update().filter(nome=MARCA_LEMBRETES).first()
+        desde = marca.valor if marca else None
+
+        notificacoes = []
+        menor = timedelta(0)
+        for tipo, minutos in sorted(configuracao()['LEMBRETES'].items(), key=lambda item: item[1]):
+            antecedencia = timedelta(minutes=minutos)
+            # Nunca lembra atendimentos que já começaram nem os que já estão
+            # na janela de um lembrete mais próximo
+            inicio_minimo = agora + menor
+            if desde:
+                inicio_minimo = max(inicio_minimo, desde + antecedencia)
+            menor = antecedencia
+            atendimentos = Atendimento.objects.ativos().filter(
+                data_hora_inicio__gt=inicio_minimo, data_hora_inicio__lte=agora + antecedencia,
+            ).exclude(
+                notificacao__tipo=tipo,
+            ).select_related('cliente').only('pk', 'cliente__email', 'cliente__telefone')
+            notificacoes += [
+                Notificacao(atendimento=atendimento, canal=canal, tipo=tipo, status_envio=PENDENTE, proxima_tentativa=agora)
+                for atendimento in atendimentos
+                for canal in canais_do_cliente(atendimento.cliente)
+            ]
+        # Os já lembrados foram excluídos acima; o ignore_conflicts só cobre
+        # duas primeiras execuções simultâneas (ainda sem marca para travar)
+        Notificacao.objects.bulk_create(notificacoes, ignore_conflicts=True)
+        MarcaProcessamento.objects.update_or_create(nome=MARCA_LEMBRETES, defaults={'valor': agora})
+    return len(notificacoes)
+
+
+# --- Despacho ---
+
+def reivindicar_lote(tamanho):
+    """
+    Marca até 'tamanho' notificações vencidas como 'PROCESSANDO' e as
+    retorna. Linhas travadas por outro worker são puladas (SKIP LOCKED).
+
+    Uma linha ainda 'PROCESSANDO' com o prazo vencido é de um worker que
+    parou no meio do envio: conta como uma tentativa, para que uma mensagem
+    que derruba o worker chegue a MAX_TENTATIVAS (e a 'FALHOU') em vez de
+    voltar para sempre.
+    """
+    conf = configuracao()
+    agora = timezone.now()
+    prazo = agora + timedelta(seconds=conf['PRAZO_PROCESSAMENTO'])
+    with transaction.atomic():
+        linhas = list(Notificacao.objects.select_for_update(skip_locked=True).filter(
+            Q(status_envio=PENDENTE) | Q(status_envio=PROCESSANDO),
+            proxima_tentativa__lte=agora,
+        ).order_by('proxima_tentativa').values_list('pk', 'status_envio', 'tentativas')[:tamanho])
+        if not linhas:
+            return []
+        interrompidas = [pk for pk, status, _ in linhas if status == PROCESSANDO]
+        esgotadas = [
+            pk for pk, status, tentativas in linhas
+            if status == PROCESSANDO and tentativas + 1 >= conf['MAX_TENTATIVAS']
+        ]
+        if interrompidas:
+            Notificacao.objects.filter(pk__in=interrompidas).update(
+                tentativas=F('tentativas') + 1, ultimo_erro='Prazo de processamento esgotado',
+            )
+        if esgotadas:
+            Notificacao.objects.filter(pk__in=esgotadas).update(status_envio=FALHOU)
+            logger.warning('Notificações %s: prazo de processamento esgotado %d vezes', esgotadas, conf['MAX_TENTATIVAS'])
+        ids = [pk for pk, _, _ in linhas if pk not in esgotadas]
+        if not ids:
+            return []
+        Notificacao.objects.filter(pk__in=ids).update(status_envio=PROCESSANDO, proxima_tentativa=prazo)
+    return list(Notificacao.objects.filter(pk__in=ids).select_related(
+        'atendimento__cliente', 'atendimento__profissional', 'atendimento__procedimento',
+    ))
+
+
+def _enviar(notificacao):
+    """Envia uma notificação; retorna None ou a mensagem de erro."""
+    try:
+        destinatario, assunto, texto = montar_mensagem(notificacao)
+        if not destinatario:
+            raise ValueError(f'Cliente sem contato para o canal {notificacao.canal}')
+        obter_backend(notificacao.canal).enviar(destinatario, assunto, texto)
+        return None
+    except Exception as e:
+        return f'{type(e).__name__}: {e}'
+
+
+def processar_lote(tamanho=50, concorrencia=4):
+    """
+    Reivindica e envia um lote. Retorna um dicionário com as quantidades
+    enviadas, reagendadas e com falha definitiva.
+    """
+    notificacoes = reivindicar_lote(tamanho)
+    if not notificacoes:
+        return {'enviadas': 0, 'reagendadas': 0, 'falhas': 0}
+
+    # Os envios rodam em threads; o banco só é usado aqui, antes e depois
+    with ThreadPoolExecutor(max_workers=max(1, concorrencia)) as executor:
+        erros = list(executor.map(_enviar, notificacoes))
+
+    conf = configuracao()
+    agora = timezone.now()
+    enviadas, com_erro = [], []
+    for notificacao, erro in zip(notificacoes, erros):
+        if erro is None:
+            enviadas.append(notificacao.pk)
+            continue
+        notificacao.tentativas += 1
+        notificacao.ultimo_erro = erro
+        if notificacao.tentativas >= conf['MAX_TENTATIVAS']:
+            notificacao.status_envio = FALHOU
+        else:
+            espera = min(conf['ESPERA_INICIAL'] * 2 ** (notificacao.tentativas - 1), conf['ESPERA_MAXIMA'])
+            notificacao.status_envio = PENDENTE
+            notificacao.proxima_tentativa = agora + timedelta(seconds=espera)
+        com_erro.append(notificacao)
+
+    with transaction.atomic():
+        if enviadas:
+            Notificacao.objects.filter(pk__in=enviadas).update(
+                status_envio=ENVIADO, data_hora_envio=agora, ultimo_erro=None,
+            )
+        Notificacao.objects.bulk_update(
+            com_erro, ['status_envio', 'tentativas', 'ultimo_erro', 'proxima_tentativa'],
+        )
+    for notificacao in com_erro:
+        logger.warning('Notificação %s (%s): %s', notificacao.pk, notificacao.status_envio, notificacao.ultimo_erro)
+
+    falhas = sum(1 for notificacao in com_erro if notificacao.status_envio == FALHOU)
+    return {'enviadas': len(enviadas), 'reagendadas': len(com_erro) - falhas, 'falhas': falhas}
@@ -0,0 +1,78 @@
+# app_shivazen/paginacao.py
+"""
+Paginação por chave (keyset/seek) para listagens longas.
+
+Em vez de OFFSET, cada página começa logo depois da última linha da página
+anterior: WHERE (data, id) < (data_ultima, id_ultimo). O custo é o mesmo na
+primeira página e na milésima, e linhas inseridas no meio da navegação não
+fazem registros se repetirem ou sumirem.
+
+Os cursores são opacos para o navegador: a chave da linha de borda vai
+assinada com django.core.signing, então não pode ser forjada nem editada.
+"""
+from datetime import datetime
+
+from django.core import signing
+from django.db.models import Q
+
+SALT_CURSOR = 'app_shivazen.paginacao'
+
+
+class CursorInvalido(Exception):
+    """Cursor adulterado, expirado ou de outra listagem."""
+
+
+def codificar_cursor(item, campo, direcao):
+    """Cursor apontando para 'item' (a borda da página), na direção dada."""
+    valor = getattr(item, campo)
+    return signing.dumps(
+        {'v': valor.isoformat(), 'pk': item.pk, 'd': direcao},
+        salt=SALT_CURSOR, compress=True,
+    )
+
+
+def decodificar_cursor(cursor):
+    try:
+        dados = signing.loads(cursor, salt=SALT_CURSOR)
+        return datetime.fromisoformat(dados['v']), dados['pk'], dados['d']
+    except (signing.BadSignature, KeyError, TypeError, ValueError) as e:
+        raise CursorInvalido(str(e)) from e
+
+
+def paginar_por_chave(queryset, cursor=None, tamanho=50, campo='data_hora_inicio'):
+    """
+    Página de 'queryset' em ordem decrescente de (campo, pk).
+
+    Retorna (itens, cursor_proximo, cursor_anterior); os cursores são None
+    quando não há mais páginas naquela direção.
+    """
+    direcao = 'proximo'
+    if cursor:
+        valor, pk, direcao = decodificar_cursor(cursor)
+        if direcao == 'proximo':
+            queryset = queryset.filter(Q(**{f'{campo}__lt': valor}) | Q(**{campo: valor, 'pk__lt': pk}))
+        else:
+            queryset = queryset.filter(Q(**{f'{campo}__gt': valor}) | Q(**{campo: valor, 'pk__gt': pk}))
+
+    # Para voltar, lê em ordem crescente a partir do cursor e inverte
+    if direcao == 'proximo':
+        queryset = queryset.order_by(f'-{campo}', '-pk')
+    else:
+        queryset = queryset.order_by(campo, 'pk')
+
+    # Uma linha a mais indica se existe outra página na mesma direção
+    itens = list(queryset[:tamanho + 1])
+    tem_mais = len(itens) > tamanho
+    itens = itens[:tamanho]
+    if direcao == 'anterior':
+        itens.reverse()
+    if not itens:
+        return itens, None, None
+
+    if direcao == 'proximo':
+        tem_proximo, tem_anterior = tem_mais, cursor is not None
+    else:
+        tem_proximo, tem_anterior = True, tem_mais
+    cursor_proximo = codificar_cursor(itens[-1], campo, 'proximo') if tem_proximo else None
+    cursor_anterior = codificar_cursor(itens[0], campo, 'anterior') if tem_anterior else None
+    return itens, cursor_proximo, cursor_anterior
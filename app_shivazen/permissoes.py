@@ -0,0 +1,130 @@
+# app_shivazen/permissoes.py
+"""
+Permissões por perfil e atalhos de autenticação.
+
+O mapa perfil -> funcionalidades (Perfil, PerfilFuncionalidade,
+Funcionalidade) é montado com um prefetch e guardado no cache 'permissoes'
+sob um contador de versão; qualquer alteração nessas tabelas incrementa a
+versão (ver signals.py). Com o cache quente, @requer_funcionalidade não
+toca no banco: o perfil_id já vem na linha do usuário. O cache é o
+compartilhado entre os workers (EXIGE_COMPARTILHADO em settings), para que
+uma revogação valha em todos eles na requisição seguinte.
+
+O ClienteMiddleware (middleware.py) expõe request.cliente, carregado só no
+primeiro uso e uma vez por requisição. Para quem não é cliente o valor é
+falso: teste com 'if request.cliente:', não com 'is None'.
+"""
+from functools import wraps
+
+from django.contrib import messages
+from django.contrib.auth.views import redirect_to_login
+from django.http import JsonResponse
+from django.shortcuts import redirect
+from django.utils.functional import SimpleLazyObject
+
+from .cache import obter_cache
+
+NOME_CACHE = 'permissoes'
+VERSAO = 'perfis'
+
+# Funcionalidades das telas administrativas (criadas pela migração 0011)
+DASHBOARD = 'DASHBOARD'
+AGENDAMENTOS = 'AGENDAMENTOS'
+PROCEDIMENTOS = 'PROCEDIMENTOS'
+BLOQUEIOS = 'BLOQUEIOS'
+PROFISSIONAIS = 'PROFISSIONAIS'
+CLIENTES = 'CLIENTES'
+
+
+def mapa_permissoes():
+    """{id_perfil: {'nome': ..., 'funcionalidades': frozenset(nomes)}}, do cache quando possível."""
+    from .models import Perfil
+
+    cache = obter_cache(NOME_CACHE)
+    versao = cache.versoes([VERSAO])[VERSAO]
+    chave = f'mapa:{versao}'
+    encontrado = cache.get_many([chave])
+    if chave in encontrado:
+        return encontrado[chave]
+    mapa = {
+        perfil.pk: {
+            'nome': perfil.nome,
+            'funcionalidades': frozenset(f.nome for f in perfil.funcionalidades.all()),
+        }
+        for perfil in Perfil.objects.prefetch_related('funcionalidades')
+    }
+    cache.set_many({chave: mapa})
+    return mapa
+
+
+def invalidar_permissoes():
+    obter_cache(NOME_CACHE).incrementar_versao(VERSAO)
+
+
+def nome_perfil(usuario):
+    perfil = mapa_permissoes().get(getattr(usuario, 'perfil_id', None))
+    return perfil['nome'] if perfil else None
+
+
+def funcionalidades(usuario):
+    """Nomes das funcionalidades do perfil do usuário."""
+    if not usuario.is_authenticated:
+        return frozenset()
+    perfil = mapa_permissoes().get(usuario.perfil_id)
+    return perfil['funcionalidades'] if perfil else frozenset()
+
+
+def tem_funcionalidade(usuario, nome):
+    """
+    Equipe (is_staff) continua com acesso a todas as telas administrativas;
+    os perfis liberam funcionalidades também para quem não é staff.
+    """
+    if not usuario.is_authenticated:
+        return False
+    return usuario.is_staff or usuario.is_superuser or nome in funcionalidades(usuario)
+
+
+def requer_funcionalidade(nome, json=False):
+    """
+    Exige login e a funcionalidade 'nome'. Sem acesso, redireciona para o
+    painel com uma mensagem (ou responde 403 em JSON, com json=True).
+    """
+    def decorator(view):
+        @wraps(view)
+        def verificar(request, *args, **kwargs):
+            if not request.user.is_authenticated:
+                if json:
+                    return JsonResponse({'error': 'Login necessário'}, status=401)
+                return redirect_to_login(request.get_full_path(), '/login/')
+            if not tem_funcionalidade(request.user, nome):
+                if json:
+                    return JsonResponse({'error': 'Acesso negado'}, status=403)
+                messages.error(request, 'Acesso negado. Você precisa ser administrador.')
+                return redirect('shivazen:painel')
+            return view(request, *args, **kwargs)
+        return verificar
+    return decorator
+
+
+# --- Cliente da requisição ---
+
+def obter_cliente(request):
+    """Cliente do usuário logado: pelo id guardado na sessão no login, senão pelo e-mail."""
+    from .models import Cliente
+
+    usuario = request.user
+    if not usuario.is_authenticated or usuario.is_staff:
+        return None
+    id_cliente = request.session.get('cliente_id')
+    if id_cliente is not None:
+        cliente = Cliente.objects.filter(pk=id_cliente).first()
+    else:
+        cliente = Cliente.objects.filter(email=usuario.email).first()
+    if cliente is not None and cliente.pk != id_cliente:
+        request.session['cliente_id'] = cliente.pk
+    return cliente
+
+
+def cliente_preguicoso(request):
+    """Valor de request.cliente: só consulta o banco no primeiro uso."""
+    return SimpleLazyObject(lambda: obter_cliente(request))
@@ -0,0 +1,120 @@
+# app_shivazen/profissionais.py
+"""
+Cadastro de profissionais com seus horários semanais e procedimentos.
+
+Um lote inteiro (um ou muitos profissionais) é gravado em uma transação e
+em um número fixo de consultas: uma busca dos procedimentos (in_bulk) e um
+bulk_create para profissionais, disponibilidades e vínculos.
+"""
+from datetime import time
+
+from django.db import transaction
+
+from .catalogo import invalidar_catalogo
+from .dashboard import invalidar_dashboard
+from .disponibilidade import compilar_agenda_semanal
+from .models import DisponibilidadeProfissional, Procedimento, Profissional, ProfissionalProcedimento
+
+# Nome do dia -> dia_semana (1=Dom, 2=Seg, ..., 7=Sáb)
+DIAS_SEMANA = {
+    'domingo': 1, 'segunda': 2, 'terca': 3, 'quarta': 4, 'quinta': 5, 'sexta': 6, 'sabado': 7,
+}
+
+
+class ErroCadastroProfissional(Exception):
+    """Dados de cadastro inválidos; nada foi gravado."""
+
+
+def _converter_hora(valor):
+    if isinstance(valor, time):
+        return valor
+    try:
+        return time.fromisoformat(valor)
+    except (TypeError, ValueError):
+        raise ErroCadastroProfissional(f'Horário inválido: {valor!r}')
+
+
+def _validar(dados, procedimentos):
+    """Normaliza um profissional do lote; levanta ErroCadastroProfissional."""
+    nome = (dados.get('nome') or '').strip()
+    if not nome:
+        raise ErroCadastroProfissional('Nome do profissional é obrigatório.')
+
+    horarios = []
+    for horario in dados.get('horarios', []):
+        dia_semana = int(horario['dia_semana'])
+        inicio = _converter_hora(horario['hora_inicio'])
+        fim = _converter_hora(horario['hora_fim'])
+        if dia_semana not in DIAS_SEMANA.values():
+            raise ErroCadastroProfissional(f'{nome}: dia da semana inválido ({dia_semana}).')
+        if inicio >= fim:
+            raise ErroCadastroProfissional(f'{nome}: horário de início deve ser antes do fim.')
+        horarios.append((dia_semana, inicio, fim))
+
+    ids_procedimentos = {int(id_proc) for id_proc in dados.get('procedimentos', [])}
+    desconhecidos = ids_procedimentos - procedimentos.keys()
+    if desconhecidos:
+        raise ErroCadastroProfissional(
+            f'{nome}: procedimento(s) inexistente(s): {", ".join(map(str, sorted(desconhecidos)))}.'
+        )
+    return nome, horarios, sorted(ids_procedimentos)
+
+
+@transaction.atomic
+def cadastrar_profissionais(lote):
+    """
+    Cadastra vários profissionais. Cada item de 'lote' é um dicionário:
+
+        {'nome': 'Ana', 'especialidade': 'Massagem', 'ativo': True,
+         'horarios': [{'dia_semana': 2, 'hora_inicio': '09:00', 'hora_fim': '18:00'}],
+         'procedimentos': [1, 4]}
+
+    Valida o lote inteiro antes de gravar e retorna os profissionais criados.
+    """
+    try:
+        ids_procedimentos = {int(i) for dados in lote for i in dados.get('procedimentos', [])}
+    except (TypeError, ValueError):
+        raise ErroCadastroProfissional('Identificador de procedimento inválido.')
+    procedimentos = Procedimento.objects.in_bulk(ids_procedimentos) if ids_procedimentos else {}
+
+    try:
+        validados = [_validar(dados, procedimentos) for dados in lote]
+    except (KeyError, TypeError, ValueError) as e:
+        raise ErroCadastroProfissional(f'Horário incompleto ou inválido: {e}')
+
+    profissionais = Profissional.objects.bulk_create([
+        Profissional(
+            nome=nome,
+            especialidade=dados.get('especialidade') or '',
+            ativo=dados.get('ativo', True),
+            # bulk_create não dispara o signal que compila a agenda
+            agenda_semanal=compilar_agenda_semanal(horarios),
+        )
+        for dados, (nome, horarios, _) in zip(lote, validados)
+    ])
+    DisponibilidadeProfissional.objects.bulk_create([
+        DisponibilidadeProfissional(
+            profissional=profissional, dia_semana=dia_semana, hora_inicio=inicio, hora_fim=fim,
+        )
+        for profissional, (_, horarios, _) in zip(profissionais, validados)
+        for dia_semana, inicio, fim in horarios
+    ])
+    ProfissionalProcedimento.objects.bulk_create([
+        ProfissionalProcedimento(profissional=profissional, procedimento=procedimentos[id_proc])
+        for profissional, (_, _, ids) in zip(profissionais, validados)
+        for id_proc in ids
+    ])
+
+    # bulk_create não dispara signals: o total de profissionais do dashboard
+    # e os procedimentos oferecidos no catálogo mudam
+    transaction.on_commit(invalidar_dashboard)
+    transaction.on_commit(invalidar_catalogo)
+    return profissionais
+
+
+def cadastrar_profissional(nome, especialidade='', ativo=True, horarios=(), procedimentos=()):
+    """Cadastra um único profissional (ver cadastrar_profissionais)."""
+    return cadastrar_profissionais([{
+        'nome': nome, 'especialidade': especialidade, 'ativo': ativo,
+        'horarios': list(horarios), 'procedimentos': list(procedimentos),
+    }])[0]
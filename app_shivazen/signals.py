@@ -0,0 +1,124 @@
+# app_shivazen/signals.py
+"""
+Receivers que mantêm os caches coerentes com o banco.
+
+As invalidações rodam em transaction.on_commit: assim, uma requisição
+concorrente não consegue recalcular (e gravar no cache) dados antigos
+sob a versão nova antes de a transação terminar.
+"""
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_save
+
+from .catalogo import invalidar_catalogo
+from .dashboard import invalidar_dashboard
+from .disponibilidade import invalidar_profissional, recompilar_agendas
+from .estatisticas import CAMPOS_CONTRIBUICAO, aplicar, contribuicao
+from .models import (
+    Atendimento, BloqueioAgenda, BloqueioRecorrente, Cliente, DisponibilidadeProfissional,
+    ExcecaoDisponibilidade, Funcionalidade, Perfil, PerfilFuncionalidade, Preco, Procedimento, Profissional,
+    ProfissionalProcedimento,
+)
+from .permissoes import invalidar_permissoes
+
+
+def _invalidar_agenda(ids_profissionais):
+    for id_profissional in set(ids_profissionais):
+        transaction.on_commit(lambda id_profissional=id_profissional: invalidar_profissional(id_profissional))
+
+
+def guardar_profissional_original(sender, instance, **kwargs):
+    # Lembra o profissional carregado, para invalidar também o antigo
+    # quando um registro for transferido para outro profissional.
+    instance._profissional_id_original = instance.__dict__.get('profissional_id')
+
+
+def agenda_salva(sender, instance, created, **kwargs):
+    ids = [instance.profissional_id]
+    if not created:
+        ids.append(instance._profissional_id_original)
+    if sender is DisponibilidadeProfissional:
+        # Na mesma transação: a agenda compilada nunca fica atrás das linhas
+        recompilar_agendas(ids)
+    _invalidar_agenda(ids)
+    instance._profissional_id_original = instance.profissional_id
+
+
+def agenda_excluida(sender, instance, **kwargs):
+    if sender is DisponibilidadeProfissional:
+        recompilar_agendas([instance.profissional_id])
+    _invalidar_agenda([instance.profissional_id])
+
+
+# Bloqueios e exceções sem profissional valem para a clínica inteira e invalidam todos
+for modelo in (
+    Atendimento, BloqueioAgenda, BloqueioRecorrente, DisponibilidadeProfissional, ExcecaoDisponibilidade,
+):
+    post_init.connect(guardar_profissional_original, sender=modelo)
+    post_save.connect(agenda_salva, sender=modelo)
+    post_delete.connect(agenda_excluida, sender=modelo)
+
+
+def cadastro_alterado(sender, **kwargs):
+    transaction.on_commit(invalidar_dashboard)
+
+
+# O snapshot do dashboard depende de atendimentos e dos totais de cadastros
+for modelo in (Atendimento, Cliente, Profissional, Procedimento):
+    post_save.connect(cadastro_alterado, sender=modelo)
+    post_delete.connect(cadastro_alterado, sender=modelo)
+
+
+def catalogo_alterado(sender, **kwargs):
+    transaction.on_commit(invalidar_catalogo)
+
+
+# O catálogo público lista procedimentos oferecidos por profissionais ativos, com preços
+for modelo in (Procedimento, Preco, ProfissionalProcedimento, Profissional):
+    post_save.connect(catalogo_alterado, sender=modelo)
+    post_delete.connect(catalogo_alterado, sender=modelo)
+
+
+def permissoes_alteradas(sender, **kwargs):
+    transaction.on_commit(invalidar_permissoes)
+
+
+# O mapa de permissões depende de perfis, funcionalidades e da ligação entre eles
+for modelo in (Perfil, Funcionalidade, PerfilFuncionalidade):
+    post_save.connect(permissoes_alteradas, sender=modelo)
+    post_delete.connect(permissoes_alteradas, sender=modelo)
+m2m_changed.connect(permissoes_alteradas, sender=Perfil.funcionalidades.through)
+
+
+def guardar_contribuicao_original(sender, instance, **kwargs):
+    # Estado lido do banco, para retirar a contribuição antiga do resumo.
+    # (_state.adding ainda não foi ajustado aqui; instâncias novas não têm pk)
+    instance._contribuicao_original = None if instance.pk is None else contribuicao(instance.__dict__)
+
+
+def _contribuicao_no_banco(pk):
+    return contribuicao(Atendimento.objects.filter(pk=pk).values(*CAMPOS_CONTRIBUICAO).first())
+
+
+def completar_contribuicao_original(sender, instance, **kwargs):
+    # Instâncias carregadas com campos adiados (only/defer) precisam buscar o estado antigo
+    if not instance._state.adding and instance._contribuicao_original is None:
+        instance._contribuicao_original = _contribuicao_no_banco(instance.pk)
+
+
+def atendimento_salvo(sender, instance, created, **kwargs):
+    # Se o save estiver dentro de transaction.atomic, o resumo é atualizado na
+    # mesma transação; o comando recalcular_estatisticas corrige qualquer desvio
+    nova = contribuicao(instance.__dict__) or _contribuicao_no_banco(instance.pk)
+    aplicar(None if created else instance._contribuicao_original, nova)
+    instance._contribuicao_original = nova
+
+
+def atendimento_excluido(sender, instance, **kwargs):
+    aplicar(instance._contribuicao_original or contribuicao(instance.__dict__), None)
+
+
+# Resumo diário (EstatisticaDiaria) mantido incrementalmente
+post_init.connect(guardar_contribuicao_original, sender=Atendimento)
+pre_save.connect(completar_contribuicao_original, sender=Atendimento)
+post_save.connect(atendimento_salvo, sender=Atendimento)
+post_delete.connect(atendimento_excluido, sender=Atendimento)
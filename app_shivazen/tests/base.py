@@ -0,0 +1,13 @@
+# app_shivazen/tests/base.py
+"""
+Configuração comum dos testes: caches da aplicação na memória do processo
+(o banco de teste é recriado a cada execução; um cache compartilhado
+guardaria dados de execuções anteriores sob as mesmas versões).
+"""
+from django.conf import settings
+from django.test import override_settings
+
+caches_locais = override_settings(
+    WORKERS=1,
+    SHIVAZEN_CACHES={nome: {**config, 'BACKEND': 'local'} for nome, config in settings.SHIVAZEN_CACHES.items()},
+)
@@ -0,0 +1,103 @@
+# app_shivazen/tests/test_agendamentos.py
+import threading
+from collections import Counter
+from datetime import datetime, time, timedelta
+from unittest import mock, skipUnless
+
+from django.contrib.messages import get_messages
+from django.db import OperationalError, connection
+from django.test import TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from app_shivazen import agendamentos
+from app_shivazen.agendamentos import AgendaOcupada, ConflitoDeHorario, agendar
+from app_shivazen.models import Atendimento, Cliente, Procedimento, Profissional, Usuario
+
+from .base import caches_locais
+
+
+@caches_locais
+class AgendarTests(TransactionTestCase):
+    """Transações reais: a trava por profissional só é disputada entre conexões diferentes."""
+
+    TENTATIVAS = 10
+
+    def setUp(self):
+        self.profissional = Profissional.objects.create(nome='Profissional', ativo=True)
+        self.cliente = Cliente.objects.create(nome_completo='Cliente')
+        self.procedimento = Procedimento.objects.create(nome='Procedimento', duracao_minutos=60)
+        amanha = timezone.localdate() + timedelta(days=1)
+        self.inicio = timezone.make_aware(datetime.combine(amanha, time(10)))
+
+    def _ocupando_horario(self):
+        return Atendimento.objects.filter(profissional=self.profissional).ativos().sobrepondo(
+            self.inicio, self.inicio + timedelta(minutes=self.procedimento.duracao_minutos),
+        )
+
+    def test_horario_ocupado_levanta_conflito(self):
+        agendar(self.cliente, self.profissional, self.procedimento, self.inicio)
+        with self.assertRaises(ConflitoDeHorario):
+            agendar(self.cliente, self.profissional, self.procedimento, self.inicio + timedelta(minutes=30))
+        self.assertEqual(self._ocupando_horario().count(), 1)
+
+    def test_agendamentos_simultaneos_aceitam_um_so(self):
+        # No SQLite, sem SELECT ... FOR UPDATE, quem encontra o banco
+        # travado repete a transação (ver agendamentos.agendar)
+        largada = threading.Barrier(self.TENTATIVAS)
+        resultados = Counter()
+        trava_resultados = threading.Lock()
+
+        def tentar():
+            try:
+                largada.wait()
+                agendar(self.cliente, self.profissional, self.procedimento, self.inicio)
+                resultado = 'aceito'
+            except ConflitoDeHorario:
+                resultado = 'conflito'
+            except Exception as e:
+                resultado = type(e).__name__
+            finally:
+                connection.close()
+            with trava_resultados:
+                resultados[resultado] += 1
+
+        threads = [threading.Thread(target=tentar) for _ in range(self.TENTATIVAS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(resultados, Counter(aceito=1, conflito=self.TENTATIVAS - 1))
+        self.assertEqual(self._ocupando_horario().count(), 1)
+
+    @skipUnless(connection.vendor == 'sqlite', "Só o SQLite responde 'database is locked'")
+    @mock.patch.object(agendamentos, 'ESPERA_BLOQUEIO', 0)
+    def test_banco_travado_vira_agenda_ocupada(self):
+        travado = OperationalError('database is locked')
+        with mock.patch.object(agendamentos, 'enfileirar', side_effect=travado) as enfileirar:
+            with self.assertRaises(AgendaOcupada):
+                agendar(self.cliente, self.profissional, self.procedimento, self.inicio)
+        self.assertEqual(enfileirar.call_count, agendamentos.TENTATIVAS_BLOQUEIO)
+        self.assertFalse(self._ocupando_horario().exists())
+
+        # Destravado antes de acabarem as tentativas: o agendamento entra
+        real = agendamentos.enfileirar
+        with mock.patch.object(agendamentos, 'enfileirar', side_effect=[travado, travado, real]):
+            agendar(self.cliente, self.profissional, self.procedimento, self.inicio)
+        self.assertEqual(self._ocupando_horario().count(), 1)
+
+    def test_view_responde_agenda_ocupada_sem_erro(self):
+        usuario = Usuario.objects.create_user(username='cliente@exemplo.com', email='cliente@exemplo.com')
+        self.client.force_login(usuario)
+        sessao = self.client.session
+        sessao['cliente_id'] = self.cliente.pk
+        sessao.save()
+
+        with mock.patch('app_shivazen.views.agendar', side_effect=AgendaOcupada):
+            resposta = self.client.post(reverse('shivazen:agendaCadastro'), {
+                'profissional': self.profissional.pk, 'procedimento': self.procedimento.pk,
+                'horario_selecionado': self.inicio.isoformat(),
+            })
+        self.assertRedirects(resposta, reverse('shivazen:agendaCadastro'), fetch_redirect_response=False)
+        self.assertIn('Tente novamente', ' '.join(str(m) for m in get_messages(resposta.wsgi_request)))
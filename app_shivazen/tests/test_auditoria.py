@@ -0,0 +1,71 @@
+# app_shivazen/tests/test_auditoria.py
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from app_shivazen import auditoria
+from app_shivazen.models import Cliente, LogAuditoria
+
+from .base import caches_locais
+
+AUDITORIA_RAPIDA = {**settings.SHIVAZEN_AUDITORIA, 'TAMANHO_LOTE': 100, 'INTERVALO': 0.2}
+
+
+@caches_locais
+@override_settings(SHIVAZEN_AUDITORIA=AUDITORIA_RAPIDA)
+class BufferAuditoriaTests(TransactionTestCase):
+    """Transações reais: os eventos só entram no buffer no on_commit."""
+
+    def tearDown(self):
+        auditoria.buffer.descarregar()
+
+    def _esperar_gravacao(self, quantidade):
+        limite = time.monotonic() + 5
+        while LogAuditoria.objects.count() < quantidade and time.monotonic() < limite:
+            time.sleep(0.05)
+
+    def test_grava_sozinho_depois_do_intervalo(self):
+        Cliente.objects.create(nome_completo='Cliente')
+        self.assertEqual(len(auditoria.buffer), 1)
+
+        # Nenhum evento novo nem fim de requisição: só o temporizador grava
+        self._esperar_gravacao(1)
+        self.assertEqual(LogAuditoria.objects.filter(acao='CRIAR', tabela_afetada='cliente').count(), 1)
+        self.assertEqual(len(auditoria.buffer), 0)
+
+    def test_descarta_eventos_de_outro_banco(self):
+        Cliente.objects.create(nome_completo='Cliente')
+        # Como na saída do processo de testes, com o banco de teste já destruído
+        nome = connection.settings_dict['NAME']
+        connection.settings_dict['NAME'] = 'outro_banco'
+        try:
+            self.assertEqual(auditoria.buffer.descarregar(), 0)
+        finally:
+            connection.settings_dict['NAME'] = nome
+        self.assertEqual(LogAuditoria.objects.count(), 0)
+
+
+class ParticoesTests(TransactionTestCase):
+    def setUp(self):
+        if not auditoria.particionada():
+            self.skipTest('log_auditoria só é particionada no PostgreSQL')
+
+    def test_move_linhas_da_particao_padrao_ao_criar_o_mes(self):
+        hoje = timezone.localdate()
+        inicio = auditoria.inicio_do_mes(hoje.year, hoje.month + 12)
+        nome = auditoria.nome_particao(inicio.year, inicio.month)
+        # Mês sem partição: a linha cai na partição padrão
+        LogAuditoria.objects.create(acao='CRIAR', data_hora=inicio + timedelta(days=2))
+
+        self.assertIn(nome, auditoria.criar_particoes(meses_a_frente=12))
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {nome}')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute(f'SELECT count(*) FROM {auditoria.PARTICAO_PADRAO}')
+            self.assertEqual(cursor.fetchone()[0], 0)
+        # Uma segunda execução não tenta recriar nada
+        self.assertEqual(auditoria.criar_particoes(meses_a_frente=12), [])
@@ -0,0 +1,37 @@
+# app_shivazen/tests/test_bloqueios.py
+from datetime import date, time
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+
+from app_shivazen.models import BloqueioRecorrente
+
+
+class DiasSemanaTests(TestCase):
+    def _regra(self, dias_semana):
+        return BloqueioRecorrente(
+            frequencia='SEMANAL', dias_semana=dias_semana,
+            hora_inicio=time(12), hora_fim=time(13), data_inicio=date(2026, 1, 5),
+        )
+
+    def test_aceita_dias_validos(self):
+        for dias_semana in ('', '1', '2,3,4,5,6', '7,1'):
+            with self.subTest(dias_semana=dias_semana):
+                self._regra(dias_semana).full_clean()
+
+    def test_rejeita_dias_invalidos(self):
+        for dias_semana in ('seg', '8', '0', '2,,3', '2,3,', '2, 3', '23'):
+            with self.subTest(dias_semana=dias_semana):
+                with self.assertRaises(ValidationError) as erro:
+                    self._regra(dias_semana).full_clean()
+                self.assertIn('dias_semana', erro.exception.message_dict)
+
+    def test_banco_rejeita_dias_invalidos(self):
+        # Gravações que não passam por full_clean (ex: update, bulk_create)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self._regra('seg').save()
+        regra = self._regra('2,4')
+        regra.save()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            BloqueioRecorrente.objects.filter(pk=regra.pk).update(dias_semana='2,8')
@@ -0,0 +1,131 @@
+# app_shivazen/tests/test_consultas.py
+"""
+Detector de N+1: renderiza cada rota de app_shivazen/urls.py sobre dados
+sintéticos no banco de teste e confere o número de consultas de cada view.
+
+Uma rota nova sem entrada em CONSULTAS também é uma falha: toda view
+precisa ter a quantidade declarada. Os caches da aplicação são invalidados
+antes de cada requisição, então a contagem vale para o caminho sem cache.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from app_shivazen import urls
+from app_shivazen.catalogo import invalidar_catalogo
+from app_shivazen.dados_sinteticos import semear
+from app_shivazen.dashboard import invalidar_dashboard
+from app_shivazen.disponibilidade import invalidar_profissional
+from app_shivazen.models import BloqueioAgenda, Cliente, Preco, Procedimento, Profissional, Usuario
+
+from .base import caches_locais
+
+# nome da rota -> (método, usuário, consultas)
+# usuário: None (anônimo), 'cliente' ou 'staff'. As consultas de sessão e
+# usuário do login (2) entram na conta.
+CONSULTAS = {
+    'inicio': ('get', None, 1),
+    'quemsomos': ('get', None, 0),
+    'termosUso': ('get', None, 0),
+    'politicaPrivacidade': ('get', None, 0),
+    'agendaContato': ('get', None, 0),
+    'usuarioCadastro': ('get', None, 0),
+    'usuarioLogin': ('get', None, 0),
+    'usuarioLogout': ('get', 'cliente', 3),
+    'esqueciSenha': ('get', None, 0),
+    'painel': ('get', 'cliente', 6),
+    'adminDashboard': ('get', 'staff', 5),
+    'agendaCadastro': ('get', 'cliente', 2),
+    'prontuarioconsentimento': ('get', 'cliente', 1),
+    'profissionalCadastro': ('get', 'staff', 2),
+    'profissionalEditar': ('get', 'staff', 1),
+    'adminAgendamentos': ('get', 'staff', 2),
+    'exportarAgendamentos': ('get', 'staff', 2),
+    'adminProcedimentos': ('get', 'staff', 3),
+    'adminBloqueios': ('get', 'staff', 2),
+    'criarBloqueio': ('get', 'staff', 2),
+    'excluirBloqueio': ('post', 'staff', 3),
+    'buscar_procedimentos': ('get', 'cliente', 4),
+    'buscar_horarios': ('post', 'cliente', 8),
+    'buscar_horarios_periodo': ('post', 'cliente', 8),
+    'buscar_clientes': ('get', 'staff', 2),
+}
+
+
+@caches_locais
+class ConsultasPorViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Centenas de profissionais e dezenas de milhares de atendimentos: um
+        # N+1 faria a contagem crescer com o volume, não ficar constante
+        semear(profissionais=300, clientes=5000, atendimentos=30000, procedimentos=30)
+        cls.cliente = Cliente.objects.exclude(email=None).first()
+        profissional = Profissional.objects.filter(
+            ativo=True, profissionalprocedimento__isnull=False,
+        ).first()
+        procedimento = Procedimento.objects.filter(profissionalprocedimento__profissional=profissional).first()
+
+        # Preços por profissional, para pegar N+1 em preco.profissional
+        Preco.objects.bulk_create([
+            Preco(procedimento=proc, profissional=prof, valor=Decimal('150'))
+            for proc in Procedimento.objects.all()[:10]
+            for prof in Profissional.objects.all()[:3]
+        ])
+        agora = timezone.now()
+        bloqueio = BloqueioAgenda.objects.create(
+            profissional=profissional, data_hora_inicio=agora + timedelta(days=1),
+            data_hora_fim=agora + timedelta(days=1, hours=1), motivo='teste',
+        )
+
+        cls.usuarios = {
+            'cliente': Usuario.objects.create_user(
+                username=cls.cliente.email, email=cls.cliente.email, password=None,
+            ),
+            'staff': Usuario.objects.create_user(
+                username='staff@exemplo.com', email='staff@exemplo.com', password=None, is_staff=True,
+            ),
+        }
+        amanha = (timezone.localdate() + timedelta(days=1)).isoformat()
+        cls.requisicoes = {
+            'excluirBloqueio': {'kwargs': {'bloqueio_id': bloqueio.pk}},
+            'buscar_horarios': {'dados': {
+                'id_profissional': profissional.pk, 'id_procedimento': procedimento.pk, 'data': amanha,
+            }},
+            'buscar_horarios_periodo': {'dados': {
+                'id_procedimento': procedimento.pk, 'data_inicio': amanha, 'dias': 14,
+            }},
+            'adminAgendamentos': {'dados': {'status': 'REALIZADO'}},
+            'buscar_clientes': {'dados': {'q': cls.cliente.nome_completo[:5]}},
+        }
+
+    def _entrar(self, papel):
+        if papel is not None:
+            self.client.force_login(self.usuarios[papel])
+            # agendaCadastro lê o cliente da sessão
+            sessao = self.client.session
+            sessao['cliente_id'] = self.cliente.pk
+            sessao.save()
+
+    def test_toda_rota_tem_contagem(self):
+        sem_contagem = sorted(padrao.name for padrao in urls.urlpatterns if padrao.name not in CONSULTAS)
+        self.assertEqual(sem_contagem, [])
+
+    def test_consultas_por_view(self):
+        for nome, (metodo, papel, consultas) in CONSULTAS.items():
+            with self.subTest(nome):
+                self.client.logout()
+                self._entrar(papel)
+                extra = self.requisicoes.get(nome, {})
+                url = reverse(f'shivazen:{nome}', kwargs=extra.get('kwargs'))
+                invalidar_catalogo()
+                invalidar_dashboard()
+                invalidar_profissional(None)
+
+                with self.assertNumQueries(consultas):
+                    resposta = getattr(self.client, metodo)(url, extra.get('dados', {}))
+                    if resposta.streaming:
+                        b''.join(resposta.streaming_content)
+                self.assertLess(resposta.status_code, 400)
@@ -0,0 +1,65 @@
+# app_shivazen/tests/test_importacao.py
+from decimal import Decimal
+
+from django.test import TestCase
+
+from app_shivazen.importacao_exportacao import importar
+from app_shivazen.models import Atendimento, Cliente, Preco, Procedimento, Profissional
+
+from .base import caches_locais
+
+
+@caches_locais
+class ImportacaoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.profissional = Profissional.objects.create(nome='Profissional', ativo=True)
+        cls.procedimento = Procedimento.objects.create(nome='Procedimento', duracao_minutos=60)
+
+    def _importar(self, nome_tipo, registros, **opcoes):
+        return importar(nome_tipo, registros, usar_copy=False, **opcoes)
+
+    def test_conta_so_clientes_inseridos(self):
+        registros = [
+            {'nome_completo': 'Ana', 'cpf': '111.111.111-11', 'ativo': 'True'},
+            {'nome_completo': 'Bia', 'cpf': '222.222.222-22', 'ativo': 'True'},
+        ]
+        self.assertEqual(self._importar('clientes', registros)['inseridos'], 2)
+
+        registros.append({'nome_completo': 'Carla', 'cpf': '', 'ativo': 'True'})
+        resumo = self._importar('clientes', registros)
+        self.assertEqual((resumo['lidos'], resumo['inseridos'], resumo['atualizados']), (3, 1, 0))
+
+        registros[0]['nome_completo'] = 'Ana Maria'
+        resumo = self._importar('clientes', registros[:1], ao_conflitar='atualizar')
+        self.assertEqual((resumo['inseridos'], resumo['atualizados']), (0, 1))
+        self.assertEqual(Cliente.objects.get(cpf='111.111.111-11').nome_busca, 'ana maria')
+        self.assertEqual(Cliente.objects.count(), 3)
+
+    def test_precos_pela_chave_natural(self):
+        registros = [
+            {'procedimento_id': self.procedimento.pk, 'profissional_id': self.profissional.pk, 'valor': '150'},
+            {'procedimento_id': self.procedimento.pk, 'profissional_id': '', 'valor': '120'},
+            # Repetida no mesmo arquivo: vale a primeira
+            {'procedimento_id': self.procedimento.pk, 'profissional_id': '', 'valor': '130'},
+        ]
+        self.assertEqual(self._importar('precos', registros)['inseridos'], 2)
+        self.assertEqual(self._importar('precos', registros)['inseridos'], 0)
+
+        registros[1]['valor'] = '100'
+        resumo = self._importar('precos', registros[:2], ao_conflitar='atualizar')
+        self.assertEqual((resumo['inseridos'], resumo['atualizados']), (0, 2))
+        self.assertEqual(
+            dict(Preco.objects.values_list('profissional_id', 'valor')),
+            {self.profissional.pk: Decimal('150'), None: Decimal('100')},
+        )
+
+    def test_atendimento_acha_cliente_pelos_digitos_do_cpf(self):
+        cliente = Cliente.objects.create(nome_completo='Ana', cpf='12345678900')
+        resumo = self._importar('atendimentos', [{
+            'cliente_cpf': '123.456.789-00', 'profissional_id': self.profissional.pk,
+            'procedimento_id': self.procedimento.pk, 'data_hora_inicio': '2026-03-02T10:00:00',
+            'data_hora_fim': '2026-03-02T11:00:00', 'status_atendimento': 'REALIZADO',
+        }])
+        self.assertEqual(resumo['inseridos'], 1)
+        self.assertEqual(Atendimento.objects.get().cliente, cliente)
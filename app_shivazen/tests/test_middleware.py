@@ -0,0 +1,14 @@
+# app_shivazen/tests/test_middleware.py
+from asgiref.sync import iscoroutinefunction
+
+from django.core.handlers.asgi import ASGIHandler
+from django.test import SimpleTestCase, override_settings
+
+
+class PilhaAssincronaTests(SimpleTestCase):
+    # O Django só registra as adaptações com DEBUG ligado
+    @override_settings(DEBUG=True)
+    def test_asgi_nao_adapta_nenhum_middleware(self):
+        with self.assertNoLogs('django.request', 'DEBUG'):
+            handler = ASGIHandler()
+        self.assertTrue(iscoroutinefunction(handler._middleware_chain))
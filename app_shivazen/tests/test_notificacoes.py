@@ -0,0 +1,92 @@
+# app_shivazen/tests/test_notificacoes.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from app_shivazen import notificacoes
+from app_shivazen.models import Atendimento, Cliente, Notificacao, Procedimento, Profissional
+
+from .base import caches_locais
+
+
+def _configuracao(**extra):
+    return {**settings.SHIVAZEN_NOTIFICACOES, **extra}
+
+
+@caches_locais
+class NotificacoesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.cliente = Cliente.objects.create(
+            nome_completo='Cliente', email='cliente@exemplo.com', telefone='(11) 98888-7777',
+        )
+        cls.profissional = Profissional.objects.create(nome='Profissional', ativo=True)
+        cls.procedimento = Procedimento.objects.create(nome='Procedimento', duracao_minutos=60)
+
+    def _atendimento(self, inicio):
+        return Atendimento.objects.create(
+            cliente=self.cliente, profissional=self.profissional, procedimento=self.procedimento,
+            data_hora_inicio=inicio, data_hora_fim=inicio + timedelta(hours=1),
+            status_atendimento='AGENDADO',
+        )
+
+    @override_settings(SHIVAZEN_NOTIFICACOES=_configuracao(CANAIS={'EMAIL': 'app_shivazen.notificacoes.BackendEmail'}))
+    def test_canal_sem_backend_nao_recebe_notificacoes(self):
+        atendimento = self._atendimento(timezone.now() + timedelta(days=2))
+        criadas = notificacoes.enfileirar(atendimento)
+        self.assertEqual([notificacao.canal for notificacao in criadas], ['EMAIL'])
+
+    @override_settings(SHIVAZEN_NOTIFICACOES=_configuracao(MAX_TENTATIVAS=2))
+    def test_prazo_esgotado_conta_como_tentativa(self):
+        atendimento = self._atendimento(timezone.now() + timedelta(days=2))
+        vencida = timezone.now() - timedelta(seconds=1)
+        notificacao = Notificacao.objects.create(
+            atendimento=atendimento, canal='EMAIL', status_envio=notificacoes.PROCESSANDO,
+            proxima_tentativa=vencida,
+        )
+
+        self.assertEqual(notificacoes.reivindicar_lote(10), [notificacao])
+        notificacao.refresh_from_db()
+        self.assertEqual((notificacao.status_envio, notificacao.tentativas), (notificacoes.PROCESSANDO, 1))
+
+        # O worker "morreu" de novo: a segunda perda do prazo esgota as tentativas
+        Notificacao.objects.filter(pk=notificacao.pk).update(proxima_tentativa=vencida)
+        self.assertEqual(notificacoes.reivindicar_lote(10), [])
+        notificacao.refresh_from_db()
+        self.assertEqual((notificacao.status_envio, notificacao.tentativas), (notificacoes.FALHOU, 2))
+
+    def _lembretes(self):
+        return sorted(Notificacao.objects.filter(tipo__startswith='LEMBRETE').values_list(
+            'atendimento_id', 'canal', 'tipo',
+        ))
+
+    def test_primeira_execucao_envia_so_o_lembrete_mais_proximo(self):
+        agora = timezone.now()
+        em_uma_hora = self._atendimento(agora + timedelta(hours=1))
+        em_dez_horas = self._atendimento(agora + timedelta(hours=10))
+
+        self.assertEqual(notificacoes.gerar_lembretes(agora), 2)
+        self.assertEqual(self._lembretes(), [
+            (em_uma_hora.pk, 'EMAIL', 'LEMBRETE_2H'),
+            (em_dez_horas.pk, 'EMAIL', 'LEMBRETE_24H'),
+        ])
+
+    def test_pausa_longa_nao_manda_o_lembrete_vencido(self):
+        agora = timezone.now()
+        notificacoes.gerar_lembretes(agora - timedelta(hours=30))
+        atendimento = self._atendimento(agora + timedelta(hours=1))
+
+        self.assertEqual(notificacoes.gerar_lembretes(agora), 1)
+        self.assertEqual(self._lembretes(), [(atendimento.pk, 'EMAIL', 'LEMBRETE_2H')])
+
+    def test_conta_so_as_notificacoes_criadas(self):
+        agora = timezone.now()
+        atendimento = self._atendimento(agora + timedelta(hours=10))
+        Notificacao.objects.create(
+            atendimento=atendimento, canal='EMAIL', tipo='LEMBRETE_24H', status_envio=notificacoes.ENVIADO,
+        )
+
+        self.assertEqual(notificacoes.gerar_lembretes(agora), 0)
+        self.assertEqual(len(self._lembretes()), 1)
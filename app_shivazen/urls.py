@@ -28,6 +28,7 @@ urlpatterns = [
     
     # --- Rotas Administrativas ---
     path('admin/agendamentos/', views.adminAgendamentos, name='adminAgendamentos'),
+    path('admin/agendamentos/exportar/', views.exportarAgendamentos, name='exportarAgendamentos'),
     path('admin/procedimentos/', views.adminProcedimentos, name='adminProcedimentos'),
     path('admin/bloqueios/', views.adminBloqueios, name='adminBloqueios'),
     path('admin/bloqueios/criar/', views.criarBloqueio, name='criarBloqueio'),
@@ -36,4 +37,6 @@ urlpatterns = [
     # --- Rotas para chamadas AJAX do agendamento ---
     path('ajax/buscar-procedimentos/', views.buscar_procedimentos, name='buscar_procedimentos'),
     path('ajax/buscar-horarios/', views.buscar_horarios, name='buscar_horarios'),
+    path('ajax/buscar-horarios-periodo/', views.buscar_horarios_periodo, name='buscar_horarios_periodo'),
+    path('ajax/buscar-clientes/', views.buscar_clientes, name='buscar_clientes'),
 ]
\ No newline at end of file
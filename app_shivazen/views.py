@@ -6,23 +6,53 @@ from django.contrib import messages
 # Adicionado sistema de autenticação padrão do Django
 from django.contrib.auth import authenticate, login as auth_login, logout as auth_logout
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Prefetch
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
 from datetime import datetime, timedelta
+import csv
 import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
 # Importamos o NOVO modelo de usuário
-from .models import * # --- Páginas Abertas ---
+from .models import * 
+from .agendamentos import AgendaOcupada, ConflitoDeHorario, agendar
+from .busca_clientes import buscar_clientes as buscar_clientes_por_termo, somente_digitos
+from .catalogo import amapa_procedimentos, contexto_catalogo, pagina_publica
+from .dashboard import obter_snapshot
+from .disponibilidade import ahorarios_disponiveis_em_cache, calcular_grade_periodo
+from .paginacao import CursorInvalido, paginar_por_chave
+from . import permissoes
+from .permissoes import nome_perfil, obter_cliente, requer_funcionalidade
+from .profissionais import DIAS_SEMANA, cadastrar_profissional
+
+MAX_DIAS_PERIODO = 31 # Limite de dias por consulta de disponibilidade em lote
+TAMANHO_PAGINA_AGENDAMENTOS = 50
+TAMANHO_LOTE_EXPORTACAO = 2000
+CABECALHO_EXPORTACAO = ['Data/Hora', 'Cliente', 'CPF', 'Profissional', 'Procedimento', 'Status', 'Valor']
+
+# --- Páginas Abertas ---
+@pagina_publica
 def home(request):
-    return render(request, 'inicio/home.html')
+    return render(request, 'inicio/home.html', contexto_catalogo())
 
+@pagina_publica
 def termosUso(request):
     return render(request, 'inicio/termosUso.html')
 
+@pagina_publica
 def politicaPrivacidade(request):
     return render(request, 'inicio/politicaPrivacidade.html')
 
+@pagina_publica
 def quemsomos(request):
     return render(request, 'inicio/quemsomos.html')
 
+@pagina_publica
 def agendaContato(request):
     return render(request, 'agenda/contato.html')
 
@@ -36,7 +66,9 @@ def usuarioCadastro(request):
         senha = request.POST.get('senha')
 
         # Verifica se Cliente (CPF) ou Usuário (Email) já existem
-        if Cliente.objects.filter(cpf=cpf).exists() or Usuario.objects.filter(email=email).exists():
+        cpf_digitos = somente_digitos(cpf)
+        cpf_existe = cpf_digitos is not None and Cliente.objects.filter(cpf_digitos=cpf_digitos).exists()
+        if cpf_existe or Usuario.objects.filter(email=email).exists():
             messages.error(request, 'CPF ou E-mail já cadastrado.')
             return redirect('shivazen:usuarioCadastro')
 
@@ -76,18 +108,19 @@ def usuarioLogin(request):
         login_identifier = request.POST.get('login') # Pode ser email ou CPF
         senha = request.POST.get('senha')
         email_para_auth = None
+        cliente = None
 
         try:
             # 1. Tenta identificar o email
             if '@' in login_identifier:
                 email_para_auth = login_identifier
             else:
-                # Se não for email, busca o cliente pelo CPF
-                try:
-                    cliente = Cliente.objects.get(cpf=login_identifier)
+                # Se não for email, busca o cliente pelo CPF (com ou sem pontuação)
+                cpf_digitos = somente_digitos(login_identifier)
+                cliente = Cliente.objects.filter(cpf_digitos=cpf_digitos).only('email').first() if cpf_digitos else None
+                if cliente is not None:
                     email_para_auth = cliente.email
-                except Cliente.DoesNotExist:
-                    pass # Se não achar, o 'authenticate' vai falhar
+                # Se não achar, o 'authenticate' vai falhar
             
             if not email_para_auth:
                 messages.error(request, 'E-mail/CPF ou senha incorretos.')
@@ -103,8 +136,9 @@ def usuarioLogin(request):
                 # 4. Armazena dados da sessão
                 request.session['usuario_id'] = usuario_autenticado.id
                 request.session['usuario_nome'] = usuario_autenticado.first_name
-                if usuario_autenticado.perfil:
-                    request.session['usuario_perfil'] = usuario_autenticado.perfil.nome
+                perfil = nome_perfil(usuario_autenticado)  # Do mapa de permissões em cache
+                if perfil:
+                    request.session['usuario_perfil'] = perfil
 
                 # 5. Redireciona baseado no perfil
                 # 'is_staff' é um campo padrão do Django para acesso ao Admin
@@ -112,12 +146,12 @@ def usuarioLogin(request):
                     messages.success(request, f'Bem-vindo(a), {usuario_autenticado.first_name}!')
                     return redirect('shivazen:adminDashboard')
                 else:
-                    # Se for cliente, guarda o ID do cliente na sessão
-                    try:
-                        cliente = Cliente.objects.get(email=usuario_autenticado.email)
+                    # Se for cliente, guarda o ID do cliente na sessão (lido por request.cliente).
+                    # Quem entrou pelo CPF já tem o cliente; senão, busca pelo e-mail
+                    if cliente is not None:
                         request.session['cliente_id'] = cliente.id_cliente
-                    except Cliente.DoesNotExist:
-                        pass # Usuário sem cliente associado
+                    else:
+                        obter_cliente(request)
                     messages.success(request, f'Bem-vindo(a), {usuario_autenticado.first_name}!')
                     return redirect('shivazen:painel')
             else:
@@ -148,88 +182,70 @@ def painel(request):
     if request.user.is_staff:
         return redirect('shivazen:adminDashboard')
     
-    # Busca o cliente associado ao usuário
-    try:
-        cliente = Cliente.objects.get(email=request.user.email)
-        cliente_id = cliente.id_cliente
-        
-        # Busca agendamentos do cliente
-        agendamentos = Atendimento.objects.filter(
-            cliente_id=cliente_id
-        ).select_related('profissional', 'procedimento').order_by('-data_hora_inicio')[:10]
-        
-        # Estatísticas do cliente
-        agendamentos_proximos = Atendimento.objects.filter(
-            cliente_id=cliente_id,
-            data_hora_inicio__gte=datetime.now(),
-            status_atendimento__in=['AGENDADO', 'CONFIRMADO']
-        ).select_related('profissional', 'procedimento').order_by('data_hora_inicio')[:5]
-        
-        total_agendamentos = Atendimento.objects.filter(cliente_id=cliente_id).count()
-        agendamentos_realizados = Atendimento.objects.filter(
-            cliente_id=cliente_id,
-            status_atendimento='REALIZADO'
-        ).count()
-        
-        context = {
-            'cliente': cliente,
-            'agendamentos': agendamentos,
-            'agendamentos_proximos': agendamentos_proximos,
-            'total_agendamentos': total_agendamentos,
-            'agendamentos_realizados': agendamentos_realizados,
-        }
-        
-        return render(request, 'telas/tela_painel.html', context)
-    except Cliente.DoesNotExist:
+    # Cliente associado ao usuário (carregado uma vez por requisição, ver permissoes.py)
+    cliente = request.cliente
+    if not cliente:
         messages.error(request, 'Cliente não encontrado. Entre em contato com o suporte.')
         return redirect('shivazen:usuarioLogout')
+    cliente_id = cliente.id_cliente
+    
+    # Busca agendamentos do cliente
+    agendamentos = Atendimento.objects.filter(
+        cliente_id=cliente_id
+    ).select_related('profissional', 'procedimento').order_by('-data_hora_inicio')[:10]
+    
+    # Estatísticas do cliente
+    agendamentos_proximos = Atendimento.objects.filter(
+        cliente_id=cliente_id,
+        data_hora_inicio__gte=timezone.now(),
+        status_atendimento__in=['AGENDADO', 'CONFIRMADO']
+    ).select_related('profissional', 'procedimento').order_by('data_hora_inicio')[:5]
+    
+    total_agendamentos = Atendimento.objects.filter(cliente_id=cliente_id).count()
+    agendamentos_realizados = Atendimento.objects.filter(
+        cliente_id=cliente_id,
+        status_atendimento='REALIZADO'
+    ).count()
+    
+    context = {
+        'cliente': cliente,
+        'agendamentos': agendamentos,
+        'agendamentos_proximos': agendamentos_proximos,
+        'total_agendamentos': total_agendamentos,
+        'agendamentos_realizados': agendamentos_realizados,
+    }
+    
+    return render(request, 'telas/tela_painel.html', context)
 
 @login_required(login_url='/login/')
 def agendaCadastro(request):
     if request.method == 'POST':
         try:
-            id_cliente = request.session.get('cliente_id')
+            cliente = request.cliente
             id_profissional = request.POST.get('profissional')
             id_procedimento = request.POST.get('procedimento')
             data_hora_str = request.POST.get('horario_selecionado') # Ex: "2024-10-30T10:30:00"
             
-            if not all([id_cliente, id_profissional, id_procedimento, data_hora_str]):
+            if not all([cliente, id_profissional, id_procedimento, data_hora_str]):
                 messages.error(request, 'Todos os campos são obrigatórios.')
                 return redirect('shivazen:agendaCadastro')
 
             data_hora_inicio = datetime.fromisoformat(data_hora_str)
             
-            cliente = Cliente.objects.get(pk=id_cliente)
             profissional = Profissional.objects.get(pk=id_profissional)
             procedimento = Procedimento.objects.get(pk=id_procedimento)
 
-            data_hora_fim = data_hora_inicio + timedelta(minutes=procedimento.duracao_minutos)
-
-            # Lógica de conflito (mantida)
-            conflitos = Atendimento.objects.filter(
-                profissional=profissional,
-                data_hora_inicio__lt=data_hora_fim,
-                data_hora_fim__gt=data_hora_inicio,
-                status_atendimento__in=['AGENDADO', 'CONFIRMADO']
-            ).exists()
-
-            if conflitos:
-                messages.error(request, 'Este horário já foi agendado. Por favor, escolha outro.')
-                return redirect('shivazen:agendaCadastro')
-
-            Atendimento.objects.create(
-                cliente=cliente,
-                profissional=profissional,
-                procedimento=procedimento,
-                data_hora_inicio=data_hora_inicio,
-                data_hora_fim=data_hora_fim,
-                status_atendimento='AGENDADO'
-            )
+            # Verificação de conflito e inserção atômicas (ver agendamentos.py)
+            agendar(cliente, profissional, procedimento, data_hora_inicio)
             messages.success(request, 'Seu agendamento foi realizado com sucesso!')
             return redirect('shivazen:painel')
 
-        except (Cliente.DoesNotExist, Profissional.DoesNotExist, Procedimento.DoesNotExist):
-            messages.error(request, 'Erro ao encontrar dados essenciais (cliente, profissional ou procedimento).')
+        except AgendaOcupada:
+            messages.error(request, 'A agenda está sendo atualizada por outro agendamento. Tente novamente em instantes.')
+        except ConflitoDeHorario:
+            messages.error(request, 'Este horário já foi agendado. Por favor, escolha outro.')
+        except (Profissional.DoesNotExist, Procedimento.DoesNotExist):
+            messages.error(request, 'Erro ao encontrar dados essenciais (profissional ou procedimento).')
         except ValueError:
              messages.error(request, 'Formato de data ou hora inválido.')
         except Exception as e:
@@ -243,36 +259,53 @@ def agendaCadastro(request):
 
 # --- VIEWS AUXILIARES PARA AJAX (Refatoradas) ---
 @login_required(login_url='/login/')
-def buscar_procedimentos(request):
+async def buscar_procedimentos(request):
+    """
+    Procedimentos de cada profissional, servidos da memória (ver catalogo.py).
+    GET devolve o mapa inteiro com ETag, para a tela de agendamento filtrar
+    no navegador; POST com id_profissional devolve só a lista dele.
+    """
+    mapa = await amapa_procedimentos()
+    if request.method == 'GET':
+        resposta = HttpResponse(mapa['conteudo'], content_type='application/json')
+        resposta['ETag'] = mapa['etag']
+        patch_cache_control(resposta, private=True, max_age=0, must_revalidate=True)
+        return get_conditional_response(request, etag=mapa['etag'], response=resposta)
     if request.method == 'POST':
-        id_profissional = request.POST.get('id_profissional')
-        try:
-            profissional = Profissional.objects.get(pk=id_profissional)
-            # 'procedimento_set' é o related_name reverso do ManyToMany
-            procedimentos = profissional.procedimento_set.filter(ativo=True).values('id_procedimento', 'nome')
-            return JsonResponse(list(procedimentos), safe=False)
-        except Profissional.DoesNotExist:
+        procedimentos = mapa['profissionais'].get(request.POST.get('id_profissional', ''))
+        if procedimentos is None:
             return JsonResponse({'error': 'Profissional não encontrado'}, status=404)
+        return JsonResponse(procedimentos, safe=False)
     return JsonResponse({'error': 'Requisição inválida'}, status=400)
 
 @login_required(login_url='/login/')
-def buscar_horarios(request):
+async def buscar_horarios(request):
+    """View assíncrona: as consultas da agenda rodam sem prender um worker"""
     if request.method == 'POST':
         id_profissional = request.POST.get('id_profissional')
+        id_procedimento = request.POST.get('id_procedimento') # Opcional
         data_selecionada_str = request.POST.get('data') # Ex: "2024-10-30"
         try:
             data_selecionada = datetime.strptime(data_selecionada_str, '%Y-%m-%d').date()
-            profissional = Profissional.objects.get(pk=id_profissional)
+            profissional = await Profissional.objects.only('pk').aget(pk=id_profissional)
+
+            # Se o procedimento for informado, considera a sua duração
+            duracao_minutos = None
+            if id_procedimento:
+                duracao_minutos = await Procedimento.objects.values_list(
+                    'duracao_minutos', flat=True
+                ).aget(pk=id_procedimento)
             
-            # --- LÓGICA MOVIDA PARA O MODELO ---
-            # Chamamos a função que criamos no models.py
-            horarios_disponiveis = profissional.get_horarios_disponiveis(data_selecionada)
-            # --- FIM DA LÓGICA MOVIDA ---
+            horarios_disponiveis = await ahorarios_disponiveis_em_cache(
+                profissional.pk, data_selecionada, duracao_minutos
+            )
 
             return JsonResponse({'horarios': horarios_disponiveis})
         
         except Profissional.DoesNotExist:
             return JsonResponse({'error': 'Profissional não encontrado'}, status=404)
+        except Procedimento.DoesNotExist:
+            return JsonResponse({'error': 'Procedimento não encontrado'}, status=404)
         except ValueError:
             return JsonResponse({'error': 'Data em formato inválido'}, status=400)
         except Exception as e:
@@ -280,58 +313,101 @@ def buscar_horarios(request):
             
     return JsonResponse({'error': 'Requisição inválida'}, status=400)
 
+@login_required(login_url='/login/')
+def buscar_horarios_periodo(request):
+    """
+    Retorna a disponibilidade de um período (ex: 14 dias) em uma única
+    chamada, para um profissional ou para todos os que realizam o procedimento.
+    """
+    if request.method == 'POST':
+        id_profissional = request.POST.get('id_profissional')
+        id_procedimento = request.POST.get('id_procedimento')
+        data_inicio_str = request.POST.get('data_inicio') # Ex: "2024-10-30"
+        try:
+            data_inicio = datetime.strptime(data_inicio_str, '%Y-%m-%d').date()
+            dias = min(int(request.POST.get('dias', 7)), MAX_DIAS_PERIODO)
+            if dias < 1:
+                raise ValueError
+
+            duracao = None
+            profissionais = Profissional.objects.filter(ativo=True)
+            if id_procedimento:
+                duracao_minutos = Procedimento.objects.values_list(
+                    'duracao_minutos', flat=True
+                ).get(pk=id_procedimento)
+                duracao = timedelta(minutes=duracao_minutos)
+                profissionais = profissionais.filter(
+                    profissionalprocedimento__procedimento_id=id_procedimento
+                )
+            if id_profissional:
+                profissionais = profissionais.filter(pk=id_profissional)
+            elif not id_procedimento:
+                return JsonResponse({'error': 'Informe o profissional ou o procedimento'}, status=400)
+
+            nomes = dict(profissionais.values_list('id_profissional', 'nome'))
+            grade = calcular_grade_periodo(nomes.keys(), data_inicio, dias, duracao=duracao)
+
+            return JsonResponse({
+                'profissionais': [
+                    {'id_profissional': id_prof, 'nome': nomes[id_prof], 'horarios': grade[id_prof]}
+                    for id_prof in nomes
+                ]
+            })
+
+        except Procedimento.DoesNotExist:
+            return JsonResponse({'error': 'Procedimento não encontrado'}, status=404)
+        except (TypeError, ValueError):
+            return JsonResponse({'error': 'Data ou quantidade de dias em formato inválido'}, status=400)
+        except Exception as e:
+            return JsonResponse({'error': f'Erro interno: {e}'}, status=500)
+
+    return JsonResponse({'error': 'Requisição inválida'}, status=400)
+
+@requer_funcionalidade(permissoes.CLIENTES, json=True)
+def buscar_clientes(request):
+    """Typeahead de clientes para a equipe: ?q= nome, CPF ou telefone (ver busca_clientes.py)"""
+    clientes = buscar_clientes_por_termo(request.GET.get('q', ''))
+    return JsonResponse({
+        'clientes': [
+            {
+                'id': cliente['id_cliente'],
+                'nome': cliente['nome_completo'],
+                'cpf': cliente['cpf'],
+                'telefone': cliente['telefone'],
+                'email': cliente['email'],
+            }
+            for cliente in clientes
+        ]
+    })
+
 # --- Telas Administrativas (Stubs) ---
 @login_required(login_url='/login/')
 def prontuarioconsentimento(request):
     return render(request, 'telas/ProntuarioConsentimento.html') 
 
-@login_required(login_url='/login/')
+@requer_funcionalidade(permissoes.PROFISSIONAIS)
 def profissionalCadastro(request):
-    if not request.user.is_staff:
-        messages.error(request, 'Acesso negado. Você precisa ser administrador.')
-        return redirect('shivazen:painel')
-    
     if request.method == 'POST':
+        nome = request.POST.get('nome')
+        horarios = [
+            {
+                'dia_semana': dia_semana,
+                'hora_inicio': request.POST.get(f'hora_inicio_{dia}'),
+                'hora_fim': request.POST.get(f'hora_fim_{dia}'),
+            }
+            for dia, dia_semana in DIAS_SEMANA.items()
+            if request.POST.get(f'trabalha_{dia}') == 'on'
+            and request.POST.get(f'hora_inicio_{dia}') and request.POST.get(f'hora_fim_{dia}')
+        ]
         try:
-            nome = request.POST.get('nome')
-            especialidade = request.POST.get('especialidade', '')
-            ativo = request.POST.get('ativo') == 'on'
-            
-            profissional = Profissional.objects.create(
+            # Profissional, horários e procedimentos em uma transação (ver profissionais.py)
+            cadastrar_profissional(
                 nome=nome,
-                especialidade=especialidade,
-                ativo=ativo
+                especialidade=request.POST.get('especialidade', ''),
+                ativo=request.POST.get('ativo') == 'on',
+                horarios=horarios,
+                procedimentos=request.POST.getlist('procedimentos'),
             )
-            
-            # Processa disponibilidades
-            dias_semana = ['segunda', 'terca', 'quarta', 'quinta', 'sexta', 'sabado', 'domingo']
-            dia_numero = {'segunda': 2, 'terca': 3, 'quarta': 4, 'quinta': 5, 'sexta': 6, 'sabado': 7, 'domingo': 1}
-            
-            for dia in dias_semana:
-                hora_inicio = request.POST.get(f'hora_inicio_{dia}')
-                hora_fim = request.POST.get(f'hora_fim_{dia}')
-                trabalha = request.POST.get(f'trabalha_{dia}') == 'on'
-                
-                if trabalha and hora_inicio and hora_fim:
-                    DisponibilidadeProfissional.objects.create(
-                        profissional=profissional,
-                        dia_semana=dia_numero[dia],
-                        hora_inicio=hora_inicio,
-                        hora_fim=hora_fim
-                    )
-            
-            # Processa procedimentos
-            procedimentos_ids = request.POST.getlist('procedimentos')
-            for proc_id in procedimentos_ids:
-                try:
-                    procedimento = Procedimento.objects.get(pk=proc_id)
-                    ProfissionalProcedimento.objects.get_or_create(
-                        profissional=profissional,
-                        procedimento=procedimento
-                    )
-                except Procedimento.DoesNotExist:
-                    pass
-            
             messages.success(request, f'Profissional {nome} cadastrado com sucesso!')
             return redirect('shivazen:adminDashboard')
             
@@ -359,129 +435,93 @@ def profissionalEditar(request):
     return render(request, 'telas/tela_editar_profissional.html')
 
 # --- Dashboard Administrativo ---
-@login_required(login_url='/login/')
+@requer_funcionalidade(permissoes.DASHBOARD)
 def adminDashboard(request):
     """
     Dashboard administrativo com estatísticas e informações gerais
     """
-    # Verifica se o usuário é staff/admin
-    if not request.user.is_staff:
-        messages.error(request, 'Acesso negado. Você precisa ser administrador.')
-        return redirect('shivazen:painel')
-    
-    from django.db.models import Count, Q, Sum
-    from datetime import datetime, timedelta
-    
-    # Estatísticas gerais
-    total_clientes = Cliente.objects.filter(ativo=True).count()
-    total_profissionais = Profissional.objects.filter(ativo=True).count()
-    total_procedimentos = Procedimento.objects.filter(ativo=True).count()
-    
-    # Agendamentos
-    hoje = datetime.now().date()
-    agendamentos_hoje = Atendimento.objects.filter(
-        data_hora_inicio__date=hoje
-    ).count()
-    
-    agendamentos_mes = Atendimento.objects.filter(
-        data_hora_inicio__month=hoje.month,
-        data_hora_inicio__year=hoje.year
-    ).count()
-    
-    agendamentos_pendentes = Atendimento.objects.filter(
-        status_atendimento='AGENDADO'
-    ).count()
-    
-    agendamentos_confirmados = Atendimento.objects.filter(
-        status_atendimento='CONFIRMADO'
-    ).count()
-    
-    # Agendamentos recentes (últimos 10)
-    agendamentos_recentes = Atendimento.objects.select_related(
-        'cliente', 'profissional', 'procedimento'
-    ).order_by('-data_hora_inicio')[:10]
-    
-    # Agendamentos por status
-    agendamentos_por_status = Atendimento.objects.values('status_atendimento').annotate(
-        total=Count('id_atendimento')
-    ).order_by('-total')
-    
-    # Agendamentos dos próximos 7 dias
-    proximos_7_dias = hoje + timedelta(days=7)
-    agendamentos_proximos = Atendimento.objects.filter(
-        data_hora_inicio__date__gte=hoje,
-        data_hora_inicio__date__lte=proximos_7_dias
-    ).select_related('cliente', 'profissional', 'procedimento').order_by('data_hora_inicio')[:10]
-    
-    # Receita do mês (se houver valores)
-    receita_mes = Atendimento.objects.filter(
-        data_hora_inicio__month=hoje.month,
-        data_hora_inicio__year=hoje.year,
-        valor_cobrado__isnull=False
-    ).aggregate(total=Sum('valor_cobrado'))['total'] or 0
-    
-    # Profissionais mais ocupados (top 5)
-    profissionais_ocupados = Profissional.objects.annotate(
-        total_agendamentos=Count('atendimento')
-    ).filter(ativo=True).order_by('-total_agendamentos')[:5]
-    
-    # Procedimentos mais solicitados (top 5)
-    procedimentos_populares = Procedimento.objects.annotate(
-        total_agendamentos=Count('atendimento')
-    ).filter(ativo=True).order_by('-total_agendamentos')[:5]
-    
-    # Gráfico de agendamentos por dia da semana (últimos 30 dias)
-    from django.db.models.functions import ExtractWeekDay
-    agendamentos_semana = Atendimento.objects.filter(
-        data_hora_inicio__gte=hoje - timedelta(days=30)
-    ).annotate(
-        dia_semana=ExtractWeekDay('data_hora_inicio')
-    ).values('dia_semana').annotate(
-        total=Count('id_atendimento')
-    ).order_by('dia_semana')
-    
-    # Preparar dados para gráfico
-    dias_semana = ['Dom', 'Seg', 'Ter', 'Qua', 'Qui', 'Sex', 'Sáb']
-    dados_grafico_semana = [0] * 7
-    for item in agendamentos_semana:
-        # Django retorna 1=Dom, 2=Seg, etc. Ajustamos para índice do array
-        idx = (item['dia_semana'] - 1) % 7
-        dados_grafico_semana[idx] = item['total']
-    
-    context = {
-        'total_clientes': total_clientes,
-        'total_profissionais': total_profissionais,
-        'total_procedimentos': total_procedimentos,
-        'agendamentos_hoje': agendamentos_hoje,
-        'agendamentos_mes': agendamentos_mes,
-        'agendamentos_pendentes': agendamentos_pendentes,
-        'agendamentos_confirmados': agendamentos_confirmados,
-        'agendamentos_recentes': agendamentos_recentes,
-        'agendamentos_proximos': agendamentos_proximos,
-        'agendamentos_por_status': agendamentos_por_status,
-        'receita_mes': float(receita_mes),
-        'profissionais_ocupados': profissionais_ocupados,
-        'procedimentos_populares': procedimentos_populares,
-        'dados_grafico_semana': json.dumps(dados_grafico_semana),
-        'dias_semana': json.dumps(dias_semana),
-    }
+    # Todos os números vêm de um snapshot em cache (ver dashboard.py)
+    context = dict(obter_snapshot(timezone.localdate()))
+    context['dados_grafico_semana'] = json.dumps(context['dados_grafico_semana'])
+    context['dias_semana'] = json.dumps(context['dias_semana'])
     
     return render(request, 'admin/dashboard.html', context)
 
 # --- Views Administrativas Adicionais ---
-@login_required(login_url='/login/')
+@requer_funcionalidade(permissoes.AGENDAMENTOS)
 def adminAgendamentos(request):
-    """Lista todos os agendamentos para administradores"""
-    if not request.user.is_staff:
-        messages.error(request, 'Acesso negado. Você precisa ser administrador.')
-        return redirect('shivazen:painel')
-    
+    """Lista todos os agendamentos para administradores, paginados por cursor"""
     status_filter = request.GET.get('status', '')
     data_filter = request.GET.get('data', '')
-    
-    agendamentos = Atendimento.objects.select_related(
+    agendamentos = _filtrar_agendamentos(status_filter, data_filter).select_related(
         'cliente', 'profissional', 'procedimento'
-    ).order_by('-data_hora_inicio')
+    )
+    
+    try:
+        pagina, cursor_proximo, cursor_anterior = paginar_por_chave(
+            agendamentos, request.GET.get('cursor'), TAMANHO_PAGINA_AGENDAMENTOS
+        )
+    except CursorInvalido:
+        # Link antigo ou editado: volta para a primeira página
+        pagina, cursor_proximo, cursor_anterior = paginar_por_chave(
+            agendamentos, None, TAMANHO_PAGINA_AGENDAMENTOS
+        )
+    
+    context = {
+        'agendamentos': pagina,
+        'cursor_proximo': cursor_proximo,
+        'cursor_anterior': cursor_anterior,
+        'status_filter': status_filter,
+        'data_filter': data_filter,
+    }
+    
+    return render(request, 'admin/agendamentos.html', context)
+
+@requer_funcionalidade(permissoes.AGENDAMENTOS)
+def exportarAgendamentos(request):
+    """
+    Exporta em CSV os agendamentos do filtro atual, gerando o arquivo aos poucos.
+    Sob ASGI o conteúdo precisa ser um gerador assíncrono: um iterador
+    síncrono seria lido inteiro para a memória antes do primeiro byte.
+    """
+    linhas = _filtrar_agendamentos(
+        request.GET.get('status', ''), request.GET.get('data', '')
+    ).order_by('-data_hora_inicio', '-pk').values_list(
+        'data_hora_inicio', 'cliente__nome_completo', 'cliente__cpf', 'profissional__nome',
+        'procedimento__nome', 'status_atendimento', 'valor_cobrado',
+    )
+    escritor = csv.writer(_LinhaCSV())
+
+    def gerar():
+        yield escritor.writerow(CABECALHO_EXPORTACAO)
+        for linha in linhas.iterator(chunk_size=TAMANHO_LOTE_EXPORTACAO):
+            yield _linha_exportacao(escritor, linha)
+
+    async def agerar():
+        # QuerySet.aiterator() não serve: com values_list() ele abre o cursor
+        # ainda no event loop. Cada bloco é lido na thread do ORM.
+        yield escritor.writerow(CABECALHO_EXPORTACAO)
+        resultados = linhas.iterator(chunk_size=TAMANHO_LOTE_EXPORTACAO)
+        proximo_bloco = sync_to_async(lambda: list(islice(resultados, TAMANHO_LOTE_EXPORTACAO)))
+        while bloco := await proximo_bloco():
+            for linha in bloco:
+                yield _linha_exportacao(escritor, linha)
+
+    conteudo = agerar() if isinstance(request, ASGIRequest) else gerar()
+    response = StreamingHttpResponse(conteudo, content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = 'attachment; filename="agendamentos.csv"'
+    return response
+
+def _linha_exportacao(escritor, linha):
+    inicio, *resto, valor = linha
+    return escritor.writerow([
+        timezone.localtime(inicio).strftime('%d/%m/%Y %H:%M'), *resto,
+        '' if valor is None else valor,
+    ])
+
+def _filtrar_agendamentos(status_filter, data_filter):
+    """Filtros comuns da listagem e da exportação de agendamentos"""
+    agendamentos = Atendimento.objects.all()
     
     if status_filter:
         agendamentos = agendamentos.filter(status_atendimento=status_filter)
@@ -489,26 +529,23 @@ def adminAgendamentos(request):
     if data_filter:
         try:
             data = datetime.strptime(data_filter, '%Y-%m-%d').date()
-            agendamentos = agendamentos.filter(data_hora_inicio__date=data)
+            agendamentos = agendamentos.no_dia(data)
         except ValueError:
             pass
     
-    context = {
-        'agendamentos': agendamentos[:50],  # Limita a 50 para performance
-        'status_filter': status_filter,
-        'data_filter': data_filter,
-    }
-    
-    return render(request, 'admin/agendamentos.html', context)
+    return agendamentos
 
-@login_required(login_url='/login/')
+class _LinhaCSV:
+    """Buffer falso para o csv.writer: devolve a linha em vez de guardá-la"""
+    def write(self, valor):
+        return valor
+
+@requer_funcionalidade(permissoes.PROCEDIMENTOS)
 def adminProcedimentos(request):
     """Gestão de procedimentos e preços"""
-    if not request.user.is_staff:
-        messages.error(request, 'Acesso negado. Você precisa ser administrador.')
-        return redirect('shivazen:painel')
-    
-    procedimentos = Procedimento.objects.prefetch_related('preco_set').filter(ativo=True)
+    procedimentos = Procedimento.objects.prefetch_related(
+        Prefetch('preco_set', queryset=Preco.objects.select_related('profissional'))
+    ).filter(ativo=True)
     profissionais = Profissional.objects.filter(ativo=True)
     
     context = {
@@ -518,17 +555,13 @@ def adminProcedimentos(request):
     
     return render(request, 'admin/procedimentos.html', context)
 
-@login_required(login_url='/login/')
+@requer_funcionalidade(permissoes.BLOQUEIOS)
 def adminBloqueios(request):
     """Lista bloqueios de agenda"""
-    if not request.user.is_staff:
-        messages.error(request, 'Acesso negado. Você precisa ser administrador.')
-        return redirect('shivazen:painel')
-    
     bloqueios = BloqueioAgenda.objects.select_related('profissional').order_by('-data_hora_inicio')
     
     # Filtra apenas bloqueios futuros ou ativos
-    hoje = datetime.now()
+    hoje = timezone.now()
     bloqueios_ativos = bloqueios.filter(data_hora_fim__gte=hoje)
     
     context = {
@@ -537,13 +570,9 @@ def adminBloqueios(request):
     
     return render(request, 'admin/bloqueios.html', context)
 
-@login_required(login_url='/login/')
+@requer_funcionalidade(permissoes.BLOQUEIOS)
 def criarBloqueio(request):
     """Cria um novo bloqueio de agenda"""
-    if not request.user.is_staff:
-        messages.error(request, 'Acesso negado. Você precisa ser administrador.')
-        return redirect('shivazen:painel')
-    
     if request.method == 'POST':
         try:
             profissional_id = request.POST.get('profissional')
@@ -575,13 +604,9 @@ def criarBloqueio(request):
     context = {'profissionais': profissionais}
     return render(request, 'admin/criar_bloqueio.html', context)
 
-@login_required(login_url='/login/')
+@requer_funcionalidade(permissoes.BLOQUEIOS)
 def excluirBloqueio(request, bloqueio_id):
     """Exclui um bloqueio de agenda"""
-    if not request.user.is_staff:
-        messages.error(request, 'Acesso negado. Você precisa ser administrador.')
-        return redirect('shivazen:painel')
-    
     try:
         bloqueio = BloqueioAgenda.objects.get(pk=bloqueio_id)
         bloqueio.delete()
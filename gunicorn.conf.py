@@ -0,0 +1,29 @@
+# gunicorn.conf.py
+"""
+Perfil de deploy do gunicorn. O padrão são workers síncronos (WSGI):
+
+    gunicorn shivazen.wsgi
+
+Para ASGI, peça os workers uvicorn; cada um é um processo com event loop
+próprio, e as views assíncronas (buscar_horarios, buscar_procedimentos)
+atendem muitas consultas de agenda simultâneas no mesmo processo:
+
+    GUNICORN_WORKER_CLASS=uvicorn_worker.UvicornWorker gunicorn shivazen.asgi:application
+
+Ajuste pelas variáveis de ambiente abaixo.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+# O mesmo cálculo vale para settings.WORKERS, que escolhe o backend dos caches
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+# 'sync' serve o WSGI; o ASGI exige 'uvicorn_worker.UvicornWorker'
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+# Recicla workers de tempos em tempos (evita crescimento de memória)
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 200))
+accesslog = '-'
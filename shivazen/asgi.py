@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'shivazen.settings')
+# Lido pelas settings: sob ASGI o padrão de DB_CONEXOES é 'nenhuma'
+os.environ.setdefault('SHIVAZEN_SERVIDOR', 'asgi')
 
 application = get_asgi_application()
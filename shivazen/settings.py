@@ -1,4 +1,5 @@
 # shivazen/settings.py
+import multiprocessing
 import os
 from pathlib import Path
 
@@ -37,12 +38,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'app_shivazen.middleware.OrcamentoConsultasMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware', 
+    'app_shivazen.middleware.ArquivosEstaticosMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'app_shivazen.middleware.AuditoriaMiddleware',
+    'app_shivazen.middleware.ClienteMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -82,6 +86,197 @@ DATABASES = {
     }
 }
 
+# Reaproveitamento de conexões (o search_path acima é negociado só quando
+# uma conexão nova é aberta). DB_CONEXOES:
+# - 'persistente' (padrão com WSGI): cada thread mantém sua conexão por
+#   DB_CONN_MAX_AGE segundos, testada antes do uso quando
+#   DB_CONN_HEALTH_CHECKS=True. Não use sob ASGI: as consultas assíncronas
+#   rodam em threads que mudam a cada requisição, e as conexões se acumulam.
+# - 'pool': pool do psycopg 3 (psycopg[pool], em requirements.txt), indicado
+#   para ASGI.
+# - 'nenhuma' (padrão com ASGI): uma conexão por requisição.
+# shivazen/asgi.py define SHIVAZEN_SERVIDOR='asgi'.
+SERVIDOR = os.environ.get('SHIVAZEN_SERVIDOR', 'wsgi')
+DB_CONEXOES = os.environ.get('DB_CONEXOES', 'nenhuma' if SERVIDOR == 'asgi' else 'persistente')
+if DB_CONEXOES == 'pool':
+    DATABASES['default']['CONN_MAX_AGE'] = 0  # o pool cuida do reaproveitamento
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.environ.get('DB_POOL_MIN', '2')),
+        'max_size': int(os.environ.get('DB_POOL_MAX', '10')),
+        'timeout': int(os.environ.get('DB_POOL_TIMEOUT', '10')),
+    }
+elif DB_CONEXOES == 'persistente':
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', '60'))
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = os.environ.get('DB_CONN_HEALTH_CHECKS', 'True') == 'True'
+elif DB_CONEXOES != 'nenhuma':
+    raise ValueError(f"DB_CONEXOES inválido: {DB_CONEXOES!r} (use 'persistente', 'pool' ou 'nenhuma')")
+
+# --- Orçamento de consultas por requisição (app_shivazen/middleware.py) ---
+# Com SERVER_TIMING (padrão: só em DEBUG), cada resposta traz o cabeçalho
+# Server-Timing com consultas e tempo de banco; em produção ele revelaria
+# esses números a qualquer visitante.
+# ACAO 'log' registra um aviso quando a view passa do LIMITE; 'erro' levanta
+# exceção (útil em desenvolvimento para pegar N+1 cedo).
+SHIVAZEN_ORCAMENTO_CONSULTAS = {
+    'LIMITE': int(os.environ.get('ORCAMENTO_CONSULTAS', '50')) or None,  # 0 desliga
+    'ACAO': os.environ.get('ORCAMENTO_CONSULTAS_ACAO', 'log'),
+    'SERVER_TIMING': os.environ.get('ORCAMENTO_SERVER_TIMING', str(DEBUG)) == 'True',
+}
+
+
+# --- Notificações (app_shivazen/notificacoes.py) ---
+# O agendamento só enfileira; o envio é feito pelo comando
+# 'python manage.py despachar_notificacoes'. CANAIS aponta a classe de
+# backend de cada canal (BackendEmail, BackendConsole, BackendArquivo);
+# um canal sem backend fica desligado. O WhatsApp só liga com
+# NOTIFICACOES_BACKEND_WHATSAPP: o BackendConsole apenas registra a mensagem
+# no log, e o despacho a daria como enviada.
+# ARQUIVO é onde o BackendArquivo grava.
+EMAIL_BACKEND = os.environ.get(
+    'EMAIL_BACKEND',
+    'django.core.mail.backends.console.EmailBackend' if DEBUG else 'django.core.mail.backends.smtp.EmailBackend',
+)
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'Shiva Zen <nao-responda@shivazen.com.br>')
+SHIVAZEN_NOTIFICACOES = {
+    'CANAIS': {
+        'EMAIL': os.environ.get('NOTIFICACOES_BACKEND_EMAIL', 'app_shivazen.notificacoes.BackendEmail'),
+        'WHATSAPP': os.environ.get('NOTIFICACOES_BACKEND_WHATSAPP'),
+    },
+    'MAX_TENTATIVAS': int(os.environ.get('NOTIFICACOES_MAX_TENTATIVAS', '5')),
+    'ARQUIVO': os.environ.get('NOTIFICACOES_ARQUIVO', BASE_DIR / 'notificacoes.jsonl'),
+}
+
+
+# --- Auditoria (app_shivazen/auditoria.py) ---
+# Eventos são gravados em lote no fim da requisição ou ao atingir
+# TAMANHO_LOTE eventos / INTERVALO segundos. 'python manage.py podar_auditoria'
+# remove (ou arquiva) os meses além de RETENCAO_MESES.
+SHIVAZEN_AUDITORIA = {
+    'TAMANHO_LOTE': int(os.environ.get('AUDITORIA_TAMANHO_LOTE', '100')),
+    'INTERVALO': float(os.environ.get('AUDITORIA_INTERVALO', '5')),
+    'RETENCAO_MESES': int(os.environ.get('AUDITORIA_RETENCAO_MESES', '24')),
+}
+
+# --- Caches da aplicação (app_shivazen/cache.py) ---
+# 'django' = backend django.core.cache indicado em ALIAS, compartilhado entre
+# os workers e os comandos; é o padrão com mais de um worker.
+# 'local' = LRU em memória de cada processo, inclusive os contadores de
+# versão: uma invalidação só vale no processo que a fez. Use só com um
+# processo (desenvolvimento ou GUNICORN_WORKERS=1); com mais, a aplicação
+# registra um aviso na inicialização.
+# O alias 'compartilhado' usa Redis quando REDIS_URL está definida (requer o
+# pacote redis); sem ela, arquivos em CACHE_COMPARTILHADO_PASTA, que só são
+# compartilhados entre processos da mesma máquina.
+WORKERS = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))  # como em gunicorn.conf.py
+_backend_cache_padrao = 'django' if WORKERS > 1 else 'local'
+if os.environ.get('REDIS_URL'):
+    _cache_compartilhado = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    }
+else:
+    _cache_compartilhado = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_COMPARTILHADO_PASTA', '/var/tmp/shivazen_cache'),
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    }
+
+SHIVAZEN_CACHES = {
+    'disponibilidade': {
+        'BACKEND': os.environ.get('CACHE_DISPONIBILIDADE_BACKEND', _backend_cache_padrao),
+        'ALIAS': os.environ.get('CACHE_DISPONIBILIDADE_ALIAS', 'compartilhado'),
+        'MAX_ITENS': int(os.environ.get('CACHE_DISPONIBILIDADE_MAX_ITENS', '4096')),
+        'TIMEOUT': int(os.environ.get('CACHE_DISPONIBILIDADE_TIMEOUT', '300')),
+    },
+    'dashboard': {
+        'BACKEND': os.environ.get('CACHE_DASHBOARD_BACKEND', _backend_cache_padrao),
+        'ALIAS': os.environ.get('CACHE_DASHBOARD_ALIAS', 'compartilhado'),
+        'MAX_ITENS': 4,
+        'TIMEOUT': int(os.environ.get('CACHE_DASHBOARD_TIMEOUT', '60')),
+    },
+    # Mapa perfil -> funcionalidades, invalidado por versão. Sempre no cache
+    # compartilhado: em um cache por processo, uma funcionalidade revogada
+    # continuaria liberada nos outros workers. Com mais de um worker, a
+    # aplicação não inicia se ele for por processo.
+    'permissoes': {
+        'BACKEND': os.environ.get('CACHE_PERMISSOES_BACKEND', 'django'),
+        'ALIAS': os.environ.get('CACHE_PERMISSOES_ALIAS', 'compartilhado'),
+        'MAX_ITENS': 4,
+        'TIMEOUT': int(os.environ.get('CACHE_PERMISSOES_TIMEOUT', '300')),
+        'EXIGE_COMPARTILHADO': True,
+    },
+    # Páginas abertas para visitantes anônimos; invalidadas pela versão do catálogo
+    'paginas': {
+        'BACKEND': os.environ.get('CACHE_PAGINAS_BACKEND', _backend_cache_padrao),
+        'ALIAS': os.environ.get('CACHE_PAGINAS_ALIAS', 'compartilhado'),
+        'MAX_ITENS': 64,
+        'TIMEOUT': int(os.environ.get('CACHE_PAGINAS_TIMEOUT', '3600')),
+    },
+}
+
+
+# --- Sessões ---
+# SESSAO_BACKEND escolhe onde as sessões ficam:
+#   'cache_banco' (padrão): cached_db; leituras saem do cache 'sessoes' e o
+#       banco só é usado ao gravar (ou quando a sessão não está no cache)
+#   'cookie': signed_cookies; nada no servidor, a sessão vai assinada no
+#       cookie (ela é pequena: ids e nome do usuário). Não dá para encerrar
+#       sessões pelo servidor, só trocando a SECRET_KEY.
+#   'banco': tabela django_session em toda requisição (comportamento antigo)
+# SESSAO_CACHE, o cache do 'cache_banco':
+#   'compartilhado' (padrão com mais de um worker): Redis se REDIS_URL
+#       estiver definida, senão arquivos em SESSAO_CACHE_PASTA
+#   'arquivo': arquivos em SESSAO_CACHE_PASTA, só entre os workers da máquina
+#   'memoria' (padrão com um worker): LocMemCache, por processo. Logout,
+#       troca de chave (login) e flush só limpariam a cópia do worker que
+#       atendeu; os outros continuariam aceitando a sessão até o TIMEOUT.
+#       Por isso 'memoria' é recusado com 'cache_banco' e mais de um worker.
+# Com 'banco' ou 'cache_banco', rode 'python manage.py podar_sessoes' no cron.
+MOTORES_SESSAO = {
+    'cache_banco': 'django.contrib.sessions.backends.cached_db',
+    'cookie': 'django.contrib.sessions.backends.signed_cookies',
+    'banco': 'django.contrib.sessions.backends.db',
+}
+SESSAO_BACKEND = os.environ.get('SESSAO_BACKEND', 'cache_banco')
+if SESSAO_BACKEND not in MOTORES_SESSAO:
+    raise ValueError(f"SESSAO_BACKEND inválido: {SESSAO_BACKEND!r} (use {', '.join(map(repr, MOTORES_SESSAO))})")
+SESSION_ENGINE = MOTORES_SESSAO[SESSAO_BACKEND]
+SESSION_CACHE_ALIAS = 'sessoes'
+SESSION_COOKIE_AGE = int(os.environ.get('SESSAO_DURACAO', str(60 * 60 * 24 * 14)))  # segundos
+
+SESSAO_CACHE = os.environ.get('SESSAO_CACHE', 'compartilhado' if WORKERS > 1 else 'memoria')
+_pasta_sessoes = os.environ.get('SESSAO_CACHE_PASTA', '/var/tmp/shivazen_sessoes')
+if SESSAO_CACHE == 'compartilhado' and 'REDIS_URL' in os.environ:
+    _cache_sessoes = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+        'KEY_PREFIX': 'sessoes',
+    }
+elif SESSAO_CACHE in ('compartilhado', 'arquivo'):
+    _cache_sessoes = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': _pasta_sessoes,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+elif SESSAO_CACHE == 'memoria':
+    if WORKERS > 1 and SESSAO_BACKEND == 'cache_banco':
+        raise ValueError(
+            f"SESSAO_CACHE='memoria' com {WORKERS} workers: logout e troca de sessão não "
+            f"chegariam aos outros processos (use 'compartilhado' ou 'arquivo')"
+        )
+    _cache_sessoes = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sessoes',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+else:
+    raise ValueError(f"SESSAO_CACHE inválido: {SESSAO_CACHE!r} (use 'compartilhado', 'arquivo' ou 'memoria')")
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'compartilhado': _cache_compartilhado,
+    'sessoes': {**_cache_sessoes, 'TIMEOUT': SESSION_COOKIE_AGE},
+}
+
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -141,7 +336,9 @@ JAZZMIN_SETTINGS = {
         {"name": "Agenda", "icon": "fas fa-calendar-alt", "models": [
             {"model": "app_shivazen.atendimento", "label": "Ver Agendamentos", "icon": "fas fa-calendar-check"},
             {"model": "app_shivazen.disponibilidadeprofissional", "label": "Disponibilidades", "icon": "fas fa-clock"},
+            {"model": "app_shivazen.excecaodisponibilidade", "label": "Folgas e Turnos Extras", "icon": "fas fa-calendar-day"},
             {"model": "app_shivazen.bloqueioagenda", "label": "Bloqueios de Agenda", "icon": "fas fa-calendar-times"},
+            {"model": "app_shivazen.bloqueiorecorrente", "label": "Bloqueios Recorrentes", "icon": "fas fa-redo"},
         ]},
         {"name": "Cadastros", "icon": "fas fa-edit", "models": [
             {"model": "app_shivazen.cliente", "label": "Clientes", "icon": "fas fa-address-book"},
@@ -173,7 +370,9 @@ JAZZMIN_SETTINGS = {
         "app_shivazen.Preco": "fas fa-dollar-sign",
         "app_shivazen.Atendimento": "fas fa-calendar-check",
         "app_shivazen.DisponibilidadeProfissional": "fas fa-clock",
+        "app_shivazen.ExcecaoDisponibilidade": "fas fa-calendar-day",
         "app_shivazen.BloqueioAgenda": "fas fa-calendar-times",
+        "app_shivazen.BloqueioRecorrente": "fas fa-redo",
         "app_shivazen.Prontuario": "fas fa-file-medical",
         "app_shivazen.ProntuarioPergunta": "fas fa-question-circle",
         "app_shivazen.ProntuarioResposta": "fas fa-check-circle",
@@ -3,6 +3,8 @@ from django.contrib import admin
 from django.urls import path, include
 
 urlpatterns = [
-    path('admin/', admin.site.urls),  # Rota para a interface de admin
+    # As telas administrativas do app (admin/agendamentos/, admin/bloqueios/...)
+    # vêm antes do admin do Django, cuja rota final captura todo 'admin/...'
     path('', include('app_shivazen.urls')),
-]
\ No newline at end of file
+    path('admin/', admin.site.urls),  # Rota para a interface de admin
+]